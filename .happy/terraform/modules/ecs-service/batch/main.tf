@@ -32,6 +32,14 @@ resource aws_batch_job_definition batch_job_def {
       "name": "REMOTE_DEV_PREFIX",
       "value": "/${var.custom_stack_name}"
     },
+    {
+      "name": "UPLOAD_SFN_ARN",
+      "value": "${var.step_function_arn}"
+    },
+    {
+      "name": "CATALOG_BUCKET",
+      "value": "${var.catalog_bucket}"
+    },
     {
       "name": "FRONTEND_URL",
       "value": "${var.frontend_url}"
@@ -38,3 +38,13 @@ variable frontend_url {
   type        = string
   description = "url for the frontend app"
 }
+
+variable step_function_arn {
+  type        = string
+  description = "ARN for the step function that processes the uploads"
+}
+
+variable catalog_bucket {
+  type        = string
+  description = "S3 bucket for the snapshot of the public catalog"
+}
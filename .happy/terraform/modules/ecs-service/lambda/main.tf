@@ -11,6 +11,7 @@ resource aws_lambda_function lambda_job_def {
       CELLXGENE_BUCKET = var.cellxgene_bucket,
       DEPLOYMENT_STAGE = var.deployment_stage,
       REMOTE_DEV_PREFIX = "/${var.custom_stack_name}",
+      UPLOAD_SFN_ARN = var.step_function_arn,
     }
   }
 }
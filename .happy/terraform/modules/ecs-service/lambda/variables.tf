@@ -27,3 +27,8 @@ variable lambda_execution_role {
   type        = string
   description = "Role for lambda execution"
 }
+
+variable step_function_arn {
+  type        = string
+  description = "ARN for the step function that processes the uploads"
+}
@@ -1,5 +1,48 @@
 # This deploys a dev stack.
 # 
+
+data aws_region current {}
+
+data aws_caller_identity current {}
+
+locals {
+  # The step function is given the batch job and the error handler lambda, which both start queued uploads through
+  # the step function, so its arn is built from its name rather than taken from the upload_sfn module.
+  step_function_arn = "arn:aws:states:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:stateMachine:${var.custom_stack_name}-sfn"
+}
+
+# The snapshot of the public collections that the API redirects the catalog to. It is written by the API when a
+# collection is published, by the batch job when it has processed a public dataset, and by the migration task.
+resource aws_s3_bucket catalog {
+  bucket        = "${var.custom_stack_name}-catalog-${data.aws_caller_identity.current.account_id}"
+  acl           = "private"
+  force_destroy = true
+}
+
+data aws_iam_policy_document catalog {
+  statement {
+    actions   = ["s3:GetObject", "s3:PutObject"]
+    resources = ["${aws_s3_bucket.catalog.arn}/*"]
+  }
+  statement {
+    # Without ListBucket, reading a missing snapshot is denied rather than not found.
+    actions   = ["s3:ListBucket"]
+    resources = [aws_s3_bucket.catalog.arn]
+  }
+}
+
+resource aws_iam_role_policy task_catalog {
+  name   = "${var.custom_stack_name}-catalog"
+  role   = element(split("/", var.task_role_arn), length(split("/", var.task_role_arn)) - 1)
+  policy = data.aws_iam_policy_document.catalog.json
+}
+
+resource aws_iam_role_policy batch_catalog {
+  name   = "${var.custom_stack_name}-catalog"
+  role   = element(split("/", var.batch_role_arn), length(split("/", var.batch_role_arn)) - 1)
+  policy = data.aws_iam_policy_document.catalog.json
+}
+
 module frontend_dns {
   source                = "../dns"
   custom_stack_name     = var.custom_stack_name
@@ -33,6 +76,7 @@ module frontend_service {
   service_port      = 9000
   deployment_stage  = var.deployment_stage
   step_function_arn = module.upload_sfn.step_function_arn
+  catalog_bucket    = aws_s3_bucket.catalog.id
   host_match        = join(".", [module.frontend_dns.dns_prefix, var.external_dns])
   priority          = var.priority
   api_url           = join("", ["https://", module.backend_dns.dns_prefix, ".", var.external_dns])
@@ -55,6 +99,7 @@ module backend_service {
   cmd               = var.backend_cmd
   deployment_stage  = var.deployment_stage
   step_function_arn = module.upload_sfn.step_function_arn
+  catalog_bucket    = aws_s3_bucket.catalog.id
   host_match        = join(".", [module.backend_dns.dns_prefix, var.external_dns])
   priority          = var.priority
   api_url           = join("", ["https://", module.backend_dns.dns_prefix, ".", var.external_dns])
@@ -69,6 +114,7 @@ module migrate_db {
   custom_stack_name = var.custom_stack_name
   deployment_stage  = var.deployment_stage
   data_load_path    = var.data_load_path
+  catalog_bucket    = aws_s3_bucket.catalog.id
 }
 
 module delete_db {
@@ -89,6 +135,8 @@ module upload_batch {
   deployment_stage  = var.deployment_stage
   artifact_bucket   = var.artifact_bucket
   cellxgene_bucket  = var.cellxgene_bucket
+  step_function_arn = local.step_function_arn
+  catalog_bucket    = aws_s3_bucket.catalog.id
   frontend_url      = join("", ["https://", module.frontend_dns.dns_prefix, ".", var.external_dns])
 }
 
@@ -99,6 +147,7 @@ module upload_lambda {
   deployment_stage      = var.deployment_stage
   artifact_bucket       = var.artifact_bucket
   cellxgene_bucket      = var.cellxgene_bucket
+  step_function_arn     = local.step_function_arn
   lambda_execution_role = var.lambda_execution_role
 }
 
@@ -33,6 +33,10 @@ resource aws_ecs_task_definition task_definition {
       {
         "name": "DEPLOYMENT_STAGE",
         "value": "${var.deployment_stage}"
+      },
+      {
+        "name": "CATALOG_BUCKET",
+        "value": "${var.catalog_bucket}"
       }
     ],
     "logConfiguration": {
@@ -28,3 +28,8 @@ variable deployment_stage {
   type        = string
   description = "The name of the deployment stage of the Application"
 }
+
+variable catalog_bucket {
+  type        = string
+  description = "S3 bucket for the snapshot of the public catalog"
+}
@@ -53,6 +53,10 @@ resource aws_ecs_task_definition task_definition {
         "name": "UPLOAD_SFN_ARN",
         "value": "${var.step_function_arn}"
       },
+      {
+        "name": "CATALOG_BUCKET",
+        "value": "${var.catalog_bucket}"
+      },
       {
         "name": "API_URL",
         "value": "${var.api_url}"
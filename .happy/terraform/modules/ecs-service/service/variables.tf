@@ -97,3 +97,8 @@ variable priority {
   type        = number
   description = "Listener rule priority number within the given listener"
 }
+
+variable catalog_bucket {
+  type        = string
+  description = "S3 bucket for the snapshot of the public catalog"
+}
@@ -13,7 +13,21 @@ resource "aws_sfn_state_machine" "state_machine" {
           "JobDefinition": "${var.job_definition_arn}",
           "JobName": "processing",
           "JobQueue": "${var.job_queue_arn}",
+          "RetryStrategy": {
+            "Attempts": 3,
+            "EvaluateOnExit": [
+              {
+                "OnExitCode": "3",
+                "Action": "EXIT"
+              }
+            ]
+          },
+          "Timeout": {
+            "AttemptDurationSeconds": 10800
+          },
           "ContainerOverrides": {
+            "Memory.$": "$.job_memory",
+            "Vcpus.$": "$.job_vcpus",
             "Environment": [
               {
                 "Name": "DROPBOX_URL",
@@ -27,17 +41,7 @@ resource "aws_sfn_state_machine" "state_machine" {
           }
         },
         "End": true,
-        "TimeoutSeconds": 10800,
-        "Retry": [
-          {
-            "ErrorEquals": [
-              "States.TaskFailed"
-            ],
-            "IntervalSeconds": 1,
-            "BackoffRate": 2,
-            "MaxAttempts": 2
-          }
-        ],
+        "TimeoutSeconds": 32400,
         "Catch": [
           {
             "ErrorEquals": [
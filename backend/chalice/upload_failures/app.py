@@ -1,11 +1,15 @@
 from chalice import Chalice
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 
 pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "chalicelib"))  # noqa
 sys.path.insert(0, pkg_root)  # noqa
 
+from backend.corpora.common import upload_scheduler
 from backend.corpora.common.utils.aws import delete_many_from_s3
+from backend.corpora.common.utils.db_utils import db_session_manager
 from backend.corpora.upload_failures.upload import update_dataset_processing_status_to_failed
 
 
@@ -16,9 +20,31 @@ app = Chalice(app_name="upload_failures")
 def handle_failure(event, context):
     dataset_uuid = event["dataset_uuid"]
     object_key = os.path.join(os.environ.get("REMOTE_DEV_PREFIX", ""), dataset_uuid).strip("/")
-    delete_many_from_s3(os.environ["ARTIFACT_BUCKET"], object_key)
     cellxgene_bucket = f"hosted-cellxgene-{os.environ['DEPLOYMENT_STAGE']}"
     if os.getenv("CELLXGENE_BUCKET"):
         cellxgene_bucket = os.getenv("CELLXGENE_BUCKET")
-    delete_many_from_s3(cellxgene_bucket, object_key)
-    update_dataset_processing_status_to_failed(dataset_uuid, event["error"]["Cause"])
+    try:
+        delete_errors = delete_from_buckets([os.environ["ARTIFACT_BUCKET"], cellxgene_bucket], object_key)
+        update_dataset_processing_status_to_failed(dataset_uuid, event["error"]["Cause"])
+    finally:
+        # Free the processing slot so the next queued upload can start, even if the cleanup failed.
+        with db_session_manager():
+            upload_scheduler.release(dataset_uuid)
+    return {"delete_errors": delete_errors}
+
+
+def delete_from_buckets(bucket_names, object_key):
+    """
+    Delete the objects under object_key from all the buckets at the same time.
+    :return: The objects that could not be deleted, by bucket name.
+    """
+    with ThreadPoolExecutor(max_workers=len(bucket_names)) as executor:
+        results = executor.map(lambda bucket_name: delete_many_from_s3(bucket_name, object_key), bucket_names)
+    delete_errors = dict(zip(bucket_names, results))
+    for bucket_name, errors in delete_errors.items():
+        if errors:
+            error_codes = Counter(error["Code"] for error in errors)
+            app.log.error(f"Failed to delete {len(errors)} objects from {bucket_name}: {dict(error_codes)}")
+            for error in errors:
+                app.log.error(f"Failed to delete s3://{bucket_name}/{error['Key']}: {error['Message']}")
+    return delete_errors
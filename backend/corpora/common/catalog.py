@@ -0,0 +1,126 @@
+"""
+A precomputed snapshot of every public collection and its datasets.
+
+The snapshot is the gzipped JSON of the collections, in the shape returned by get_collection_details, and is stored in
+the catalog_bucket of the CorporaConfig. It is regenerated whenever public data changes: when a collection is published
+and when the processing job has finished with a public dataset. Clients read the snapshot directly from S3, or from the
+catalog_url in front of the bucket, so serving the catalog never reads the database nor goes through the API. The gzip
+header has no timestamp, so the S3 ETag of the snapshot only changes when its content does.
+"""
+import gzip
+import json
+import logging
+import os
+import typing
+
+import boto3
+from sqlalchemy.orm import selectinload
+
+from .corpora_config import CorporaConfig
+from .corpora_orm import CollectionVisibility, DbCollection, DbDataset
+from .entities import Collection
+from .utils.db_utils import DbUtils
+from .utils.json import CustomJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+def s3_client():
+    return boto3.client("s3", endpoint_url=os.getenv("BOTO_ENDPOINT_URL"))
+
+
+def get_catalog_location() -> typing.Union[typing.Tuple[str, str], None]:
+    """
+    :return: The bucket and key of the catalog snapshot, or None if no catalog bucket is configured.
+    """
+    config = CorporaConfig()
+    try:
+        return config.catalog_bucket, config.catalog_key
+    except RuntimeError:
+        return None
+
+
+def build_catalog() -> dict:
+    """
+    Reads every public collection with its links and datasets. The related rows of all the collections are loaded with
+    one query per relationship, rather than one query per collection.
+    """
+    db = DbUtils()
+    db_collections = (
+        db.session.query(DbCollection)
+        .filter(DbCollection.visibility == CollectionVisibility.PUBLIC)
+        .options(
+            selectinload(DbCollection.links),
+            selectinload(DbCollection.datasets).selectinload(DbDataset.artifacts),
+            selectinload(DbCollection.datasets).selectinload(DbDataset.deployment_directories),
+            selectinload(DbCollection.datasets).selectinload(DbDataset.processing_status),
+        )
+        .order_by(DbCollection.id)
+        .all()
+    )
+    collections = []
+    for db_collection in db_collections:
+        collection = Collection(db_collection).reshape_for_api()
+        for dataset in collection["datasets"]:
+            # The processing status changes while a dataset is processed and is not part of the public catalog.
+            dataset.pop("processing_status", None)
+        collections.append(collection)
+    return {"collections": collections}
+
+
+def update_catalog() -> typing.Union[str, None]:
+    """
+    Regenerates the catalog snapshot from the database.
+    :return: The ETag of the snapshot, or None if no catalog bucket is configured.
+    """
+    location = get_catalog_location()
+    if not location:
+        logger.info("No catalog bucket is configured. The catalog snapshot is not updated.")
+        return None
+    bucket, key = location
+    response = s3_client().put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=gzip.compress(dump_catalog().encode(), mtime=0),
+        ContentType="application/json",
+        ContentEncoding="gzip",
+        CacheControl=f"public, max-age={CorporaConfig().catalog_max_age}",
+    )
+    logger.info(f"Updated the catalog snapshot s3://{bucket}/{key} to {response['ETag']}.")
+    return response["ETag"]
+
+
+def dump_catalog() -> str:
+    return json.dumps(build_catalog(), cls=CustomJSONEncoder, separators=(",", ":"), sort_keys=True)
+
+
+def get_catalog_url() -> typing.Union[str, None]:
+    """
+    The snapshot is not read here. It is created by update_catalog, and a read never generates it.
+    :return: The URL the catalog snapshot is read from, or None if no catalog bucket is configured. This is the
+    catalog_url of the CorporaConfig if it is set, and a presigned URL of the snapshot otherwise. A presigned URL is
+    valid for twice the catalog_max_age, so that it still works for as long as a redirect to it is cached.
+    """
+    location = get_catalog_location()
+    if not location:
+        return None
+    config = CorporaConfig()
+    try:
+        return config.catalog_url
+    except RuntimeError:
+        pass
+    bucket, key = location
+    return s3_client().generate_presigned_url(
+        "get_object", Params=dict(Bucket=bucket, Key=key), ExpiresIn=2 * config.catalog_max_age
+    )
+
+
+def try_update_catalog() -> None:
+    """
+    Regenerates the catalog snapshot, logging rather than raising any error, for callers whose own change has already
+    been committed.
+    """
+    try:
+        update_catalog()
+    except Exception:
+        logger.exception("Failed to update the catalog snapshot.")
@@ -10,9 +10,26 @@ class CorporaConfig(SecretConfig):
         super().__init__("backend", secret_name="config", **kwargs)
 
     def get_defaults_template(self):
-        template = {"upload_file_formats": ["h5ad"], "upload_max_file_size_gb": 30}
+        template = {
+            "upload_file_formats": ["h5ad"],
+            "upload_max_file_size_gb": 30,
+            "upload_validation_mode": "sync",
+            "upload_max_concurrent_jobs": 20,
+            "upload_max_concurrent_jobs_per_owner": 5,
+            # Longer than the step function can run, including its retries.
+            "upload_slot_timeout_seconds": 12 * 60 * 60,
+            "upload_job_sizes": [
+                {"max_file_size_gb": 1, "memory": 8000, "vcpus": 1},
+                {"max_file_size_gb": 5, "memory": 16000, "vcpus": 2},
+                {"max_file_size_gb": 30, "memory": 28000, "vcpus": 2},
+            ],
+            "catalog_key": "catalog/public.json.gz",
+            "catalog_max_age": 3600,
+        }
         if os.getenv("UPLOAD_SFN_ARN"):
             template["upload_sfn_arn"] = os.getenv("UPLOAD_SFN_ARN")
+        if os.getenv("CATALOG_BUCKET"):
+            template["catalog_bucket"] = os.getenv("CATALOG_BUCKET")
         return template
 
 
@@ -4,6 +4,7 @@ from datetime import datetime
 from uuid import uuid4
 import sys
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     create_engine,
@@ -12,8 +13,10 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     ForeignKeyConstraint,
+    Index,
     Integer,
     String,
+    UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base, DeclarativeMeta
@@ -246,6 +249,26 @@ class DbDataset(Base, AuditMixin):
     )
 
 
+class DbDatasetFacet(Base):
+    """
+    One metadata value of a dataset, such as one of its tissues, copied out of the JSONB metadata columns of
+    DbDataset so that datasets can be counted and filtered by facet with index lookups. The rows of a dataset are
+    replaced whenever its metadata is updated.
+    """
+
+    __tablename__ = "dataset_facet"
+
+    dataset_id = Column(ForeignKey("dataset.id", ondelete="CASCADE"), nullable=False)
+    facet = Column(String, nullable=False)
+    ontology_term_id = Column(String, nullable=False, default="")
+    label = Column(String, nullable=False, default="")
+
+    __table_args__ = (
+        UniqueConstraint(dataset_id, facet, ontology_term_id, label),
+        Index("ix_dataset_facet_facet_ontology_term_id", facet, ontology_term_id),
+    )
+
+
 class DbDatasetArtifact(Base, AuditMixin):
     """
     Represents a user uploaded or Corpora generated file linked to a DbDataset.
@@ -355,3 +378,19 @@ class DbDatasetProcessingStatus(Base, AuditMixin):
 
     # Relationships
     dataset = relationship("DbDataset", back_populates="processing_status")
+
+
+class DbUploadQueueEntry(Base, AuditMixin):
+    """
+    Represents a dataset upload that is waiting for, or holding, one of the limited processing slots.
+    Entries are created when an upload is requested and removed once its processing job has finished.
+    """
+
+    __tablename__ = "upload_queue"
+
+    dataset_id = Column(ForeignKey("dataset.id", ondelete="CASCADE"), nullable=False, unique=True)
+    collection_id = Column(String, nullable=False)
+    owner = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    file_size = Column(BigInteger)
+    started_at = Column(DateTime)
@@ -1,16 +1,160 @@
+import html
+import json
 import logging
 import os
 import time
 
 import anndata
+import h5py
 import s3fs
-from numpy import ndarray
-from pandas import DataFrame, Series
+from numpy import array, nan, ndarray, prod
+from pandas import CategoricalDtype, DataFrame, Series, unique
+from pandas.api.types import infer_dtype
 import typing
 from scipy.sparse import spmatrix
 
+try:
+    from anndata.experimental import read_elem
+except ImportError:  # anndata < 0.8
+    from anndata._io.h5ad import read_attribute as read_elem
+
+from . import ontology_cache
 from .utils.corpora_constants import CorporaConstants
 from .utils.math_utils import sizeof_formatted
+from .validation_report import ERROR, MAX_REPORTED_VALUES, WARNING, ValidationReport
+
+BACKED_READ_BLOCK_SIZE = 2 ** 20  # The size of the ranged S3 reads made when validating a backed file.
+X_CHUNK_SIZE = 2 ** 22  # The number of values of X read at once when checking a backed file for data.
+
+
+class ByteCountingFile:
+    """
+    Wraps a file object to count the bytes read from it.
+    """
+
+    def __init__(self, file_object):
+        self.file_object = file_object
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.file_object.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        return self.file_object.seek(offset, whence)
+
+    def tell(self):
+        return self.file_object.tell()
+
+    def __getattr__(self, name):
+        return getattr(self.file_object, name)
+
+
+class H5adMetadata:
+    """
+    The metadata of an H5AD file, read without reading the data matrices. Provides the attributes of an AnnData object
+    that the DatasetValidator checks. X is the HDF5 dataset or group that stores the X layer.
+    """
+
+    def __init__(self, h5ad_file: h5py.File):
+        self.obs = read_elem(h5ad_file["obs"])
+        self.var = read_elem(h5ad_file["var"])
+        self.uns = read_elem(h5ad_file["uns"]) if "uns" in h5ad_file else {}
+        self.layers = dict.fromkeys(h5ad_file["layers"].keys()) if "layers" in h5ad_file else {}
+        self.raw = "raw" in h5ad_file or "raw.X" in h5ad_file
+        self.X = h5ad_file["X"] if "X" in h5ad_file else None
+
+    def obs_keys(self):
+        return self.obs.columns.tolist()
+
+    def uns_keys(self):
+        return list(self.uns.keys())
+
+
+class LoomMetadata(H5adMetadata):
+    """
+    The metadata of a Loom file, read without reading the data matrices, in the form anndata.read_loom would give it.
+    The column attributes are the obs, the row attributes are the var and the global attributes are the uns. X is the
+    HDF5 dataset of the main matrix, or of the layer `x_layer_name` if the file has it.
+    """
+
+    OBS_NAMES = "CellID"
+    VAR_NAMES = "Gene"
+    MAIN_LAYER_NAME = "matrix"
+
+    def __init__(self, loom_file: h5py.File, x_layer_name: str = None):
+        self.obs = self.read_axis_attributes(loom_file.get("col_attrs"), self.OBS_NAMES)
+        self.var = self.read_axis_attributes(loom_file.get("row_attrs"), self.VAR_NAMES)
+        self.uns = self.read_global_attributes(loom_file)
+        layer_names = list(loom_file["layers"].keys()) if "layers" in loom_file else []
+        if x_layer_name in layer_names:
+            self.X = loom_file["layers"][x_layer_name]
+            layer_names = [self.MAIN_LAYER_NAME] + [name for name in layer_names if name != x_layer_name]
+        else:
+            self.X = loom_file.get(self.MAIN_LAYER_NAME)
+        self.layers = dict.fromkeys(layer_names)
+        self.raw = False
+
+    @classmethod
+    def read_axis_attributes(cls, attributes: h5py.Group, names_attribute: str) -> DataFrame:
+        """
+        Reads the one dimensional attributes of an axis into a DataFrame indexed by the attribute `names_attribute`.
+        Attributes with more dimensions are embeddings, which are not validated.
+        """
+
+        if attributes is None:
+            return DataFrame()
+        columns = {
+            name: cls.decode_values(dataset[()])
+            for name, dataset in attributes.items()
+            if isinstance(dataset, h5py.Dataset) and len(dataset.shape) == 1
+        }
+        index = columns.pop(names_attribute, None)
+        return DataFrame(columns, index=index)
+
+    @classmethod
+    def read_global_attributes(cls, loom_file: h5py.File) -> dict:
+        """
+        Reads the global attributes, which are stored as datasets of the group /attrs since Loom 3.0 and as attributes
+        of the root group before. Dictionaries and lists, which Loom can not store, are expected to be JSON encoded.
+        """
+
+        if isinstance(loom_file.get("attrs"), h5py.Group):
+            attributes = {name: dataset[()] for name, dataset in loom_file["attrs"].items()}
+        else:
+            attributes = dict(loom_file.attrs)
+        return {name: cls.decode_global_attribute(value) for name, value in attributes.items()}
+
+    @classmethod
+    def decode_global_attribute(cls, value):
+        value = cls.decode_values(value)
+        if isinstance(value, str) and value[:1] in ("{", "["):
+            try:
+                return json.loads(value)
+            except ValueError:
+                pass
+        return value
+
+    @staticmethod
+    def decode_values(values):
+        """
+        Decodes the strings of a Loom attribute. Loom stores strings as ASCII with the other characters escaped as
+        XML character references.
+        """
+
+        if isinstance(values, bytes):
+            return html.unescape(values.decode("utf-8"))
+        if isinstance(values, ndarray) and values.dtype.kind in "SO":
+            return array(
+                [html.unescape(v.decode("utf-8")) if isinstance(v, bytes) else v for v in values], dtype=object
+            )
+        return values
 
 
 class DatasetValidator:
@@ -25,40 +169,53 @@ class DatasetValidator:
             anon=False, client_kwargs={"endpoint_url": os.getenv("BOTO_ENDPOINT_URL")}
         )
 
-        # Read in ontologies
-        for ontology in CorporaConstants.CORPORA_ONTOLOGIES:
-            logging.info(f"Reading in {ontology.ontology_name.upper()} ontology.")
-            start_time = time.time()
-
-            ontology_file_object = self.s3_file_system.open(ontology.s3_uri, "r")
-            ontology_terms_list = ontology_file_object.read().split("\n")
-            setattr(self, ontology.ontology_name, ontology_terms_list)
-            ontology_file_object.close()
+        # Read in ontologies. The ontologies are shared by all the validators of the process and are kept on local disk
+        # between processes. Each ontology is a frozenset so that checking whether a value is part of the ontology does
+        # not depend on the number of terms in the ontology.
+        for ontology_name, ontology_terms in ontology_cache.get_ontologies(self.s3_file_system).items():
+            setattr(self, ontology_name, ontology_terms)
 
-            logging.info(
-                f"Completed reading {len(getattr(self, ontology.ontology_name))} values for {ontology.ontology_name} "
-                f"ontology in {time.time() - start_time:.3f} seconds."
-            )
+        self.file_object = None
+        self.report = ValidationReport(s3_uri)
 
-    def validate_dataset_file(self, loom_x_layer_name=None):
+    def validate_dataset_file(self, loom_x_layer_name=None, backed=False) -> ValidationReport:
         """
         Reads in file object and triages for specific file type validation.
+
+        :param loom_x_layer_name: The name of the loom layer to use as X.
+        :param backed: Validate an H5AD file by reading its metadata directly from S3 instead of reading the whole file
+        into memory.
+        :return: The issues found by each check, with the time each check took and the bytes it read.
         """
 
-        file_object = self.s3_file_system.open(self.s3_path, "rb")
+        if backed or self.s3_path.endswith(CorporaConstants.LOOM_FILE_TYPE):
+            # The metadata of an HDF5 file is read with many small reads, which are served by a read-ahead cache of
+            # ranged S3 requests.
+            s3_file_object = self.s3_file_system.open(
+                self.s3_path, "rb", block_size=BACKED_READ_BLOCK_SIZE, cache_type="readahead"
+            )
+        else:
+            s3_file_object = self.s3_file_system.open(self.s3_path, "rb")
+        file_object = self.file_object = ByteCountingFile(s3_file_object)
+        self.report = ValidationReport(self.s3_uri, lambda: file_object.bytes_read)
         file_object_size = file_object.info().get("Size")
         logging.info(f"Validating file {self.s3_uri} with size {sizeof_formatted(file_object_size)}")
 
-        if self.s3_path.endswith(CorporaConstants.H5AD_FILE_TYPE):
+        if self.s3_path.endswith(CorporaConstants.H5AD_FILE_TYPE) and backed:
+            self.validate_backed_h5ad_dataset(file_object)
+
+        elif self.s3_path.endswith(CorporaConstants.H5AD_FILE_TYPE):
             self.validate_h5ad_dataset(file_object)
 
         elif self.s3_path.endswith(CorporaConstants.LOOM_FILE_TYPE):
             self.validate_loom_dataset(file_object, loom_x_layer_name)
 
         else:
-            logging.warning(f"Unknown type of dataset with path {self.s3_path}!")
+            with self.report.check("file_type"):
+                self.report_issue(f"Unknown type of dataset with path {self.s3_path}!")
 
         file_object.close()
+        return self.report
 
     def validate_h5ad_dataset(self, file_object):
         """
@@ -68,26 +225,49 @@ class DatasetValidator:
 
         start_time = time.time()
         logging.info("Reading H5AD file into anndata object...")
-        anndata_object = anndata.read_h5ad(file_object)
+        with self.report.check("read"):
+            anndata_object = anndata.read_h5ad(file_object)
         logging.info(f"Finished reading anndata object in {time.time() - start_time:.3f} seconds.")
 
         self.validate_anndata_object(anndata_object)
 
-    def validate_loom_dataset(self, file_object, loom_x_layer_name=None):
+    def validate_backed_h5ad_dataset(self, file_object):
         """
-        Reads the Loom file contents into an AnnData object. Each attribute of the AnnData object will then be
-        checked to ensure it contains the appropriate metadata.
+        Reads the obs, var and uns attributes and the layer names of the H5AD file without reading its data matrices,
+        and validates them as an AnnData object would be. The X layer is checked for data by reading it in chunks.
         """
 
         start_time = time.time()
-        logging.info("Reading Loom file into anndata object...")
-        if loom_x_layer_name:
-            anndata_object = anndata.read_loom(file_object, X_name=loom_x_layer_name)
-        else:
-            anndata_object = anndata.read_loom(file_object)
-        logging.info(f"Finished reading anndata object in {time.time() - start_time:.3f} seconds.")
+        logging.info("Reading H5AD file metadata...")
+        with h5py.File(file_object, "r") as h5ad_file:
+            # Files written by old versions of anndata store obs and var as structured arrays.
+            is_legacy_format = not (
+                isinstance(h5ad_file.get("obs"), h5py.Group) and isinstance(h5ad_file.get("var"), h5py.Group)
+            )
+            if not is_legacy_format:
+                with self.report.check("read"):
+                    h5ad_metadata = H5adMetadata(h5ad_file)
+                logging.info(f"Finished reading H5AD file metadata in {time.time() - start_time:.3f} seconds.")
+                self.validate_anndata_object(h5ad_metadata)
+
+        if is_legacy_format:
+            logging.info("The H5AD file uses a legacy format. Reading the whole file instead.")
+            file_object.seek(0)
+            self.validate_h5ad_dataset(file_object)
 
-        self.validate_anndata_object(anndata_object)
+    def validate_loom_dataset(self, file_object, loom_x_layer_name=None):
+        """
+        Reads the attributes and the layer names of the Loom file without reading its data matrices, and validates them
+        as the AnnData object read from the Loom file would be. The X layer is checked for data by reading it in chunks.
+        """
+
+        start_time = time.time()
+        logging.info("Reading Loom file metadata...")
+        with h5py.File(file_object, "r") as loom_file:
+            with self.report.check("read"):
+                loom_metadata = LoomMetadata(loom_file, loom_x_layer_name)
+            logging.info(f"Finished reading Loom file metadata in {time.time() - start_time:.3f} seconds.")
+            self.validate_anndata_object(loom_metadata)
 
     def validate_anndata_object(self, anndata_object: anndata.AnnData):
         start_time = time.time()
@@ -104,32 +284,77 @@ class DatasetValidator:
         contain an appropriate description.
         """
 
-        # Check to make sure X data exists
+        with self.report.check("layers.X"):
+            self.verify_x_data(data_object.X)
+        with self.report.check("layers.descriptions"):
+            self.verify_layer_descriptions(data_object)
+
+    def verify_x_data(self, x_data):
+        """
+        Verifies that the X layer contains data and that not all observations are zeros. X can be an in-memory matrix
+        or, when validating a backed file, the HDF5 dataset or group that stores it.
+        """
+
         has_data = True
-        if isinstance(data_object.X, DataFrame):
-            has_data = data_object.X.data.any()
-        elif isinstance(data_object.X, ndarray):
-            has_data = data_object.X.any()
-        elif isinstance(data_object.X, spmatrix):
-            has_data = (data_object.X.count_nonzero() == data_object.X.nnz) or data_object.X.nnz == 0
+        if isinstance(x_data, DataFrame):
+            has_data = x_data.data.any()
+        elif isinstance(x_data, ndarray):
+            has_data = x_data.any()
+        elif isinstance(x_data, spmatrix):
+            has_data = (x_data.count_nonzero() == x_data.nnz) or x_data.nnz == 0
+        elif isinstance(x_data, (h5py.Dataset, h5py.Group)):
+            has_data = self.hdf5_matrix_has_data(x_data)
         else:
-            logging.warning(
-                f"Could not check X data layer to ensure that it exists. The type is " f"{type(data_object.X)}!"
+            self.report_issue(
+                f"Could not check X data layer to ensure that it exists. The type is {type(x_data)}!",
+                field=CorporaConstants.X_DATA_LAYER_NAME,
+                severity=WARNING,
             )
 
         if not has_data:
-            logging.warning("No data in the X layer can be found in the dataset or all observations are zeros!")
+            self.report_issue(
+                "No data in the X layer can be found in the dataset or all observations are zeros!",
+                field=CorporaConstants.X_DATA_LAYER_NAME,
+            )
+
+    @staticmethod
+    def hdf5_matrix_has_data(matrix: typing.Union[h5py.Dataset, h5py.Group]) -> bool:
+        """
+        Checks whether a matrix stored in an HDF5 file has a nonzero value. The values are read in chunks of
+        X_CHUNK_SIZE and the check stops at the first chunk with a nonzero value, so usually only the beginning of the
+        matrix is read.
+        """
+
+        # Sparse matrices are stored as a group, and only their stored values need to be checked.
+        values = matrix["data"] if isinstance(matrix, h5py.Group) else matrix
+        if not values.shape:
+            return bool(values[()])
+        rows_per_chunk = max(1, X_CHUNK_SIZE // max(1, int(prod(values.shape[1:]))))
+        for start in range(0, values.shape[0], rows_per_chunk):
+            if values[start : start + rows_per_chunk].any():
+                return True
+        return False
+
+    def verify_layer_descriptions(self, data_object: anndata.AnnData):
+        """
+        Verifies that each layer of the dataset has a description.
+        """
 
         # Ensure that the layer_descriptions metadata key exists in the `uns` field of the anndata object.
         if (CorporaConstants.LAYER_DESCRIPTIONS not in data_object.uns_keys()) or (
             not data_object.uns.get(CorporaConstants.LAYER_DESCRIPTIONS)
         ):
-            logging.warning("Required layers descriptions are missing from uns field to describe data layers!")
+            self.report_issue(
+                "Required layers descriptions are missing from uns field to describe data layers!",
+                field=CorporaConstants.LAYER_DESCRIPTIONS,
+            )
         else:
             # Check to ensure that there are descriptions for each layer
             for layer_name in data_object.layers.keys():
                 if layer_name not in data_object.uns.get(CorporaConstants.LAYER_DESCRIPTIONS).keys():
-                    logging.warning(f"Missing layer description for layer {layer_name}!")
+                    self.report_issue(
+                        f"Missing layer description for layer {layer_name}!", field=CorporaConstants.LAYER_DESCRIPTIONS
+                    )
 
             # Check to make sure that X has a layer description and if the anndata populate the `raw` field,
             # that a raw data layer description also exists.
@@ -137,13 +362,19 @@ class DatasetValidator:
                 CorporaConstants.X_DATA_LAYER_NAME
                 not in data_object.uns.get(CorporaConstants.LAYER_DESCRIPTIONS).keys()
             ):
-                logging.warning(f"Missing layer description for layer {CorporaConstants.X_DATA_LAYER_NAME}!")
+                self.report_issue(
+                    f"Missing layer description for layer {CorporaConstants.X_DATA_LAYER_NAME}!",
+                    field=CorporaConstants.LAYER_DESCRIPTIONS,
+                )
             if data_object.raw:
                 if (
                     CorporaConstants.RAW_DATA_LAYER_NAME
                     not in data_object.uns.get(CorporaConstants.LAYER_DESCRIPTIONS).keys()
                 ):
-                    logging.warning(f"Missing layer description for layer {CorporaConstants.RAW_DATA_LAYER_NAME}!")
+                    self.report_issue(
+                        f"Missing layer description for layer {CorporaConstants.RAW_DATA_LAYER_NAME}!",
+                        field=CorporaConstants.LAYER_DESCRIPTIONS,
+                    )
 
     def verify_obs(self, data_object: anndata.AnnData):
         """
@@ -155,25 +386,28 @@ class DatasetValidator:
         observation_keys = data_object.obs_keys()
 
         # Check to ensure that all IDs are unique
-        if data_object.obs.index.duplicated().any():
-            logging.warning("Each observation is not unique!")
+        with self.report.check("obs.index"):
+            if data_object.obs.index.duplicated().any():
+                self.report_issue("Each observation is not unique!")
 
         for metadata_field in (
             CorporaConstants.REQUIRED_OBSERVATION_METADATA_FIELDS
             + CorporaConstants.REQUIRED_OBSERVATION_ONTOLOGY_METADATA_FIELDS
         ):
-            if metadata_field.field_name not in observation_keys:
-                self.log_error_message(metadata_field.field_name, "obs", type(data_object).__name__)
-            else:
-                self.verify_metadata_type(metadata_field, data_object.obs.get(metadata_field.field_name))
+            with self.report.check(f"obs.{metadata_field.field_name}"):
+                if metadata_field.field_name not in observation_keys:
+                    self.log_error_message(metadata_field.field_name, "obs", type(data_object).__name__)
+                else:
+                    self.verify_metadata_type(metadata_field, data_object.obs.get(metadata_field.field_name))
 
     def verify_vars(self, data_object: anndata.AnnData):
         """
         Validates the variable attribute of the AnnData object to ensure that all variable IDs are unique.
         """
 
-        if data_object.var.index.duplicated().any():
-            logging.warning("Each variable is not unique!")
+        with self.report.check("var.index"):
+            if data_object.var.index.duplicated().any():
+                self.report_issue("Each variable is not unique!")
 
     def verify_uns(self, data_object: anndata.AnnData):
         """
@@ -188,10 +422,11 @@ class DatasetValidator:
             CorporaConstants.REQUIRED_DATASET_METADATA_FIELDS
             + CorporaConstants.REQUIRED_DATASET_PRESENTATION_METADATA_FIELDS
         ):
-            if metadata_field.field_name not in unstructured_metadata_keys:
-                self.log_error_message(metadata_field.field_name, "uns", type(data_object).__name__)
-            else:
-                self.verify_metadata_type(metadata_field, data_object.uns.get(metadata_field.field_name))
+            with self.report.check(f"uns.{metadata_field.field_name}"):
+                if metadata_field.field_name not in unstructured_metadata_keys:
+                    self.log_error_message(metadata_field.field_name, "uns", type(data_object).__name__)
+                else:
+                    self.verify_metadata_type(metadata_field, data_object.uns.get(metadata_field.field_name))
 
     def verify_metadata_type(
         self,
@@ -199,7 +434,8 @@ class DatasetValidator:
         metadata_values_in_dataset: typing.Union[Series, str, list, dict],
     ):
         """
-        Validates the type of each value in a property of an AnnData object.
+        Validates the type of each value in a property of an AnnData object. All the offending values of the property
+        are reported in a single warning.
 
         Each property value passed in the pandas Series object `metadata_values_in_dataset` is expected to be of the
         type `metadata_property` where `metadata_property` can either be a type or can be a namedtuple that represents
@@ -208,67 +444,155 @@ class DatasetValidator:
         the ontology for which the validation also checks.
         """
 
-        # Canonicalize the metadata values type into a list
-        if isinstance(metadata_values_in_dataset, Series):
-            metadata_values = metadata_values_in_dataset.values
-        else:
-            metadata_values = [metadata_values_in_dataset]
-
         # Handle the case where the required type is simply a type check.
         if isinstance(metadata_property.required_type, type):
-            for data_value in metadata_values:
-                if not isinstance(data_value, metadata_property.required_type):
-                    logging.warning(
-                        f"Value {data_value} of type {type(data_value)} is not of expected type "
-                        f"{metadata_property.required_type} for metadata field {metadata_property.field_name}."
-                    )
+            unexpected_data_values = self.get_values_of_unexpected_type(
+                metadata_values_in_dataset, metadata_property.required_type
+            )
+            if unexpected_data_values:
+                unexpected_types = {type(data_value) for data_value in unexpected_data_values}
+                self.report_issue(
+                    f"Values {unexpected_data_values[:MAX_REPORTED_VALUES]} of type {unexpected_types} are not of "
+                    f"expected type {metadata_property.required_type} for metadata field "
+                    f"{metadata_property.field_name}.",
+                    field=metadata_property.field_name,
+                    values=unexpected_data_values,
+                )
 
-        # Handle the case where the required type is an Ontology.
+        # Handle the case where the required type is an Ontology. Only the unique values of the property are looked up
+        # in the ontology, so the cost of the check depends on the number of distinct terms and not on the number of
+        # observations. The same applies to enums below.
         elif isinstance(metadata_property.required_type, CorporaConstants.Ontology):
             valid_ontology_names = getattr(self, metadata_property.required_type.ontology_name)
-            unrecognized_data_values = set()
-            for data_value in metadata_values:
-                if not (
-                    data_value in valid_ontology_names
-                    or (
-                        metadata_property.valid_alternative is not None
-                        and data_value == metadata_property.valid_alternative
-                    )
-                ):
-                    unrecognized_data_values.add(data_value)
+            unique_data_values = self.get_hashable_unique_values(metadata_property, metadata_values_in_dataset)
+            unrecognized_data_values = unique_data_values - valid_ontology_names
+            if metadata_property.valid_alternative is not None:
+                unrecognized_data_values.discard(metadata_property.valid_alternative)
 
             if unrecognized_data_values:
-                logging.warning(
-                    f"Values {unrecognized_data_values} were not recognized as a valid value in the "
-                    f"{metadata_property.required_type.ontology_name} ontology."
+                unrecognized_data_values = sorted(unrecognized_data_values, key=str)
+                self.report_issue(
+                    f"Values {unrecognized_data_values[:MAX_REPORTED_VALUES]} were not recognized as a valid value in "
+                    f"the {metadata_property.required_type.ontology_name} ontology.",
+                    field=metadata_property.field_name,
+                    values=unrecognized_data_values,
                 )
 
         # Handle the case where the required type is an enum which is represented by a list of accepted values.
         elif isinstance(metadata_property.required_type, list):
-            unrecognized_data_values = set()
-            for data_value in metadata_values:
-                if data_value not in metadata_property.required_type:
-                    unrecognized_data_values.add(data_value)
+            unique_data_values = self.get_hashable_unique_values(metadata_property, metadata_values_in_dataset)
+            unrecognized_data_values = unique_data_values - set(metadata_property.required_type)
 
             if unrecognized_data_values:
-                logging.warning(
-                    f"Values {unrecognized_data_values} are not part of the accepted enum values "
-                    f"{metadata_property.required_type} for metadata field {metadata_property.field_name}."
+                unrecognized_data_values = sorted(unrecognized_data_values, key=str)
+                self.report_issue(
+                    f"Values {unrecognized_data_values[:MAX_REPORTED_VALUES]} are not part of the accepted enum values "
+                    f"{metadata_property.required_type} for metadata field {metadata_property.field_name}.",
+                    field=metadata_property.field_name,
+                    values=unrecognized_data_values,
                 )
 
         else:
-            logging.warning(
+            self.report_issue(
                 f"Unable to parse metadata property: {metadata_property.field_name} with type "
-                f"{type(metadata_property.required_type)}"
+                f"{type(metadata_property.required_type)}",
+                field=metadata_property.field_name,
+                severity=WARNING,
             )
 
+    def get_hashable_unique_values(
+        self,
+        metadata_property: CorporaConstants.TypedMetadata,
+        metadata_values_in_dataset: typing.Union[Series, str, list, dict],
+    ) -> set:
+        """
+        Returns the distinct values of a property, to be looked up in its accepted values. Values that can not be
+        hashed, such as lists, can not be accepted values either, so they are reported as values of the wrong type.
+        """
+
+        try:
+            return set(self.get_unique_values(metadata_values_in_dataset))
+        except TypeError:
+            pass
+
+        if isinstance(metadata_values_in_dataset, Series):
+            data_values = metadata_values_in_dataset.values
+        else:
+            data_values = [metadata_values_in_dataset]
+        hashable_data_values, unhashable_data_values = set(), []
+        for data_value in data_values:
+            try:
+                hashable_data_values.add(data_value)
+            except TypeError:
+                unhashable_data_values.append(data_value)
+
+        unexpected_types = {type(data_value) for data_value in unhashable_data_values}
+        self.report_issue(
+            f"Values {unhashable_data_values[:MAX_REPORTED_VALUES]} of type {unexpected_types} are not valid values "
+            f"for metadata field {metadata_property.field_name}.",
+            field=metadata_property.field_name,
+            values=unhashable_data_values,
+        )
+        return hashable_data_values
+
+    @staticmethod
+    def get_unique_values(metadata_values_in_dataset: typing.Union[Series, str, list, dict]) -> list:
+        """
+        Returns the distinct values of a property of an AnnData object. For categorical observation metadata the
+        distinct values are the categories that are in use, which avoids hashing every observation.
+        """
+
+        if isinstance(metadata_values_in_dataset, Series):
+            if isinstance(metadata_values_in_dataset.dtype, CategoricalDtype):
+                categories = metadata_values_in_dataset.cat.categories
+                codes = unique(metadata_values_in_dataset.cat.codes.values)
+                values = list(categories[codes[codes >= 0]])
+                if (codes < 0).any():
+                    values.append(nan)
+                return values
+            return list(unique(metadata_values_in_dataset.values))
+        return [metadata_values_in_dataset]
+
+    @classmethod
+    def get_values_of_unexpected_type(
+        cls, metadata_values_in_dataset: typing.Union[Series, str, list, dict], required_type: type
+    ) -> list:
+        """
+        Returns the distinct values of a property of an AnnData object that are not of the required type. When strings
+        are required, the result is found from the dtype of the column whenever possible without checking each value in
+        Python.
+        """
+
+        if required_type is str and isinstance(metadata_values_in_dataset, Series):
+            if metadata_values_in_dataset.dtype.kind in "biufcmM":
+                # A column with a numeric, boolean or datetime dtype can not hold any strings.
+                return list(unique(metadata_values_in_dataset.values))
+            if infer_dtype(metadata_values_in_dataset, skipna=False) == "string":
+                return []
+
+        try:
+            data_values = cls.get_unique_values(metadata_values_in_dataset)
+        except TypeError:
+            # Columns holding unhashable values, such as lists, can not be reduced to their distinct values.
+            data_values = list(metadata_values_in_dataset.values)
+        return [data_value for data_value in data_values if not isinstance(data_value, required_type)]
+
     def log_error_message(self, metadata_field_name, expected_location, dataset_type):
         """
         Pretty-printer of missing metadata fields errors.
         """
 
         is_ontology = " ontology " if "ONTOLOGY" in metadata_field_name else " "
-        logging.warning(
+        self.report_issue(
             f"ERROR: Missing{is_ontology}metadata field {metadata_field_name} from {expected_location} in "
-            f"{dataset_type} file!"
+            f"{dataset_type} file!",
+            field=metadata_field_name,
         )
+
+    def report_issue(self, message, field=None, severity=ERROR, values=None):
+        """
+        Logs an issue found by the validation and adds it to the validation report.
+        """
+
+        logging.warning(message)
+        self.report.add_issue(message, field=field, severity=severity, values=values)
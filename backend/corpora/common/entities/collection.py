@@ -1,11 +1,10 @@
 import typing
 from datetime import datetime
 
-from sqlalchemy import and_
+from sqlalchemy import and_, literal, select
 
-from ..utils.db_utils import clone
 from .entity import Entity
-from ..corpora_orm import DbCollection, DbCollectionLink, CollectionVisibility
+from ..corpora_orm import DbCollection, DbCollectionLink, DbDataset, CollectionVisibility
 
 
 class Collection(Entity):
@@ -146,15 +145,32 @@ class Collection(Entity):
         """
         Given a private collection, set the collection to public.
 
+        The public collection is copied from the private one, its links and datasets are moved over and the private
+        collection is deleted with one statement each, in a single transaction, however many links and datasets the
+        collection has.
         """
-        # Create a public collection with the same uuid and same fields
-        public_collection = clone(self.db_object, primary_key=dict(id=self.id, visibility=CollectionVisibility.PUBLIC))
-        self.db.session.add(public_collection)
-        # Copy over relationships
-        for link in self.links:
-            link.collection_visibility = CollectionVisibility.PUBLIC
-        for dataset in self.datasets:
-            dataset.collection_visibility = CollectionVisibility.PUBLIC
-        self.db.session.commit()
-        self.delete()
-        self.db_object = public_collection
+        session = self.db.session
+        # Write any pending changes to the private collection before it is copied.
+        session.flush()
+
+        collection_table = DbCollection.__table__
+        columns = [column for column in collection_table.columns if column.key != "visibility"]
+        public_visibility = literal(CollectionVisibility.PUBLIC, type_=collection_table.c.visibility.type)
+        private_collection = and_(
+            collection_table.c.id == self.id, collection_table.c.visibility == CollectionVisibility.PRIVATE
+        )
+        session.execute(
+            collection_table.insert().from_select(
+                [column.key for column in columns] + ["visibility"],
+                select(columns + [public_visibility]).where(private_collection),
+            )
+        )
+        for child in (DbCollectionLink, DbDataset):
+            session.query(child).filter(
+                child.collection_id == self.id, child.collection_visibility == CollectionVisibility.PRIVATE
+            ).update({child.collection_visibility: CollectionVisibility.PUBLIC}, synchronize_session=False)
+        session.query(DbCollection).filter(
+            DbCollection.id == self.id, DbCollection.visibility == CollectionVisibility.PRIVATE
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        self.db_object = session.query(DbCollection).get((self.id, CollectionVisibility.PUBLIC))
@@ -1,12 +1,39 @@
 import typing
 
+from sqlalchemy import func
+
 from .dataset_asset import DatasetAsset
 from .entity import Entity
-from ..corpora_orm import DbDataset, DbDatasetArtifact, DbDeploymentDirectory, DbDatasetProcessingStatus, UploadStatus
+from ..corpora_orm import (
+    CollectionVisibility,
+    DbDataset,
+    DbDatasetArtifact,
+    DbDatasetFacet,
+    DbDeploymentDirectory,
+    DbDatasetProcessingStatus,
+    UploadStatus,
+)
 
 
 class Dataset(Entity):
     table = DbDataset
+    # The metadata columns that are copied to DbDatasetFacet.
+    facets = ("organism", "tissue", "assay", "disease", "sex", "ethnicity", "development_stage")
+    # The facets whose values are plain strings, matched by label rather than by ontology_term_id.
+    label_facets = ("sex",)
+    # The columns that a dataset search can return.
+    search_fields = (
+        "id",
+        "name",
+        "revision",
+        "collection_id",
+        "collection_visibility",
+        *facets,
+        "cell_count",
+        "is_valid",
+        "created_at",
+        "updated_at",
+    )
 
     def __init__(self, db_object: DbDataset):
         super().__init__(db_object)
@@ -32,7 +59,7 @@ class Dataset(Entity):
         Creates a new dataset and related objects and store in the database. UUIDs are generated for all new table
         entries.
         """
-        dataset = DbDataset(
+        dataset = cls._new_db_object(
             revision=revision,
             name=name,
             organism=organism,
@@ -42,8 +69,44 @@ class Dataset(Entity):
             sex=sex,
             ethnicity=ethnicity,
             development_stage=development_stage,
+            artifacts=artifacts,
+            deployment_directories=deployment_directories,
+            processing_status=processing_status,
             **kwargs,
         )
+        cls.db.session.add(dataset)
+        cls.db.session.flush()
+        cls.db.session.add_all(cls._new_facet_rows(dataset.id, cls._get_facet_metadata(dataset)))
+        cls.db.commit()
+
+        return cls(dataset)
+
+    @classmethod
+    def create_many(cls, datasets: typing.List[dict]) -> typing.List["Dataset"]:
+        """
+        Creates several new datasets and their related objects, and stores them in the database in a single
+        transaction.
+        :param datasets: A list of keyword arguments accepted by Dataset.create, one per dataset.
+        :return: The new datasets in the same order as the parameters.
+        """
+        new_db_objects = [cls._new_db_object(**params) for params in datasets]
+        cls.db.session.add_all(new_db_objects)
+        cls.db.session.flush()
+        for db_object in new_db_objects:
+            cls.db.session.add_all(cls._new_facet_rows(db_object.id, cls._get_facet_metadata(db_object)))
+        cls.db.commit()
+        return [cls(db_object) for db_object in new_db_objects]
+
+    @staticmethod
+    def _new_db_object(
+        revision: int = 0,
+        name: str = "",
+        artifacts: list = None,
+        deployment_directories: list = None,
+        processing_status: dict = None,
+        **kwargs,
+    ) -> DbDataset:
+        dataset = DbDataset(revision=revision, name=name, **kwargs)
         if artifacts:
             dataset.artifacts = [DbDatasetArtifact(dataset_id=dataset.id, **art) for art in artifacts]
         if deployment_directories:
@@ -52,10 +115,7 @@ class Dataset(Entity):
             ]
         processing_status = processing_status if processing_status else {}
         dataset.processing_status = DbDatasetProcessingStatus(dataset_id=dataset.id, **processing_status)
-        cls.db.session.add(dataset)
-        cls.db.commit()
-
-        return cls(dataset)
+        return dataset
 
     def update(
         self, artifacts: list = None, deployment_directories: list = None, processing_status: dict = None, **kwargs
@@ -89,9 +149,107 @@ class Dataset(Entity):
 
             self.db.session.flush()
 
+        facet_metadata = {facet: kwargs[facet] for facet in self.facets if facet in kwargs}
+        if facet_metadata:
+            self.db.session.query(DbDatasetFacet).filter(
+                DbDatasetFacet.dataset_id == self.id, DbDatasetFacet.facet.in_(list(facet_metadata))
+            ).delete(synchronize_session=False)
+            self.db.session.add_all(self._new_facet_rows(self.id, facet_metadata))
+
         super().update(**kwargs)
         self.db.commit()
 
+    @classmethod
+    def _get_facet_metadata(cls, db_object: DbDataset) -> dict:
+        return {facet: getattr(db_object, facet) for facet in cls.facets}
+
+    @staticmethod
+    def _new_facet_rows(dataset_id: str, facet_metadata: dict) -> typing.List[DbDatasetFacet]:
+        """
+        Creates a DbDatasetFacet for each distinct value of each facet. A facet value is either an ontology term, a
+        dict with a label and an ontology_term_id, or a plain string such as a sex. The metadata of a facet is a single
+        value or a list of values.
+        """
+        rows = set()
+        for facet, metadata in facet_metadata.items():
+            values = metadata if isinstance(metadata, list) else [] if metadata is None else [metadata]
+            for value in values:
+                if isinstance(value, dict):
+                    rows.add((facet, value.get("ontology_term_id") or "", value.get("label") or ""))
+                elif value is not None:
+                    rows.add((facet, "", str(value)))
+        return [
+            DbDatasetFacet(dataset_id=dataset_id, facet=facet, ontology_term_id=ontology_term_id, label=label)
+            for facet, ontology_term_id, label in sorted(rows)
+        ]
+
+    @classmethod
+    def get_facet_counts(
+        cls, visibility: CollectionVisibility = CollectionVisibility.PUBLIC
+    ) -> typing.Dict[str, typing.List[dict]]:
+        """
+        Counts the datasets with each value of each facet, among the datasets of the collections with the given
+        visibility.
+        :param visibility: The visibility of the collections whose datasets are counted.
+        :return: The values of each facet, most common first, as dicts with the ontology_term_id, label and count of the
+        value.
+        """
+        dataset_count = func.count(DbDatasetFacet.dataset_id)
+        rows = (
+            cls.db.session.query(
+                DbDatasetFacet.facet, DbDatasetFacet.ontology_term_id, DbDatasetFacet.label, dataset_count
+            )
+            .join(DbDataset, DbDataset.id == DbDatasetFacet.dataset_id)
+            .filter(DbDataset.collection_visibility == visibility)
+            .group_by(DbDatasetFacet.facet, DbDatasetFacet.ontology_term_id, DbDatasetFacet.label)
+            .order_by(DbDatasetFacet.facet, dataset_count.desc(), DbDatasetFacet.label)
+            .all()
+        )
+        facet_counts = {facet: [] for facet in cls.facets}
+        for facet, ontology_term_id, label, count in rows:
+            facet_counts.setdefault(facet, []).append(dict(ontology_term_id=ontology_term_id, label=label, count=count))
+        return facet_counts
+
+    @classmethod
+    def search(
+        cls,
+        facet_filters: typing.Dict[str, typing.List[str]] = None,
+        fields: typing.List[str] = None,
+        limit: int = 100,
+        after: str = None,
+        visibility: CollectionVisibility = CollectionVisibility.PUBLIC,
+    ) -> typing.Tuple[typing.List[dict], typing.Union[str, None]]:
+        """
+        Finds the datasets with the given facet values in a single query. Each facet is matched through the indexed
+        DbDatasetFacet rows, and only the requested columns are read.
+        :param facet_filters: The values to match for each facet. A dataset matches when it has at least one of the
+        values of every facet.
+        :param fields: The columns of search_fields to return. The id is always returned. Defaults to search_fields.
+        :param limit: The maximum number of datasets to return.
+        :param after: Only datasets whose id sorts after this id are returned, to get the next page of a search.
+        :param visibility: The visibility of the collections whose datasets are searched.
+        :return: The datasets, ordered by id, and the id to pass as after to get the next page, or None if this is the
+        last page.
+        """
+        fields = ["id"] + [field for field in (fields or cls.search_fields) if field != "id"]
+        query = cls.db.session.query(*[getattr(DbDataset, field) for field in fields]).filter(
+            DbDataset.collection_visibility == visibility
+        )
+        for facet, values in (facet_filters or {}).items():
+            if not values:
+                continue
+            value_column = DbDatasetFacet.label if facet in cls.label_facets else DbDatasetFacet.ontology_term_id
+            matching_datasets = cls.db.session.query(DbDatasetFacet.dataset_id).filter(
+                DbDatasetFacet.facet == facet, value_column.in_(values)
+            )
+            query = query.filter(DbDataset.id.in_(matching_datasets.subquery()))
+        if after:
+            query = query.filter(DbDataset.id > after)
+
+        rows = query.order_by(DbDataset.id).limit(limit + 1).all()
+        next_after = rows[limit - 1].id if len(rows) > limit else None
+        return [dict(zip(fields, row)) for row in rows[:limit]], next_after
+
     def get_asset(self, asset_uuid) -> typing.Union[DatasetAsset, None]:
         """
         Retrieve the asset if it exists in the dataset.
@@ -0,0 +1,28 @@
+"""
+Choose the resources of the processing job of a dataset from the size of the uploaded file.
+
+The sizing table is configured with upload_job_sizes. Each entry gives the memory (MiB) and vcpus of the job for files
+up to max_file_size_gb. The entries are checked in order, and the last entry is used when the file is larger than every
+entry or when its size is not known.
+"""
+import typing
+
+from .corpora_config import CorporaConfig
+from .utils.math_utils import GB
+
+
+def get_job_resources(file_size: typing.Union[int, None], job_sizes: typing.List[dict] = None) -> dict:
+    """
+    Find the resources needed to process a file.
+    :param file_size: The size of the file in bytes, or None if it is not known.
+    :param job_sizes: The sizing table. Defaults to upload_job_sizes from the CorporaConfig.
+    :return: The memory and vcpus of the processing job.
+    """
+    job_sizes = job_sizes or CorporaConfig().upload_job_sizes
+    job_size = job_sizes[-1]
+    if file_size is not None:
+        for size in job_sizes:
+            if file_size <= size["max_file_size_gb"] * GB:
+                job_size = size
+                break
+    return dict(memory=job_size["memory"], vcpus=job_size["vcpus"])
@@ -0,0 +1,106 @@
+"""
+Caches the ontologies used by the DatasetValidator.
+
+The ontologies are loaded once per process and shared by every validator. They are also kept on local disk, one pickled
+frozenset of terms per ontology version, so that only a HEAD request per ontology is needed to start a new process. The
+version of an ontology is the ETag of its S3 object, so a snapshot is downloaded again only when the ontology changes.
+"""
+import glob
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils.corpora_constants import CorporaConstants
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "corpora", "ontologies")
+
+_ontologies = {}  # The terms of each ontology loaded in this process, by S3 uri.
+_lock = threading.Lock()
+
+
+def get_cache_dir() -> str:
+    return os.getenv("CORPORA_ONTOLOGY_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+def get_ontologies(
+    s3_file_system, ontologies: typing.List[CorporaConstants.Ontology] = None
+) -> typing.Dict[str, frozenset]:
+    """
+    Returns the terms of each ontology. The ontologies that have not been loaded by this process yet are fetched
+    concurrently.
+    :param s3_file_system: The s3fs.S3FileSystem used to reach the ontologies.
+    :param ontologies: The ontologies to load. Defaults to CorporaConstants.CORPORA_ONTOLOGIES.
+    :return: The frozenset of terms of each ontology, by ontology name.
+    """
+    ontologies = ontologies or CorporaConstants.CORPORA_ONTOLOGIES
+    with _lock:
+        missing = [ontology for ontology in ontologies if ontology.s3_uri not in _ontologies]
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                terms = list(executor.map(lambda ontology: _load_ontology(s3_file_system, ontology), missing))
+            _ontologies.update(zip([ontology.s3_uri for ontology in missing], terms))
+        return {ontology.ontology_name: _ontologies[ontology.s3_uri] for ontology in ontologies}
+
+
+def clear() -> None:
+    """
+    Forget the ontologies loaded by this process. The snapshots on disk are kept.
+    """
+    with _lock:
+        _ontologies.clear()
+
+
+def _load_ontology(s3_file_system, ontology: CorporaConstants.Ontology) -> frozenset:
+    start_time = time.time()
+    cache_dir = get_cache_dir()
+    snapshot_prefix = os.path.join(cache_dir, f"{ontology.ontology_name}.")
+
+    try:
+        s3_file_system.invalidate_cache(ontology.s3_uri)
+        etag = s3_file_system.info(ontology.s3_uri)["ETag"].strip('"')
+    except Exception:
+        # Fall back to the newest snapshot on disk if S3 can not be reached.
+        snapshots = sorted(glob.glob(f"{snapshot_prefix}*.pickle"), key=os.path.getmtime)
+        if not snapshots:
+            raise
+        logging.warning(f"Could not check the version of the {ontology.ontology_name} ontology. Using {snapshots[-1]}.")
+        return _read_snapshot(snapshots[-1])
+
+    snapshot_path = f"{snapshot_prefix}{etag}.pickle"
+    if os.path.exists(snapshot_path):
+        terms = _read_snapshot(snapshot_path)
+        source = "local cache"
+    else:
+        with s3_file_system.open(ontology.s3_uri, "r") as ontology_file_object:
+            # Each line holds a term, optionally followed by a tab and its label.
+            terms = frozenset(line.split("\t", 1)[0] for line in ontology_file_object.read().split("\n"))
+        _write_snapshot(snapshot_path, terms)
+        for old_snapshot in glob.glob(f"{snapshot_prefix}*.pickle"):
+            if old_snapshot != snapshot_path:
+                os.remove(old_snapshot)
+        source = ontology.s3_uri
+
+    logging.info(
+        f"Completed reading {len(terms)} values for {ontology.ontology_name} ontology from {source} in "
+        f"{time.time() - start_time:.3f} seconds."
+    )
+    return terms
+
+
+def _read_snapshot(snapshot_path: str) -> frozenset:
+    with open(snapshot_path, "rb") as snapshot:
+        return pickle.load(snapshot)
+
+
+def _write_snapshot(snapshot_path: str, terms: frozenset) -> None:
+    # Write to a temporary file first so that concurrent processes never read a partial snapshot.
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    fd, temporary_path = tempfile.mkstemp(dir=os.path.dirname(snapshot_path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as snapshot:
+        pickle.dump(terms, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, snapshot_path)
@@ -0,0 +1,213 @@
+"""
+The ancestors of every term of an ontology, through both is_a and part_of relations.
+
+The closure is computed once, when the terms of an ontology are extracted from its OWL file, and stored as a compressed
+sparse row (CSR) matrix: the ancestors of the term at index i are the term indices indices[indptr[i]:indptr[i + 1]].
+Questions like "is this tissue a part of lung" are then answered without walking the hierarchy or calling the OLS.
+"""
+import gzip
+import itertools
+import json
+import sys
+import typing
+from array import array
+
+FORMAT_VERSION = 1
+# The array typecodes of indptr and indices. Term indices fit in 32 bits, offsets into indices may not.
+INDPTR_TYPECODE = "q"
+INDICES_TYPECODE = "i"
+
+
+class OntologyClosure:
+    def __init__(self, terms: typing.List[str], indptr: typing.Sequence[int], indices: typing.Sequence[int]):
+        """
+        :param terms: The terms of the ontology, in the order of their indices.
+        :param indptr: The start of the ancestors of each term in indices, followed by the length of indices.
+        :param indices: The sorted indices of the ancestors of each term, one term after another.
+        """
+        self.terms = terms
+        self._term_indices = {term: index for index, term in enumerate(terms)}
+        self._indptr = indptr if isinstance(indptr, array) else array(INDPTR_TYPECODE, indptr)
+        self._indices = indices if isinstance(indices, array) else array(INDICES_TYPECODE, indices)
+        self._ancestors = {}
+        self._descendants = None
+
+    @classmethod
+    def from_parents(cls, parents: typing.Dict[str, typing.Iterable[str]]) -> "OntologyClosure":
+        """
+        Computes the closure from the direct is_a and part_of parents of each term. A parent that is not itself a key,
+        such as a term imported from another ontology, is included as a term without parents.
+        """
+        terms = sorted(set(parents).union(*parents.values()))
+        term_indices = {term: index for index, term in enumerate(terms)}
+        parent_indices = [()] * len(terms)
+        for term, term_parents in parents.items():
+            parent_indices[term_indices[term]] = tuple({term_indices[parent] for parent in term_parents})
+
+        # The hierarchy should not have cycles, but if it does all the terms of a cycle are ancestors of each other. The
+        # strongly connected components of the hierarchy, each a cycle or a single term, are found with an iterative
+        # Tarjan's algorithm. It completes each component after the components of all its ancestors, so the ancestors
+        # of the terms of a component are the other terms of the component, plus the parents outside of it and their
+        # ancestors.
+        closure = [None] * len(terms)
+        visit_order = [None] * len(terms)
+        lowlink = [0] * len(terms)
+        on_stack = [False] * len(terms)
+        stack = []
+        visit_counter = itertools.count()
+
+        def enter(index):
+            visit_order[index] = lowlink[index] = next(visit_counter)
+            stack.append(index)
+            on_stack[index] = True
+            return index, iter(parent_indices[index])
+
+        for start in range(len(terms)):
+            if visit_order[start] is not None:
+                continue
+            path = [enter(start)]
+            while path:
+                index, unvisited_parents = path[-1]
+                for parent in unvisited_parents:
+                    if visit_order[parent] is None:
+                        path.append(enter(parent))
+                        break
+                    if on_stack[parent]:
+                        lowlink[index] = min(lowlink[index], visit_order[parent])
+                else:
+                    path.pop()
+                    if path:
+                        term = path[-1][0]
+                        lowlink[term] = min(lowlink[term], lowlink[index])
+                    if lowlink[index] != visit_order[index]:
+                        continue
+
+                    component = []
+                    while not component or component[-1] != index:
+                        component.append(stack.pop())
+                        on_stack[component[-1]] = False
+                    ancestors = set(component)
+                    for term in component:
+                        for parent in parent_indices[term]:
+                            if closure[parent] is not None:
+                                ancestors.add(parent)
+                                ancestors.update(closure[parent])
+                    for term in component:
+                        closure[term] = sorted(ancestors - {term})
+
+        indptr = array(INDPTR_TYPECODE, [0])
+        indices = array(INDICES_TYPECODE)
+        for ancestors in closure:
+            indices.extend(ancestors)
+            indptr.append(len(indices))
+        return cls(terms, indptr, indices)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._term_indices
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def ancestors(self, term: str) -> typing.FrozenSet[str]:
+        """
+        Returns the ancestors of a term, not including the term itself. Unknown terms have no ancestors.
+        """
+        ancestors = self._ancestors.get(term)
+        if ancestors is None:
+            index = self._term_indices.get(term)
+            if index is None:
+                return frozenset()
+            ancestors = frozenset(
+                self.terms[ancestor] for ancestor in self._indices[self._indptr[index] : self._indptr[index + 1]]
+            )
+            self._ancestors[term] = ancestors
+        return ancestors
+
+    def is_ancestor(self, ancestor: str, term: str) -> bool:
+        """
+        Returns True iff ancestor is an is_a or part_of ancestor of term. The ancestors of a term are read once, then
+        each check is a set lookup.
+        """
+        return ancestor in self.ancestors(term)
+
+    def descendants(self, term: str) -> typing.FrozenSet[str]:
+        """
+        Returns the descendants of a term, not including the term itself.
+        """
+        index = self._term_indices.get(term)
+        if index is None:
+            return frozenset()
+        if self._descendants is None:
+            self._descendants = self._transpose()
+        descendant_indptr, descendant_indices = self._descendants
+        return frozenset(
+            self.terms[descendant]
+            for descendant in descendant_indices[descendant_indptr[index] : descendant_indptr[index + 1]]
+        )
+
+    def roll_up(self, term: str, categories: typing.Iterable[str]) -> typing.List[str]:
+        """
+        Returns the categories that term is, or is a descendant of. For example, rolling up a cell type to a list of
+        broad cell types.
+        """
+        ancestors = self.ancestors(term)
+        return [category for category in categories if category == term or category in ancestors]
+
+    def _transpose(self) -> typing.Tuple[array, array]:
+        counts = array(INDPTR_TYPECODE, [0] * (len(self.terms) + 1))
+        for ancestor in self._indices:
+            counts[ancestor + 1] += 1
+        for index in range(len(self.terms)):
+            counts[index + 1] += counts[index]
+        indptr = array(INDPTR_TYPECODE, counts)
+        indices = array(INDICES_TYPECODE, bytes(len(self._indices) * self._indices.itemsize))
+        for index in range(len(self.terms)):
+            for ancestor in self._indices[self._indptr[index] : self._indptr[index + 1]]:
+                indices[counts[ancestor]] = index
+                counts[ancestor] += 1
+        return indptr, indices
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the closure as a gzipped JSON header line, the terms one per line, then the little endian indptr and
+        indices arrays.
+        """
+        header = {"format_version": FORMAT_VERSION, "term_count": len(self.terms), "index_count": len(self._indices)}
+        indptr, indices = array(INDPTR_TYPECODE, self._indptr), array(INDICES_TYPECODE, self._indices)
+        if sys.byteorder == "big":
+            indptr.byteswap()
+            indices.byteswap()
+        text = "\n".join([json.dumps(header)] + self.terms) + "\n"
+        return gzip.compress(text.encode() + indptr.tobytes() + indices.tobytes(), compresslevel=6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OntologyClosure":
+        data = gzip.decompress(data)
+        header_end = data.index(b"\n")
+        header = json.loads(data[:header_end])
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported ontology closure format {header.get('format_version')}, expected {FORMAT_VERSION}."
+            )
+
+        # The arrays follow the last term, and may contain newlines themselves
+        *terms, arrays = data[header_end + 1 :].split(b"\n", header["term_count"])
+        terms = [term.decode() for term in terms]
+
+        indptr, indices = array(INDPTR_TYPECODE), array(INDICES_TYPECODE)
+        indptr_end = (header["term_count"] + 1) * indptr.itemsize
+        indptr.frombytes(arrays[:indptr_end])
+        indices.frombytes(arrays[indptr_end : indptr_end + header["index_count"] * indices.itemsize])
+        if sys.byteorder == "big":
+            indptr.byteswap()
+            indices.byteswap()
+        return cls(terms, indptr, indices)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as closure_file:
+            closure_file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "OntologyClosure":
+        with open(path, "rb") as closure_file:
+            return cls.from_bytes(closure_file.read())
@@ -0,0 +1,46 @@
+import requests
+
+from .corpora_config import CorporaConfig
+from .utils import dropbox
+from .utils.exceptions import InvalidFileFormatException, InvalidUploadLinkException, MaxFileSizeExceededException
+from .utils.math_utils import GB
+
+
+def get_download_url(url: str) -> str:
+    """
+    Convert a shared link into a direct download url.
+    :param url: a shared link provided by the user.
+    :return: a url that can be used to download the file directly.
+    """
+    download_url = dropbox.get_download_url_from_shared_link(url)
+    if not download_url:
+        raise InvalidUploadLinkException()
+    return download_url
+
+
+def get_verified_file_info(url: str) -> dict:
+    """
+    Retrieve the file information of a direct download url and verify that the file can be processed.
+    :param url: a direct download url returned by get_download_url.
+    :return: The file name and size of the file.
+    """
+    try:
+        file_info = dropbox.get_file_info(url)
+    except requests.HTTPError:
+        raise InvalidUploadLinkException("The URL provided causes an error with Dropbox.")
+    except dropbox.MissingHeaderException as ex:
+        raise InvalidUploadLinkException(ex.detail)
+    verify_file_info(file_info)
+    return file_info
+
+
+def verify_file_info(file_info: dict) -> None:
+    """
+    Verify that the size and format of a file are accepted for processing.
+    :param file_info: The file name and size of the file as returned by dropbox.get_file_info.
+    """
+    config = CorporaConfig()
+    if file_info["size"] > config.upload_max_file_size_gb * GB:
+        raise MaxFileSizeExceededException()
+    if file_info["name"].rsplit(".")[-1].lower() not in config.upload_file_formats:
+        raise InvalidFileFormatException()
@@ -0,0 +1,238 @@
+"""
+Admission control for dataset processing jobs.
+
+Uploads are not started as soon as they are requested. Instead they are added to the upload_queue table, and an
+upload is only started once there is a free processing slot, both globally and for the owner of the collection. When
+several uploads are waiting, the smallest files are started first so that small uploads are not stuck behind large
+ones.
+
+A slot is normally freed by the processing job or by its failure handler. If neither runs, for example because the
+job or its step function execution was stopped, the slot is freed once it has been held for upload_slot_timeout_seconds
+and no execution of the step function is running for the dataset. An upload that is cancelled before it was started is
+removed from the queue.
+"""
+import logging
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+
+from . import upload_sfn
+from .corpora_config import CorporaConfig
+from .corpora_orm import DbDatasetProcessingStatus, DbUploadQueueEntry, UploadStatus
+from .utils.db_utils import DbUtils
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for the postgres advisory lock that serializes scheduling decisions.
+SCHEDULER_LOCK_ID = 4201
+MAX_CONCURRENT_REQUESTS = 10  # The number of step function requests made at the same time.
+
+
+def enqueue(collection_uuid: str, dataset_uuid: str, url: str, owner: str, file_size: int = None) -> None:
+    """
+    Queue a dataset for processing, and start it if a processing slot is free.
+    :param collection_uuid: The collection the dataset belongs to.
+    :param dataset_uuid: The dataset to process.
+    :param url: The direct download url of the dataset.
+    :param owner: The owner of the collection. Used to limit the number of jobs each owner can run at once.
+    :param file_size: The size of the file in bytes, if known. Smaller files are started first.
+    """
+    enqueue_many(
+        [
+            dict(
+                collection_uuid=collection_uuid,
+                dataset_uuid=dataset_uuid,
+                url=url,
+                owner=owner,
+                file_size=file_size,
+            )
+        ]
+    )
+
+
+def enqueue_many(uploads: typing.List[dict]) -> None:
+    """
+    Queue several datasets for processing in a single transaction, and start as many as the free slots allow.
+    :param uploads: A list of dictionaries with the parameters of enqueue.
+    """
+    db = DbUtils()
+    db.session.add_all(
+        [
+            DbUploadQueueEntry(
+                collection_id=item["collection_uuid"],
+                dataset_id=item["dataset_uuid"],
+                url=item["url"],
+                owner=item["owner"],
+                file_size=item.get("file_size"),
+            )
+            for item in uploads
+        ]
+    )
+    db.commit()
+    schedule()
+
+
+def release(dataset_uuid: str) -> None:
+    """
+    Free the processing slot held by a dataset once its job has finished, and start the next waiting uploads.
+
+    Errors are logged rather than raised, so that they do not fail a job that has otherwise finished. A slot that could
+    not be freed here is freed by a later schedule once it times out.
+    :param dataset_uuid: The dataset that finished processing.
+    """
+    db = DbUtils()
+    try:
+        db.session.query(DbUploadQueueEntry).filter(DbUploadQueueEntry.dataset_id == dataset_uuid).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        schedule()
+    except Exception:
+        logger.exception(f"Failed to release the processing slot of dataset {dataset_uuid}.")
+        db.session.rollback()
+
+
+def cancel(dataset_uuid: str) -> bool:
+    """
+    Remove a dataset from the queue if its processing job has not been started yet.
+    :param dataset_uuid: The dataset whose upload is cancelled.
+    :return: True if the upload was waiting and will not be processed, False if its job was already started or the
+    dataset is not queued.
+    """
+    db = DbUtils()
+    db.session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": SCHEDULER_LOCK_ID})
+    removed = (
+        db.session.query(DbUploadQueueEntry)
+        .filter(DbUploadQueueEntry.dataset_id == dataset_uuid, DbUploadQueueEntry.started_at.is_(None))
+        .delete(synchronize_session=False)
+    )
+    # Committing releases the advisory lock.
+    db.commit()
+    return bool(removed)
+
+
+def schedule() -> typing.List[str]:
+    """
+    Start the waiting uploads that fit in the free processing slots.
+
+    The slots are claimed while holding an advisory lock so that concurrent callers never start more jobs than the
+    limits allow. The step functions are started after the lock is released. An upload that fails to start is removed
+    from the queue and its dataset is marked as failed, which frees its slot for the next waiting upload.
+    :return: The uuids of the datasets that were started.
+    """
+    started = []
+    while True:
+        admitted = _admit()
+        if not admitted:
+            break
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            failed = [dataset_uuid for dataset_uuid in executor.map(_start, admitted) if dataset_uuid]
+        started.extend(entry["dataset_uuid"] for entry in admitted if entry["dataset_uuid"] not in failed)
+        if not failed:
+            break
+        _remove_failed(failed)
+    return started
+
+
+def _admit() -> typing.List[dict]:
+    db = DbUtils()
+    session = db.session
+    session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": SCHEDULER_LOCK_ID})
+
+    config = CorporaConfig()
+    # Free the slots that were never released, because neither the job nor its failure handler finished.
+    timed_out_before = datetime.utcnow() - timedelta(seconds=int(config.upload_slot_timeout_seconds))
+    timed_out = [
+        dataset_id
+        for dataset_id, in session.query(DbUploadQueueEntry.dataset_id).filter(
+            DbUploadQueueEntry.started_at < timed_out_before
+        )
+    ]
+    if timed_out:
+        timed_out = _without_running_executions(timed_out)
+    if timed_out:
+        logger.warning(f"Freeing the processing slots of {len(timed_out)} datasets that timed out: {timed_out}")
+        session.query(DbUploadQueueEntry).filter(DbUploadQueueEntry.dataset_id.in_(timed_out)).delete(
+            synchronize_session=False
+        )
+
+    running = dict(
+        session.query(DbUploadQueueEntry.owner, func.count(DbUploadQueueEntry.id))
+        .filter(DbUploadQueueEntry.started_at.isnot(None))
+        .group_by(DbUploadQueueEntry.owner)
+        .all()
+    )
+    free_slots = int(config.upload_max_concurrent_jobs) - sum(running.values())
+    max_per_owner = int(config.upload_max_concurrent_jobs_per_owner)
+
+    admitted = []
+    if free_slots > 0:
+        waiting = (
+            session.query(DbUploadQueueEntry)
+            .filter(DbUploadQueueEntry.started_at.is_(None))
+            .order_by(DbUploadQueueEntry.file_size.asc().nullslast(), DbUploadQueueEntry.created_at.asc())
+        )
+        now = datetime.utcnow()
+        for entry in waiting:
+            if len(admitted) >= free_slots:
+                break
+            if running.get(entry.owner, 0) >= max_per_owner:
+                continue
+            running[entry.owner] = running.get(entry.owner, 0) + 1
+            entry.started_at = now
+            admitted.append(
+                dict(
+                    collection_uuid=entry.collection_id,
+                    dataset_uuid=entry.dataset_id,
+                    url=entry.url,
+                    file_size=entry.file_size,
+                )
+            )
+
+    # Committing releases the advisory lock.
+    db.commit()
+    return admitted
+
+
+def _without_running_executions(dataset_uuids: typing.List[str]) -> typing.List[str]:
+    """
+    :return: The datasets that have no running execution of the upload step function. None of them if the running
+    executions can not be listed, so that a job that is still running keeps its slot.
+    """
+    try:
+        running = upload_sfn.get_running_dataset_uuids()
+    except Exception:
+        logger.exception("Failed to list the running processing jobs. The slots that timed out are not freed.")
+        return []
+    still_running = [dataset_uuid for dataset_uuid in dataset_uuids if dataset_uuid in running]
+    if still_running:
+        logger.warning(f"The processing jobs of {len(still_running)} datasets run past the timeout: {still_running}")
+    return [dataset_uuid for dataset_uuid in dataset_uuids if dataset_uuid not in running]
+
+
+def _start(entry: dict) -> typing.Union[str, None]:
+    """
+    :return: the dataset uuid if the step function failed to start.
+    """
+    try:
+        upload_sfn.start_upload_sfn(entry["collection_uuid"], entry["dataset_uuid"], entry["url"], entry["file_size"])
+    except Exception:
+        logger.exception(f"Failed to start processing dataset {entry['dataset_uuid']}.")
+        return entry["dataset_uuid"]
+
+
+def _remove_failed(dataset_uuids: typing.List[str]) -> None:
+    db = DbUtils()
+    db.session.query(DbUploadQueueEntry).filter(DbUploadQueueEntry.dataset_id.in_(dataset_uuids)).delete(
+        synchronize_session=False
+    )
+    db.session.query(DbDatasetProcessingStatus).filter(DbDatasetProcessingStatus.dataset_id.in_(dataset_uuids)).update(
+        {
+            DbDatasetProcessingStatus.upload_status: UploadStatus.FAILED,
+            DbDatasetProcessingStatus.upload_message: "Failed to start processing the dataset.",
+        },
+        synchronize_session=False,
+    )
+    db.commit()
@@ -2,6 +2,7 @@ import boto3
 import json
 import time
 
+from . import job_sizing
 from .corpora_config import CorporaConfig
 import os
 
@@ -16,8 +17,16 @@ def get_stepfunctions_client():
     return _stepfunctions_client
 
 
-def start_upload_sfn(collection_uuid, dataset_uuid, url):
-    input_parameters = {"collection_uuid": collection_uuid, "url": url, "dataset_uuid": dataset_uuid}
+def start_upload_sfn(collection_uuid, dataset_uuid, url, file_size=None):
+    job_resources = job_sizing.get_job_resources(file_size)
+    input_parameters = {
+        "collection_uuid": collection_uuid,
+        "url": url,
+        "dataset_uuid": dataset_uuid,
+        "file_size": file_size,
+        "job_memory": job_resources["memory"],
+        "job_vcpus": job_resources["vcpus"],
+    }
     sfn_name = f"{dataset_uuid}_{int(time.time())}"
     response = get_stepfunctions_client().start_execution(
         stateMachineArn=CorporaConfig().upload_sfn_arn,
@@ -25,3 +34,13 @@ def start_upload_sfn(collection_uuid, dataset_uuid, url):
         input=json.dumps(input_parameters),
     )
     return response
+
+
+def get_running_dataset_uuids():
+    """
+    :return: The uuids of the datasets with a running execution of the upload step function. The executions are named
+    after their dataset by start_upload_sfn.
+    """
+    paginator = get_stepfunctions_client().get_paginator("list_executions")
+    pages = paginator.paginate(stateMachineArn=CorporaConfig().upload_sfn_arn, statusFilter="RUNNING")
+    return {execution["name"].rsplit("_", 1)[0] for page in pages for execution in page["executions"]}
@@ -1,5 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
 import os
+import typing
 
 import boto3
 from botocore.errorfactory import ClientError
@@ -91,13 +93,42 @@ class AwsSecret:
             print(message)
 
 
-def delete_many_from_s3(bucket_name: str, dataset_uuid: str) -> None:
+S3_DELETE_BATCH_SIZE = 1000  # The maximum number of keys accepted by a DeleteObjects request.
+MAX_CONCURRENT_S3_REQUESTS = 10
+
+
+def delete_many_from_s3(bucket_name: str, dataset_uuid: str) -> typing.List[dict]:
     """
     This deletes everything with a specific prefix from the given bucket
 
+    The objects are listed one page of S3_DELETE_BATCH_SIZE keys at a time, and each page is deleted with a single
+    DeleteObjects request while the following pages are listed.
+    :return: The objects that could not be deleted, as a list of {"Key", "Code", "Message"}.
     """
     if not dataset_uuid:
         raise ValueError
-    s3 = boto3.resource("s3", endpoint_url=os.getenv("BOTO_ENDPOINT_URL"))
-    bucket = s3.Bucket(bucket_name)
-    bucket.objects.filter(Prefix=f"{dataset_uuid}/").delete()
+    s3 = boto3.client("s3", endpoint_url=os.getenv("BOTO_ENDPOINT_URL"))
+    pages = s3.get_paginator("list_objects_v2").paginate(
+        Bucket=bucket_name, Prefix=f"{dataset_uuid}/", PaginationConfig={"PageSize": S3_DELETE_BATCH_SIZE}
+    )
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_S3_REQUESTS) as executor:
+        futures = [
+            executor.submit(_delete_objects, s3, bucket_name, [obj["Key"] for obj in page["Contents"]])
+            for page in pages
+            if page.get("Contents")
+        ]
+    return [error for future in futures for error in future.result()]
+
+
+def _delete_objects(s3, bucket_name: str, keys: typing.List[str]) -> typing.List[dict]:
+    try:
+        response = s3.delete_objects(
+            Bucket=bucket_name, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+        )
+    except ClientError as e:
+        error = e.response["Error"]
+        return [{"Key": key, "Code": error.get("Code"), "Message": error.get("Message")} for key in keys]
+    return [
+        {"Key": error["Key"], "Code": error.get("Code"), "Message": error.get("Message")}
+        for error in response.get("Errors", [])
+    ]
@@ -39,3 +39,26 @@ class NotFoundHTTPException(ProblemException):
 class MethodNotAllowedException(ProblemException):
     def __init__(self, detail: str = "Method not allowed.", *args, **kwargs) -> None:
         super().__init__(status=requests.codes.not_allowed, title="Not Allowed", detail=detail, *args, **kwargs)
+
+
+class UploadException(CorporaException):
+    def __init__(self, detail: str = "The upload could not be started.", *args, **kwargs) -> None:
+        super().__init__(detail, *args, **kwargs)
+        self.detail = detail
+
+
+class InvalidUploadLinkException(UploadException):
+    def __init__(self, detail: str = "The dropbox shared link is invalid.", *args, **kwargs) -> None:
+        super().__init__(detail, *args, **kwargs)
+
+
+class InvalidFileFormatException(UploadException):
+    def __init__(
+        self, detail: str = "The file referred to by the link is not a support file format.", *args, **kwargs
+    ) -> None:
+        super().__init__(detail, *args, **kwargs)
+
+
+class MaxFileSizeExceededException(UploadException):
+    def __init__(self, detail: str = "The file requested is too large to process.", *args, **kwargs) -> None:
+        super().__init__(detail, *args, **kwargs)
@@ -0,0 +1,83 @@
+import json
+import time
+import typing
+from contextlib import contextmanager
+
+ERROR = "error"
+WARNING = "warning"
+MAX_REPORTED_VALUES = 10  # The number of offending values stored for each issue.
+
+
+class ValidationReport:
+    """
+    The result of validating a dataset. The validation is made of named checks, and each check records the issues it
+    found, how long it took and how many bytes of the dataset file it read. The report can be serialized to JSON, for
+    example to store it in the validation_message of a dataset processing status.
+    """
+
+    def __init__(self, s3_uri: str = None, bytes_read: typing.Callable[[], int] = None):
+        """
+        :param s3_uri: The dataset being validated.
+        :param bytes_read: Returns the number of bytes read from the dataset file so far.
+        """
+        self.s3_uri = s3_uri
+        self.checks = []
+        self._bytes_read = bytes_read or (lambda: 0)
+        self._current_check = None
+
+    @contextmanager
+    def check(self, name: str):
+        """
+        Records the issues, wall time and bytes read of the code run in this context as the check `name`.
+        """
+        previous_check = self._current_check
+        self._current_check = dict(name=name, wall_time=0.0, bytes_read=0, issues=[])
+        self.checks.append(self._current_check)
+        start_time = time.time()
+        start_bytes_read = self._bytes_read()
+        try:
+            yield self._current_check
+        finally:
+            self._current_check["wall_time"] = time.time() - start_time
+            self._current_check["bytes_read"] = self._bytes_read() - start_bytes_read
+            self._current_check = previous_check
+
+    def add_issue(self, message: str, field: str = None, severity: str = ERROR, values: typing.Iterable = None) -> dict:
+        """
+        Adds an issue to the current check, or to a check named "validation" when no check is running.
+        :param message: The description of the issue.
+        :param field: The metadata field the issue is about.
+        :param severity: ERROR or WARNING.
+        :param values: The offending values. Only the first MAX_REPORTED_VALUES are stored.
+        """
+        if self._current_check is None:
+            with self.check("validation"):
+                return self.add_issue(message, field, severity, values)
+
+        issue = dict(message=message, field=field, severity=severity, values=[], count=0)
+        if values is not None:
+            values = list(values)
+            issue["values"] = [str(value) for value in values[:MAX_REPORTED_VALUES]]
+            issue["count"] = len(values)
+        self._current_check["issues"].append(issue)
+        return issue
+
+    @property
+    def issues(self) -> typing.List[dict]:
+        return [issue for check in self.checks for issue in check["issues"]]
+
+    @property
+    def is_valid(self) -> bool:
+        return not any(issue["severity"] == ERROR for issue in self.issues)
+
+    def to_dict(self) -> dict:
+        return dict(
+            s3_uri=self.s3_uri,
+            is_valid=self.is_valid,
+            wall_time=sum(check["wall_time"] for check in self.checks),
+            bytes_read=sum(check["bytes_read"] for check in self.checks),
+            checks=self.checks,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
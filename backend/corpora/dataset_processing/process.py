@@ -116,16 +116,24 @@ logger = logging.getLogger(__name__)
 logging.basicConfig()
 
 from backend.corpora.common.corpora_orm import (
+    CollectionVisibility,
     DatasetArtifactFileType,
     DatasetArtifactType,
     ConversionStatus,
+    UploadStatus,
     ValidationStatus,
 )
+from backend.corpora.common import catalog, upload, upload_scheduler
 from backend.corpora.common.entities import Dataset, DatasetAsset
 from backend.corpora.common.utils import dropbox
-from backend.corpora.common.utils.db_utils import db_session, processing_status_updater
+from backend.corpora.common.utils.db_utils import db_session, db_session_manager, processing_status_updater
+from backend.corpora.common.utils.exceptions import UploadException
 from backend.corpora.dataset_processing.download import download
 
+# The exit code of a processing job whose file was rejected by the upload checks. The job is not retried on this code,
+# since the checks would reject the file again.
+UPLOAD_REJECTED_EXIT_CODE = 3
+
 # This is unfortunate, but this information doesn't appear to live anywhere
 # accessible to the uploader
 DEPLOYMENT_STAGE_TO_URL = {
@@ -213,6 +221,12 @@ def update_db(dataset_id, metadata=None, processing_status=None):
         processing_status_updater(dataset.processing_status.id, processing_status)
 
 
+@db_session()
+def update_catalog(dataset_id):
+    if Dataset.get(dataset_id).collection_visibility == CollectionVisibility.PUBLIC:
+        catalog.try_update_catalog()
+
+
 def download_from_dropbox_url(dataset_uuid: str, dropbox_url: str, local_path: str) -> str:
     """Given a dropbox url, download it to local_path.
     Handles fixing the url so it downloads directly.
@@ -222,7 +236,14 @@ def download_from_dropbox_url(dataset_uuid: str, dropbox_url: str, local_path: s
     if not fixed_dropbox_url:
         raise ValueError(f"Malformed Dropbox URL: {dropbox_url}")
 
-    file_info = dropbox.get_file_info(fixed_dropbox_url)
+    # The size and format of the file are verified here in case the API deferred the checks to the processing job.
+    try:
+        file_info = upload.get_verified_file_info(fixed_dropbox_url)
+    except UploadException as ex:
+        logger.error(f"Upload failed: {ex.detail}")
+        status = dict(upload_status=UploadStatus.FAILED, upload_message=ex.detail)
+        update_db(dataset_uuid, processing_status=status)
+        raise
     download(dataset_uuid, fixed_dropbox_url, local_path, file_info["size"])
     return local_path
 
@@ -373,11 +394,15 @@ def process_cxg(local_filename, dataset_id, cellxgene_bucket):
 def main():
     check_env()
     dataset_id = os.environ["DATASET_ID"]
-    local_filename = download_from_dropbox_url(
-        dataset_id,
-        os.environ["DROPBOX_URL"],
-        "local.h5ad",
-    )
+    try:
+        local_filename = download_from_dropbox_url(
+            dataset_id,
+            os.environ["DROPBOX_URL"],
+            "local.h5ad",
+        )
+    except UploadException:
+        # The reason the file was rejected is already in the upload_message of the dataset.
+        sys.exit(UPLOAD_REJECTED_EXIT_CODE)
     logger.info("Download complete", flush=True)
 
     # Validate the H5AD file
@@ -416,6 +441,13 @@ def main():
         os.environ["ARTIFACT_BUCKET"],
     )
 
+    # Add the metadata and artifacts of a public dataset to the catalog.
+    update_catalog(dataset_id)
+
+    # Free the processing slot so the next queued upload can start.
+    with db_session_manager():
+        upload_scheduler.release(dataset_id)
+
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,8 @@
-from flask import make_response, jsonify
+from flask import make_response, jsonify, redirect
 from typing import Optional
 
+from ....common import catalog
+from ....common.corpora_config import CorporaConfig
 from ....common.corpora_orm import DbCollection, CollectionVisibility
 from ....common.utils.db_utils import db_session
 from ....common.entities import Collection
@@ -32,6 +34,17 @@ def get_collections_list(from_date: int = None, to_date: int = None, user: Optio
     return make_response(jsonify(result), 200)
 
 
+@db_session()
+def get_catalog():
+    url = catalog.get_catalog_url()
+    if not url:
+        # Without a catalog bucket, as in local development, the catalog is built for each request.
+        return make_response(catalog.dump_catalog(), 200, {"Content-Type": "application/json"})
+    response = redirect(url)
+    response.headers["Cache-Control"] = f"public, max-age={CorporaConfig().catalog_max_age}"
+    return response
+
+
 @db_session()
 def get_collection_details(collection_uuid: str, visibility: str, user: str):
     collection = Collection.get_collection(collection_uuid, visibility)
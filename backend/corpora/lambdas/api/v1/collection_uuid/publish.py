@@ -1,5 +1,6 @@
 from flask import make_response
 
+from .....common import catalog
 from .....common.corpora_orm import CollectionVisibility
 from .....common.utils.db_utils import db_session
 from .....common.entities import Collection
@@ -12,4 +13,5 @@ def post(collection_uuid: str, user: str):
     if not collection:
         raise ForbiddenHTTPException()
     collection.publish()
+    catalog.try_update_catalog()
     return make_response({"collection_uuid": collection.id, "visibility": collection.visibility}, 202)
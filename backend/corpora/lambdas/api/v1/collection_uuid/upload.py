@@ -1,35 +1,43 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from flask import make_response
 
 from .....common.corpora_config import CorporaConfig
 from .....common.corpora_orm import CollectionVisibility
-from .....common import upload_sfn
+from .....common import upload, upload_scheduler
 from .....common.utils.db_utils import db_session
 from .....common.entities import Collection, Dataset
-from .....common.utils import dropbox
-from .....common.utils.exceptions import ForbiddenHTTPException, InvalidParametersHTTPException, TooLargeHTTPException
-from .....common.utils.math_utils import GB
+from .....common.utils.exceptions import (
+    ForbiddenHTTPException,
+    InvalidParametersHTTPException,
+    MaxFileSizeExceededException,
+    TooLargeHTTPException,
+    UploadException,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_REQUESTS = 10  # The number of Dropbox requests made at the same time.
 
 
 @db_session()
 def link(collection_uuid: str, body: dict, user: str):
 
-    # Verify Dropbox URL
-    url = dropbox.get_download_url_from_shared_link(body["url"])
-    if not url:
-        raise InvalidParametersHTTPException("The dropbox shared link is invalid.")
-
-    # Get file info
     try:
-        resp = dropbox.get_file_info(url)
-    except requests.HTTPError:
-        raise InvalidParametersHTTPException("The URL provided causes an error with Dropbox.")
-    except dropbox.MissingHeaderException as ex:
-        raise InvalidParametersHTTPException(ex.detail)
-    if resp["size"] > CorporaConfig().upload_max_file_size_gb * GB:
+        # Verify Dropbox URL
+        url = upload.get_download_url(body["url"])
+
+        # Get file info. In "deferred" mode the size and format checks are done by the processing job instead, so the
+        # response time does not depend on Dropbox.
+        file_size = None
+        if CorporaConfig().upload_validation_mode != "deferred":
+            file_size = upload.get_verified_file_info(url)["size"]
+    except MaxFileSizeExceededException:
         raise TooLargeHTTPException()
-    if resp["name"].rsplit(".")[-1].lower() not in CorporaConfig().upload_file_formats:
-        raise InvalidParametersHTTPException("The file referred to by the link is not a support file format.")
+    except UploadException as ex:
+        raise InvalidParametersHTTPException(ex.detail)
 
     # Create dataset
     collection = Collection.if_owner(collection_uuid, CollectionVisibility.PRIVATE, user)
@@ -37,6 +45,59 @@ def link(collection_uuid: str, body: dict, user: str):
         raise ForbiddenHTTPException
     dataset = Dataset.create(processing_status=Dataset.new_processing_status(), collection=collection)
 
-    # Start processing link
-    upload_sfn.start_upload_sfn(collection_uuid, dataset.id, url)
+    # Queue the link for processing
+    upload_scheduler.enqueue(collection_uuid, dataset.id, url, user, file_size)
     return make_response({"dataset_uuid": dataset.id}, 202)
+
+
+@db_session()
+def bulk_link(collection_uuid: str, body: dict, user: str):
+    collection = Collection.if_owner(collection_uuid, CollectionVisibility.PRIVATE, user)
+    if not collection:
+        raise ForbiddenHTTPException
+
+    results = [{"url": item["url"]} for item in body["links"]]
+    verify_file_info = CorporaConfig().upload_validation_mode != "deferred"
+
+    # Verify the Dropbox URLs concurrently
+    def _verify(result):
+        try:
+            url = upload.get_download_url(result["url"])
+            if verify_file_info:
+                result["file_size"] = upload.get_verified_file_info(url)["size"]
+        except MaxFileSizeExceededException as ex:
+            result["error"] = {"status": requests.codes.request_entity_too_large, "detail": ex.detail}
+        except UploadException as ex:
+            result["error"] = {"status": requests.codes.bad_request, "detail": ex.detail}
+        else:
+            result["download_url"] = url
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        list(executor.map(_verify, results))
+
+    # Create all the datasets in a single transaction
+    accepted = [result for result in results if "error" not in result]
+    datasets = Dataset.create_many(
+        [dict(processing_status=Dataset.new_processing_status(), collection=collection) for _ in accepted]
+    )
+    for result, dataset in zip(accepted, datasets):
+        result["dataset_uuid"] = dataset.id
+
+    # Queue the links for processing
+    upload_scheduler.enqueue_many(
+        [
+            dict(
+                collection_uuid=collection_uuid,
+                dataset_uuid=result["dataset_uuid"],
+                url=result["download_url"],
+                owner=user,
+                file_size=result.get("file_size"),
+            )
+            for result in accepted
+        ]
+    )
+
+    for result in results:
+        result.pop("download_url", None)
+        result.pop("file_size", None)
+    return make_response({"links": results}, 202)
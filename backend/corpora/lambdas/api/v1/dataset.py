@@ -1,6 +1,7 @@
 from flask import make_response, jsonify
 
-from ....common.corpora_orm import DbDatasetProcessingStatus, UploadStatus
+from ....common import upload_scheduler
+from ....common.corpora_orm import CollectionVisibility, DbDatasetProcessingStatus, UploadStatus
 from ....common.entities import Dataset, Collection
 from ....common.utils.db_utils import db_session, processing_status_updater
 from ....common.utils.exceptions import (
@@ -11,6 +12,25 @@ from ....common.utils.exceptions import (
 )
 
 
+@db_session()
+def search_datasets(fields: list = None, limit: int = 100, after: str = None, **facet_filters):
+    """
+    Finds the datasets of the public collections that match the facet filters. Each filter is a list of ontology term
+    ids, or of labels for sex.
+    """
+    datasets, next_after = Dataset.search(
+        facet_filters=facet_filters,
+        fields=fields,
+        limit=limit,
+        after=after,
+        visibility=CollectionVisibility.PUBLIC,
+    )
+    result = {"datasets": datasets}
+    if next_after:
+        result["next_after"] = next_after
+    return make_response(jsonify(result), 200)
+
+
 @db_session()
 def post_dataset_asset(dataset_uuid: str, asset_uuid: str):
 
@@ -69,12 +89,22 @@ def delete_dataset(dataset_uuid: str, user: str):
     curr_status = dataset.processing_status
     if curr_status.upload_status is UploadStatus.UPLOADED:
         raise MethodNotAllowedException(f"'dataset/{dataset_uuid}' upload is complete and can not be cancelled.")
+    # An upload that is still queued is cancelled at once. A running job cancels itself when it sees CANCEL_PENDING.
+    cancelled = upload_scheduler.cancel(dataset_uuid)
     status = {
         DbDatasetProcessingStatus.upload_progress: curr_status.upload_progress,
-        DbDatasetProcessingStatus.upload_status: UploadStatus.CANCEL_PENDING,
+        DbDatasetProcessingStatus.upload_status: UploadStatus.CANCELED if cancelled else UploadStatus.CANCEL_PENDING,
     }
     processing_status_updater(dataset.processing_status.id, status)
     updated_status = Dataset.get(dataset_uuid).processing_status.to_dict()
     for remove in ["dataset", "created_at", "updated_at"]:
         updated_status.pop(remove)
     return make_response(jsonify(updated_status), 202)
+
+
+@db_session()
+def get_facet_counts():
+    """
+    Counts the datasets of the public collections with each value of each metadata facet.
+    """
+    return make_response(jsonify({"facets": Dataset.get_facet_counts(CollectionVisibility.PUBLIC)}), 200)
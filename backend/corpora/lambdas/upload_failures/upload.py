@@ -15,6 +15,9 @@ def update_dataset_processing_status_to_failed(dataset_uuid, error=None) -> None
         }
 
         dataset = Dataset.get(dataset_uuid)
+        if dataset.processing_status.upload_status == UploadStatus.FAILED and dataset.processing_status.upload_message:
+            # Keep the reason the processing job gave for rejecting the upload rather than the error of the job.
+            del status[DbDatasetProcessingStatus.upload_message]
         processing_status_updater(dataset.processing_status.id, status)
     # If dataset not in db dont worry about updating its processing status
     except AttributeError:
@@ -0,0 +1,65 @@
+"""add_dataset_facet
+
+Revision ID: 3613bf9707f2
+Revises: 2a1c8b5e4d7f
+Create Date: 2021-01-19 09:42:17.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3613bf9707f2"
+down_revision = "2a1c8b5e4d7f"
+branch_labels = None
+depends_on = None
+
+FACETS = ["organism", "tissue", "assay", "disease", "sex", "ethnicity", "development_stage"]
+
+
+def upgrade():
+    op.create_table(
+        "dataset_facet",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("dataset_id", sa.String(), nullable=False),
+        sa.Column("facet", sa.String(), nullable=False),
+        sa.Column("ontology_term_id", sa.String(), nullable=False),
+        sa.Column("label", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["dataset_id"], ["dataset.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("dataset_id", "facet", "ontology_term_id", "label"),
+    )
+    op.create_index("ix_dataset_facet_facet_ontology_term_id", "dataset_facet", ["facet", "ontology_term_id"])
+
+    # Copy the metadata of the existing datasets. A column holds a single value or an array of values, and each value
+    # is either an object with a label and an ontology_term_id or a plain string.
+    for facet in FACETS:
+        op.execute(
+            f"""
+            INSERT INTO dataset_facet (id, dataset_id, facet, ontology_term_id, label)
+            SELECT md5(dataset_id || '/{facet}/' || ontology_term_id || '/' || label), dataset_id, '{facet}',
+                ontology_term_id, label
+            FROM (
+                SELECT DISTINCT dataset.id AS dataset_id,
+                    CASE jsonb_typeof(value) WHEN 'object' THEN coalesce(value->>'ontology_term_id', '') ELSE '' END
+                        AS ontology_term_id,
+                    CASE jsonb_typeof(value)
+                        WHEN 'object' THEN coalesce(value->>'label', '') ELSE value #>> '{{}}' END AS label
+                FROM dataset CROSS JOIN LATERAL jsonb_array_elements(
+                    CASE jsonb_typeof(dataset.{facet})
+                        WHEN 'array' THEN dataset.{facet}
+                        WHEN 'object' THEN jsonb_build_array(dataset.{facet})
+                        WHEN 'string' THEN jsonb_build_array(dataset.{facet})
+                        ELSE '[]'::jsonb
+                    END
+                ) AS value
+                WHERE jsonb_typeof(value) <> 'null'
+            ) AS facet_value
+            """
+        )
+
+
+def downgrade():
+    op.drop_index("ix_dataset_facet_facet_ontology_term_id", table_name="dataset_facet")
+    op.drop_table("dataset_facet")
@@ -2,6 +2,7 @@ import anndata
 import pandas as pd
 
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -74,24 +75,23 @@ def remix(adata):
 
 def create_adatas():
     # The expression values are spread across two csvs, and one of them only has ACE2 and TMPRSS2
-    X_1 = pd.read_csv(
-        "SCPdata_seurat_normalized_expression_counts_subset_ACE2_TMPRSS2_(1).csv", sep=",", header=0, index_col=0
-    ).T
-    X_2 = pd.read_csv(
-        "SCPdata_seurat_normalized_expression_counts_subset_absorptiveAndCryptentero.csv",
-        sep=",",
-        header=0,
-        index_col=0,
-    ).T
-    X = pd.concat([X_1, X_2], copy=False)
+    # The genes missing from a csv were not measured for its cells, which obs "source_matrix" and the
+    # var "measured_in_<key>" columns record
+    X_1 = utils.matrix_io.read_text_matrix(
+        "SCPdata_seurat_normalized_expression_counts_subset_ACE2_TMPRSS2_(1).csv", sep=","
+    )
+    X_2 = utils.matrix_io.read_text_matrix(
+        "SCPdata_seurat_normalized_expression_counts_subset_absorptiveAndCryptentero.csv", sep=","
+    )
+    X = utils.matrix_io.concat_cells([X_1, X_2], keys=["ACE2_TMPRSS2", "enterocytes"])
 
     # Same with the raw counts
-    rawX_1 = pd.read_csv("seurat_counts_subset_notEC_ACE2_TMPRSS2.csv", sep=",", header=0, index_col=0).T
-    rawX_2 = pd.read_csv("seurat_counts_subset_absorptiveAndCryptentero.csv", sep=",", header=0, index_col=0).T
-    rawX = pd.concat([rawX_1, rawX_2], copy=False)
+    rawX_1 = utils.matrix_io.read_text_matrix("seurat_counts_subset_notEC_ACE2_TMPRSS2.csv", sep=",")
+    rawX_2 = utils.matrix_io.read_text_matrix("seurat_counts_subset_absorptiveAndCryptentero.csv", sep=",")
+    rawX = utils.matrix_io.concat_cells([rawX_1, rawX_2], keys=["ACE2_TMPRSS2", "enterocytes"])
 
-    assert (X.index == rawX.index).all()
-    assert (X.columns == rawX.columns).all()
+    assert (X.obs_names == rawX.obs_names).all()
+    assert (X.var_names == rawX.var_names).all()
     assert X.shape == rawX.shape
 
     # There are two tsnes, one for everything and one for just the epithelial cells
@@ -105,19 +105,21 @@ def create_adatas():
     metadata = pd.read_csv("SCPdata_20200311_prelim_metadata.csv", sep=",", header=0, index_col=0, skiprows=[1])
 
     # Subset by the tsne indices
-    X_all = X.reindex(tsne_all.index, copy=True)
-    rawX_all = rawX.reindex(tsne_all.index, copy=True)
-    X_epith = X.reindex(tsne_epith.index, copy=True)
-    rawX_epith = rawX.reindex(tsne_epith.index, copy=True)
+    X_all = utils.matrix_io.reindex_cells(X, tsne_all.index)
+    rawX_all = utils.matrix_io.reindex_cells(rawX, tsne_all.index)
+    X_epith = utils.matrix_io.reindex_cells(X, tsne_epith.index)
+    rawX_epith = utils.matrix_io.reindex_cells(rawX, tsne_epith.index)
 
-    metadata_all = metadata.reindex(X_all.index, copy=True)
-    metadata_epith = metadata.reindex(X_epith.index, copy=True)
+    metadata_all = metadata.reindex(X_all.obs_names, copy=True)
+    metadata_epith = metadata.reindex(X_epith.obs_names, copy=True)
+    metadata_all["source_matrix"] = X_all.obs["source_matrix"]
+    metadata_epith["source_matrix"] = X_epith.obs["source_matrix"]
 
     adata_all = anndata.AnnData(
-        X=X_all, obs=metadata_all, obsm={"X_tsne": tsne_all.to_numpy()}, raw=anndata.AnnData(X=rawX_all)
+        X=X_all.X, obs=metadata_all, var=X_all.var, obsm={"X_tsne": tsne_all.to_numpy()}, raw=rawX_all
     )
     adata_epith = anndata.AnnData(
-        X=X_epith, obs=metadata_epith, obsm={"X_tsne": tsne_epith.to_numpy()}, raw=anndata.AnnData(X=rawX_epith)
+        X=X_epith.X, obs=metadata_epith, var=X_epith.var, obsm={"X_tsne": tsne_epith.to_numpy()}, raw=rawX_epith
     )
 
     return adata_all, adata_epith
@@ -133,14 +135,14 @@ def main():
     adata_all, adata_epi = create_adatas()
 
     basic_curation(adata_all)
-    adata_all.write(all_curated_fn, compression="gzip")
+    utils.matrix_io.write_h5ad(adata_all, all_curated_fn)
     basic_curation(adata_epi)
-    adata_epi.write(epi_curated_fn, compression="gzip")
+    utils.matrix_io.write_h5ad(adata_epi, epi_curated_fn)
 
     remix(adata_all)
-    adata_all.write(all_remixed_fn, compression="gzip")
+    utils.matrix_io.write_h5ad(adata_all, all_remixed_fn)
     remix(adata_epi)
-    adata_epi.write(epi_remixed_fn, compression="gzip")
+    utils.matrix_io.write_h5ad(adata_epi, epi_remixed_fn)
 
 
 main()
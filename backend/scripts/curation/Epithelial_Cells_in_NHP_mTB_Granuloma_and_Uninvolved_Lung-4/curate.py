@@ -1,6 +1,7 @@
 import anndata
 import pandas as pd
 
+import utils.matrix_io
 import utils.ontology
 
 
@@ -80,14 +81,14 @@ def remix(adata):
 
 def create_adata():
 
-    X = pd.read_csv("epithelial_cells_for_scp.txt", sep="\t", header=0, index_col=0).T
-    raw_X = pd.read_csv("all_epi_counts.txt", sep="\t", header=0, index_col=0)
+    X = utils.matrix_io.read_text_matrix("epithelial_cells_for_scp.txt")
+    raw_X = utils.matrix_io.read_text_matrix("all_epi_counts.txt", genes_by_cells=False)
     assert X.shape == raw_X.shape
-    assert (X.columns == raw_X.columns).all()
-    assert (X.index == raw_X.index).all()
+    assert (X.var_names == raw_X.var_names).all()
+    assert (X.obs_names == raw_X.obs_names).all()
 
     umap = pd.read_csv("epi_cells_umap.txt", sep="\t", header=0, skiprows=[1], index_col=0)
-    umap = umap.reindex(X.index)
+    umap = umap.reindex(X.obs_names)
     metadata = pd.read_csv(
         "epithelial_metadata_alexandria.txt",
         sep="\t",
@@ -95,12 +96,12 @@ def create_adata():
         index_col=0,
         skiprows=[1],
     )
-    metadata = metadata.reindex(X.index)
+    metadata = metadata.reindex(X.obs_names)
 
     metadata = metadata.drop(columns=["CellID"])  # This is already the index
 
-    adata = anndata.AnnData(X=X, obs=metadata, obsm={"X_umap": umap.to_numpy()})
-    adata.raw = anndata.AnnData(X=raw_X)
+    adata = anndata.AnnData(X=X.X, obs=metadata, var=X.var, obsm={"X_umap": umap.to_numpy()})
+    adata.raw = raw_X
 
     adata.obs["donor_id"] = adata.obs["donor_id"].astype("category")
 
@@ -112,9 +113,9 @@ def main():
     remixed_filename = "Epithelial_Cells_in_NHP_mTB_Granuloma_and_Uninvolved_Lung-4-remixed.h5ad"
     adata = create_adata()
     basic_curation(adata)
-    adata.write(curated_filename, compression="gzip")
+    utils.matrix_io.write_h5ad(adata, curated_filename)
     remix(adata)
-    adata.write(remixed_filename, compression="gzip")
+    utils.matrix_io.write_h5ad(adata, remixed_filename)
 
 
 main()
@@ -1,7 +1,9 @@
 import anndata
 import pandas as pd
 
+import utils.genes
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -87,14 +89,12 @@ def remix(adata):
     adata.uns["layer_descriptions"] = {"X": "raw"}
 
     upgraded_var_index = utils.hgnc.get_upgraded_var_index(adata.var)
-    merged_df = pd.DataFrame(adata.X, index=adata.obs.index, columns=upgraded_var_index).sum(
-        axis=1, level=0, skipna=False
-    )
+    merged_X, merged_var = utils.genes.merge_genes(adata.X, upgraded_var_index, var=adata.var)
 
     remix_adata = anndata.AnnData(
-        X=merged_df.to_numpy(),
+        X=merged_X,
         obs=adata.obs,
-        var=merged_df.columns.to_frame(name="hgnc_gene_symbol"),
+        var=merged_var,
         uns=adata.uns,
         obsm=adata.obsm,
         varm=adata.varm,
@@ -104,15 +104,17 @@ def remix(adata):
 
 
 def create_adata():
-    X_epi = pd.read_csv("Human_lung_epithelial_cell_raw_counts.txt.gz", sep="\t", header=0, index_col=0).T
-    X_nonepi = pd.read_csv("Human_lung_nonepithelial_ACE2_TMPRSS2_raw_counts.txt.gz", sep="\t", header=0, index_col=0).T
-    X = pd.concat([X_epi, X_nonepi])
+    X_epi = utils.matrix_io.read_text_matrix("Human_lung_epithelial_cell_raw_counts.txt.gz")
+    X_nonepi = utils.matrix_io.read_text_matrix("Human_lung_nonepithelial_ACE2_TMPRSS2_raw_counts.txt.gz")
+    # The nonepithelial matrix only has ACE2 and TMPRSS2. The other genes were not measured for its cells, which obs
+    # "source_matrix" and the var "measured_in_<key>" columns record
+    X = utils.matrix_io.concat_cells([X_epi, X_nonepi], keys=["epithelial", "nonepithelial_ACE2_TMPRSS2"])
 
     umap = pd.read_csv("AHRI_lung_umap.csv", sep=",", header=0, skiprows=[1], index_col=0)
-    umap = umap.reindex(X.index)
+    umap = umap.reindex(X.obs_names)
 
     metadata = pd.read_csv("alexandria_structured_metadata.txt", sep="\t", header=0, index_col=0, skiprows=[1])
-    metadata = metadata.reindex(X.index)
+    metadata = metadata.reindex(X.obs_names)
 
     # Remove direct personal identifiers
     # The geography refers to a specific city. DOC and DOB are full dates.
@@ -121,8 +123,9 @@ def create_adata():
     # Per submitter "ACE2_TMPRSS2 should be 'negative' where it is missing"
     metadata["ACE2_TMPRSS2_double_positive"].fillna("Negative", inplace=True)
     metadata = metadata.drop(columns=["CellID"])
+    metadata["source_matrix"] = X.obs["source_matrix"]
 
-    adata = anndata.AnnData(X=X, obs=metadata, obsm={"X_umap": umap.to_numpy()})
+    adata = anndata.AnnData(X=X.X, obs=metadata, var=X.var, obsm={"X_umap": umap.to_numpy()})
     adata.obs["donor_id"] = adata.obs["donor_id"].astype("category")
     adata.obs["biosample_id"] = adata.obs["biosample_id"].astype("category")
 
@@ -135,9 +138,9 @@ def main():
 
     adata = create_adata()
     basic_curation(adata)
-    adata.write(curated_filename, compression="gzip")
+    utils.matrix_io.write_h5ad(adata, curated_filename)
     remix_adata = remix(adata)
-    remix_adata.write(remixed_filename, compression="gzip")
+    utils.matrix_io.write_h5ad(remix_adata, remixed_filename)
 
 
 main()
@@ -0,0 +1,90 @@
+"""Compare the h5ad write profiles of utils.matrix_io for the way the processing pipeline reads a
+dataset: dataset_processing.process.extract_metadata reads the raw layer of a backed file in strides
+of 50000 rows, then cellxgene convert reads the whole file.
+
+For each profile, print the write time, the file size, and the time and throughput of both reads.
+Run from this directory, either on an existing h5ad or on a random sparse matrix:
+
+    python benchmark_write_profiles.py --h5ad dataset.h5ad
+    python benchmark_write_profiles.py --cells 200000 --genes 30000 --density 0.05
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import anndata
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import utils.matrix_io
+
+EXTRACT_METADATA_STRIDE = 50000
+
+
+def random_adata(cells, genes, density, seed=0):
+    """A cells x genes AnnData with random integer counts stored as float32, like raw counts."""
+    rng = np.random.default_rng(seed)
+    X = sparse.random(cells, genes, density=density, format="csr", dtype=np.float32, random_state=rng)
+    X.data = np.ceil(X.data * 10)
+    return anndata.AnnData(
+        X=X,
+        obs=pd.DataFrame(index=[f"cell_{i}" for i in range(cells)]),
+        var=pd.DataFrame(index=[f"gene_{i}" for i in range(genes)]),
+    )
+
+
+def strided_read(filename):
+    """Count the nonzero values of X as extract_metadata does."""
+    adata = anndata.read_h5ad(filename, backed="r")
+    nonzero = 0
+    for start in range(0, adata.n_obs, EXTRACT_METADATA_STRIDE):
+        chunk = adata.X[start : start + EXTRACT_METADATA_STRIDE, :]
+        nonzero += chunk.nnz if hasattr(chunk, "nnz") else np.count_nonzero(chunk)
+    adata.file.close()
+    return nonzero
+
+
+def timed(function, *args):
+    start_time = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--h5ad", help="The dataset to write with each profile. A random matrix is used otherwise.")
+    parser.add_argument("--cells", type=int, default=100000)
+    parser.add_argument("--genes", type=int, default=20000)
+    parser.add_argument("--density", type=float, default=0.05)
+    parser.add_argument("--profiles", nargs="+", default=list(utils.matrix_io.WRITE_PROFILES))
+    parser.add_argument("--directory", help="Where the files are written. Defaults to a temporary directory.")
+    args = parser.parse_args()
+
+    adata = anndata.read_h5ad(args.h5ad) if args.h5ad else random_adata(args.cells, args.genes, args.density)
+    matrix_bytes = adata.X.data.nbytes if sparse.issparse(adata.X) else adata.X.nbytes
+    print(f"{adata.n_obs} cells x {adata.n_vars} genes, {matrix_bytes / 2 ** 20:.0f} MB of matrix values")
+    print(
+        f"{'profile':>12} {'write (s)':>10} {'size (MB)':>10} {'strided read (s)':>17} {'MB/s':>7}"
+        f" {'full read (s)':>14} {'MB/s':>7}"
+    )
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        for profile in args.profiles:
+            filename = os.path.join(directory, f"{profile}.h5ad")
+            write_time = timed(utils.matrix_io.write_h5ad, adata, filename, profile)
+            size = os.path.getsize(filename) / 2 ** 20
+            strided_time = timed(strided_read, filename)
+            full_time = timed(anndata.read_h5ad, filename)
+            print(
+                f"{profile:>12} {write_time:>10.2f} {size:>10.1f} {strided_time:>17.2f}"
+                f" {matrix_bytes / 2 ** 20 / strided_time:>7.0f} {full_time:>14.2f}"
+                f" {matrix_bytes / 2 ** 20 / full_time:>7.0f}"
+            )
+            os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,12 @@ import argparse
 import json
 import string
 
+import numpy as np
+import pandas as pd
 import scanpy as sc
 import yaml
 
+import matrix_io
 import ontology
 
 REPLACE_SUFFIX = "_original"
@@ -36,82 +39,186 @@ def safe_add_field(adata_attr, field_name, field_value):
     adata_attr[field_name] = field_value
 
 
-def get_curie_and_label(maybe_curie):
-    """Given a string that might be a curie, return a (curie, label) pair"""
-    if not is_curie(maybe_curie):
-        return ("", maybe_curie)
-    else:
-        return (maybe_curie, ontology.get_ontology_label(maybe_curie))
-
-
-def remix_uns(adata, uns_config):
-    """Add fields from the config to adata.uns"""
-    for field_name, field_value in uns_config.items():
-
+def get_config_curies(config):
+    """Return the curies of the ontology fields of a remix config."""
+    curies = []
+    for field_name, field_value in list(config["uns"].items()) + list(config["obs"].items()):
         if is_ontology_field(field_name):
-            # If it's an ontology field, look it up
-            label_field_name = get_label_field_name(field_name)
-            ontology_term, ontology_label = get_curie_and_label(field_value)
-            safe_add_field(adata.uns, field_name, ontology_term)
-            safe_add_field(adata.uns, label_field_name, ontology_label)
-        else:
+            values = next(iter(field_value.values())).values() if isinstance(field_value, dict) else [field_value]
+            curies.extend(value for value in values if isinstance(value, str) and is_curie(value))
+    return curies
+
+
+class ObsField:
+    """A column of adata.obs created by the remix, either a constant or a map from the values of a source column."""
+
+    def __init__(self, field_name, value=None, source_column=None, value_map=None):
+        self.field_name = field_name
+        self.value = value
+        self.source_column = source_column
+        self.value_map = value_map
+
+    def compute(self, obs):
+        """Return the column as a categorical Series. Values of the source column that are not in the map are kept."""
+        if self.source_column is None:
+            return pd.Series(
+                pd.Categorical.from_codes(np.zeros(len(obs), dtype=np.int8), [self.value]), index=obs.index
+            )
+
+        source = obs[self.source_column]
+        if not isinstance(source.dtype, pd.CategoricalDtype):
+            source = source.astype("category")
+        # Map the categories, not the cells, then point the codes of the cells at the mapped categories.
+        mapped_values = pd.Index([self.value_map.get(category, category) for category in source.cat.categories])
+        category_codes, categories = pd.factorize(mapped_values)
+        codes = source.cat.codes.to_numpy()
+        codes = np.where(codes < 0, -1, category_codes[codes])
+        return pd.Series(pd.Categorical.from_codes(codes, categories), index=obs.index)
+
+    def describe(self, obs):
+        """Describe the column for a dry run: the constant, or each value of the source column and the number of cells
+        it maps."""
+        if self.source_column is None:
+            return [f"obs.{self.field_name} = {self.value!r}"]
+
+        source = obs[self.source_column]
+        if not isinstance(source.dtype, pd.CategoricalDtype):
+            source = source.astype("category")
+        codes = source.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(source.cat.categories))
+        lines = [f"obs.{self.field_name} from obs.{self.source_column}:"]
+        for category, count in zip(source.cat.categories, counts):
+            mapped_value = self.value_map.get(category, category)
+            unchanged = "" if category in self.value_map else " (not in translation dict)"
+            lines.append(f"    {category!r} -> {mapped_value!r}, {count} cells{unchanged}")
+        return lines
+
+
+class RemixPlan:
+    """A remix config compiled into the fields to add to adata.uns and adata.obs. Every curie of the config is resolved
+    to its label when the plan is compiled, so applying the plan does not look anything up."""
+
+    def __init__(self, uns_fields, obs_fields):
+        self.uns_fields = uns_fields
+        self.obs_fields = obs_fields
+
+    @classmethod
+    def compile(cls, config):
+        # Look up the labels of all the curies at once
+        labels = ontology.get_ontology_labels(get_config_curies(config))
+
+        def curie_and_label(maybe_curie):
+            if isinstance(maybe_curie, str) and is_curie(maybe_curie):
+                return maybe_curie, labels[maybe_curie]
+            return "", maybe_curie
+
+        uns_fields = []
+        for field_name, field_value in config["uns"].items():
+            if is_ontology_field(field_name):
+                ontology_term, ontology_label = curie_and_label(field_value)
+                uns_fields.append((field_name, ontology_term))
+                uns_fields.append((get_label_field_name(field_name), ontology_label))
+            else:
+                uns_fields.append((field_name, field_value))
+
+        obs_fields = []
+        for field_name, field_value in config["obs"].items():
+            if isinstance(field_value, dict):
+                # If the value is a dict, that means we are supposed to map from an existing column to the new one
+                source_column, column_map = next(iter(field_value.items()))
+                if is_ontology_field(field_name):
+                    pairs = {original_value: curie_and_label(value) for original_value, value in column_map.items()}
+                    term_map = {original_value: pair[0] for original_value, pair in pairs.items()}
+                    label_map = {original_value: pair[1] for original_value, pair in pairs.items()}
+                    obs_fields.append(ObsField(field_name, source_column=source_column, value_map=term_map))
+                    obs_fields.append(
+                        ObsField(get_label_field_name(field_name), source_column=source_column, value_map=label_map)
+                    )
+                else:
+                    obs_fields.append(ObsField(field_name, source_column=source_column, value_map=column_map))
+            elif is_ontology_field(field_name):
+                ontology_term, ontology_label = curie_and_label(field_value)
+                obs_fields.append(ObsField(field_name, value=ontology_term))
+                obs_fields.append(ObsField(get_label_field_name(field_name), value=ontology_label))
+            else:
+                obs_fields.append(ObsField(field_name, value=field_value))
+
+        return cls(uns_fields, obs_fields)
+
+    def check_source_columns(self, obs):
+        """Warn about map keys that are not in their source column and source values that are not in their map."""
+        checked = set()
+        for field in self.obs_fields:
+            # The term and label fields of an ontology field share their source column and keys
+            if field.source_column is None or (field.source_column, tuple(field.value_map)) in checked:
+                continue
+            checked.add((field.source_column, tuple(field.value_map)))
+            source = obs[field.source_column]
+            source_values = set(
+                source.cat.categories if isinstance(source.dtype, pd.CategoricalDtype) else source.unique()
+            )
+            for key in field.value_map:
+                if key not in source_values:
+                    print(f'WARNING: key {key} not in adata.obs["{field.source_column}"]')
+            for value in source_values:
+                if value not in field.value_map:
+                    print(f'WARNING: Value {value} in adata.obs["{field.source_column}"] not in translation dict')
+
+    def apply(self, adata):
+        """Add the fields to the AnnData. Existing fields are kept with the REPLACE_SUFFIX."""
+        for field_name, field_value in self.uns_fields:
             safe_add_field(adata.uns, field_name, field_value)
 
-
-def remix_obs(adata, obs_config):
-    """Add fields from the config to adata.obs"""
-
-    for field_name, field_value in obs_config.items():
-
-        if isinstance(field_value, dict):
-            # If the value is a dict, that means we are supposed to map from an existing column to the new one
-            source_column, column_map = next(iter(field_value.items()))
-
-            for key in column_map:
-                if key not in adata.obs[source_column].unique():
-                    print(f'WARNING: key {key} not in adata.obs["{source_column}"]')
-
-            for value in adata.obs[source_column].unique():
-                if value not in column_map:
-                    print(f'WARNING: Value {value} in adata.obs["{source_column}"] not in translation dict')
-            if is_ontology_field(field_name):
-                ontology_term_map, ontology_label_map = {}, {}
-                print("\n", field_name, "\n")
-                for original_value, maybe_curie in column_map.items():
-                    curie, label = get_curie_and_label(maybe_curie)
-                    ontology_term_map[original_value] = curie
-                    ontology_label_map[original_value] = label
-                    print(";".join([original_value, curie, label]))
-
-                ontology_column = adata.obs[source_column].replace(ontology_term_map, inplace=False)
-                label_column = adata.obs[source_column].replace(ontology_label_map, inplace=False)
-
-                safe_add_field(adata.obs, field_name, ontology_column)
-                safe_add_field(adata.obs, get_label_field_name(field_name), label_column)
-        else:
-            if is_ontology_field(field_name):
-                # If it's an ontology field, look it up
-                label_field_name = get_label_field_name(field_name)
-                ontology_term, ontology_label = get_curie_and_label(field_value)
-                safe_add_field(adata.obs, field_name, ontology_term)
-                safe_add_field(adata.obs, label_field_name, ontology_label)
+        self.check_source_columns(adata.obs)
+        # Every column is computed from the original obs, then the obs is rebuilt once.
+        columns = {field.field_name: field.compute(adata.obs) for field in self.obs_fields}
+        replaced = {
+            field_name + REPLACE_SUFFIX: adata.obs[field_name] for field_name in columns if field_name in adata.obs
+        }
+        adata.obs = adata.obs.assign(**replaced, **columns)
+
+    def diff(self, adata):
+        """Return the changes that apply would make, one per line."""
+        lines = []
+        for field_name, field_value in self.uns_fields:
+            if field_name in adata.uns:
+                lines.append(f"uns.{field_name}: {adata.uns[field_name]!r} -> {field_value!r}")
             else:
-                safe_add_field(adata.obs, field_name, field_value)
+                lines.append(f"uns.{field_name} = {field_value!r}")
+        for field in self.obs_fields:
+            lines.extend(field.describe(adata.obs))
+            if field.field_name in adata.obs:
+                lines.append(
+                    f"    the existing obs.{field.field_name} is kept as obs.{field.field_name}{REPLACE_SUFFIX}"
+                )
+        return lines
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--source-h5ad", required=True)
     parser.add_argument("--remix-config", required=True)
-    parser.add_argument("--output-filename", required=True)
+    parser.add_argument("--output-filename")
+    parser.add_argument("--write-profile", choices=list(matrix_io.WRITE_PROFILES))
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes instead of writing a remixed file")
     args = parser.parse_args()
+    if not args.dry_run and not args.output_filename:
+        parser.error("--output-filename is required unless --dry-run is given")
 
     config = yaml.load(open(args.remix_config), Loader=yaml.FullLoader)
+    plan = RemixPlan.compile(config)
+
+    if args.dry_run:
+        # Only the metadata is needed, so leave the matrices on disk
+        adata = sc.read_h5ad(args.source_h5ad, backed="r")
+        plan.check_source_columns(adata.obs)
+        print("\n".join(plan.diff(adata)))
+        return
+
     adata = sc.read_h5ad(args.source_h5ad)
-    remix_uns(adata, config["uns"])
-    remix_obs(adata, config["obs"])
+    plan.apply(adata)
 
-    adata.write_h5ad(args.output_filename, compression="gzip")
+    matrix_io.write_h5ad(adata, args.output_filename, args.write_profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+"""Remix every covid19cellatlas dataset that has a config.
+
+Each config <name>.yaml in --config-dir remixes <name>.h5ad in --input-dir into <name>.remixed.h5ad in --output-dir.
+The configs are compiled once, so the ontology terms of all of them are resolved together, and the remixes run in a
+pool of forked processes. A remix is only started when the memory it is estimated to need fits in --memory-gb next to
+the remixes already running. Outputs that are newer than their input and their config are skipped.
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import h5py
+import scanpy as sc
+import yaml
+
+import matrix_io
+import ontology
+import remix
+
+# The memory used by a remix relative to the uncompressed size of the matrices of its input
+MEMORY_OVERHEAD = 1.5
+
+_plans = {}  # The compiled plan of each config, set before the workers are forked.
+
+
+class RemixJob:
+    def __init__(self, name, config_path, input_path, output_path):
+        self.name = name
+        self.config_path = config_path
+        self.input_path = input_path
+        self.output_path = output_path
+        self.memory = estimate_memory(input_path) if os.path.exists(input_path) else 0
+
+    def is_up_to_date(self):
+        if not os.path.exists(self.output_path):
+            return False
+        output_time = os.path.getmtime(self.output_path)
+        return output_time > os.path.getmtime(self.input_path) and output_time > os.path.getmtime(self.config_path)
+
+
+def estimate_memory(h5ad_path):
+    """Estimate the memory needed to remix an h5ad from the uncompressed size of its matrices, read from the HDF5
+    metadata without reading the matrices."""
+    matrix_bytes = 0
+
+    def add_dataset_size(name, item):
+        nonlocal matrix_bytes
+        if isinstance(item, h5py.Dataset):
+            matrix_bytes += item.size * item.dtype.itemsize
+
+    with h5py.File(h5ad_path, "r") as h5ad_file:
+        for matrix_name in ("X", "raw", "raw.X", "layers"):
+            item = h5ad_file.get(matrix_name)
+            if isinstance(item, h5py.Group):
+                item.visititems(add_dataset_size)
+            elif item is not None:
+                add_dataset_size(matrix_name, item)
+    return int(matrix_bytes * MEMORY_OVERHEAD)
+
+
+def run_remix(name, input_path, output_path, write_profile):
+    start_time = time.time()
+    adata = sc.read_h5ad(input_path)
+    _plans[name].apply(adata)
+    matrix_io.write_h5ad(adata, output_path, write_profile)
+    return time.time() - start_time
+
+
+def find_jobs(config_dir, input_dir, output_dir):
+    jobs = []
+    for config_path in sorted(glob.glob(os.path.join(config_dir, "*.yaml"))):
+        name = os.path.basename(config_path)[: -len(".yaml")]
+        jobs.append(
+            RemixJob(
+                name,
+                config_path,
+                os.path.join(input_dir, f"{name}.h5ad"),
+                os.path.join(output_dir, f"{name}.remixed.h5ad"),
+            )
+        )
+    return jobs
+
+
+def compile_plans(jobs):
+    configs = {job.name: yaml.load(open(job.config_path), Loader=yaml.FullLoader) for job in jobs}
+
+    # Resolve the curies of every config at once, so compiling each plan finds them cached
+    ontology.get_ontology_labels([curie for config in configs.values() for curie in remix.get_config_curies(config)])
+
+    return {name: remix.RemixPlan.compile(config) for name, config in configs.items()}
+
+
+def run_jobs(jobs, processes, memory_budget, write_profile):
+    """Run the largest remixes first, starting each one when its memory fits next to the running ones. A remix that
+    needs more than the whole budget runs alone."""
+    pending = sorted(jobs, key=lambda job: job.memory, reverse=True)
+    running = {}
+    failures = []
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        while pending or running:
+            used_memory = sum(job.memory for job in running.values())
+            for job in list(pending):
+                if len(running) >= processes:
+                    break
+                if not running or used_memory + job.memory <= memory_budget:
+                    print(f"Remixing {job.name}, estimated to need {job.memory / 2 ** 30:.1f} GB")
+                    future = executor.submit(run_remix, job.name, job.input_path, job.output_path, write_profile)
+                    running[future] = job
+                    used_memory += job.memory
+                    pending.remove(job)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                try:
+                    print(f"Remixed {job.name} into {job.output_path} in {future.result():.1f} seconds")
+                except Exception as e:
+                    print(f"ERROR: Remixing {job.name} failed: {e!r}")
+                    failures.append(job.name)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs"))
+    parser.add_argument("--input-dir", required=True)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--memory-gb", type=float, default=32, help="The memory the running remixes may use together")
+    parser.add_argument("--write-profile", choices=list(matrix_io.WRITE_PROFILES))
+    parser.add_argument("--force", action="store_true", help="Remix the datasets whose outputs are up to date too")
+    args = parser.parse_args()
+
+    jobs = find_jobs(args.config_dir, args.input_dir, args.output_dir)
+    missing = [job.name for job in jobs if not os.path.exists(job.input_path)]
+    if missing:
+        print(f"WARNING: Skipping the configs without an input in {args.input_dir}: {missing}")
+    jobs = [job for job in jobs if job.name not in missing]
+    if not args.force:
+        up_to_date = [job.name for job in jobs if job.is_up_to_date()]
+        if up_to_date:
+            print(f"Skipping the up to date outputs of {up_to_date}")
+        jobs = [job for job in jobs if job.name not in up_to_date]
+    if not jobs:
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    _plans.update(compile_plans(jobs))
+    failures = run_jobs(jobs, args.processes, args.memory_gb * 2 ** 30, args.write_profile)
+    if failures:
+        sys.exit(f"{len(failures)} remixes failed: {failures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import anndata
 import numpy as np
-import pandas as pd
 import scanpy.api as sc
 
+import utils.genes
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -143,14 +144,12 @@ def remix(adata):
     adata.uns["layer_descriptions"] = {"X": "log1p CPM"}
 
     upgraded_var_index = utils.hgnc.get_upgraded_var_index(adata.var)
-    merged_df = pd.DataFrame(np.expm1(adata.X), index=adata.obs.index, columns=upgraded_var_index).sum(
-        axis=1, level=0, skipna=False
-    )
+    merged_X, merged_var = utils.genes.merge_genes(np.expm1(adata.X), upgraded_var_index)
 
     remix_adata = anndata.AnnData(
-        X=np.log1p(merged_df.to_numpy()),
+        X=np.log1p(merged_X),
         obs=adata.obs,
-        var=merged_df.columns.to_frame(name="hgnc_gene_symbol"),
+        var=merged_var,
         uns=adata.uns,
         obsm=adata.obsm,
         varm=adata.varm,
@@ -167,9 +166,9 @@ def main():
     # Read raw, X has most of the genes filtered out
     adata = sc.read_h5ad(original_filename).raw.to_adata()
     basic_curation(adata)
-    adata.write(curated_filename, compression="gzip")
+    utils.matrix_io.write_h5ad(adata, curated_filename)
     remix_adata = remix(adata)
-    remix_adata.write(remixed_filename, compression="gzip")
+    utils.matrix_io.write_h5ad(remix_adata, remixed_filename)
 
 
 main()
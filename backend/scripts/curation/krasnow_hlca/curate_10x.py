@@ -5,11 +5,12 @@ cell_type_ontology_map dicts."""
 
 import anndata
 import numpy as np
-import pandas as pd
 import scanpy as sc
 import json
 
+import utils.genes
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -216,15 +217,13 @@ def remix(adata, title: str):
     # Now translate the gene symbols and sum new duplicates
     # Note that we're pulling from raw here. That's where the raw counts that we can sum are
     upgraded_var_index = utils.hgnc.get_upgraded_var_index(adata.var)
-    merged_raw_counts = pd.DataFrame(adata.raw.X, index=adata.obs.index, columns=upgraded_var_index).sum(
-        axis=1, level=0, skipna=False
-    )
+    merged_raw_counts, merged_var = utils.genes.merge_genes(adata.raw.X, upgraded_var_index)
 
     # Create the new anndata object with the summed values
     remix_adata = anndata.AnnData(
         X=merged_raw_counts,
         obs=adata.obs,
-        var=merged_raw_counts.columns.to_frame(name="hgnc_gene_symbol"),
+        var=merged_var,
         uns=adata.uns,
         obsm=adata.obsm,
     )
@@ -277,7 +276,7 @@ def print_summary(adata):
 ad = sc.read_h5ad("krasnow_lab_human_lung_cell_atlas_10x-1-curated.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("krasnow_lab_human_lung_cell_atlas_10x-1-curatedv2.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "krasnow_lab_human_lung_cell_atlas_10x-1-curatedv2.h5ad")
 rad = remix(ad, title="Krasnow Lab Human Lung Cell Atlas, 10X")
 print_summary(rad)
-rad.write("krasnow_lab_human_lung_cell_atlas_10x-1-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "krasnow_lab_human_lung_cell_atlas_10x-1-remixed.h5ad")
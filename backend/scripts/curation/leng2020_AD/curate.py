@@ -4,11 +4,12 @@ et. al. 2020) biorxiv preprint submission"""
 
 import anndata
 import numpy as np
-import pandas as pd
 import scanpy as sc
 from scipy.sparse import csr_matrix
 
+import utils.genes
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -110,17 +111,13 @@ def remix(adata, title: str):
     # Now translate the gene symbols and sum new duplicates
     # Note that we're pulling from raw here. That's where the raw counts that we can sum are
     upgraded_var_index = utils.hgnc.get_upgraded_var_index(adata.var)
-    merged_raw_counts = pd.DataFrame.sparse.from_spmatrix(
-        adata.raw.X,
-        index=adata.obs.index,
-        columns=upgraded_var_index,
-    ).sum(axis=1, level=0, skipna=False)
+    merged_raw_counts, merged_var = utils.genes.merge_genes(adata.raw.X, upgraded_var_index)
 
     # Create the new anndata object with the summed values
     remix_adata = anndata.AnnData(
         X=merged_raw_counts,
         obs=adata.obs,
-        var=merged_raw_counts.columns.to_frame(name="hgnc_gene_symbol"),
+        var=merged_var,
         uns=adata.uns,
         obsm=adata.obsm,
     )
@@ -177,46 +174,47 @@ def print_summary(adata):
 ad = sc.read_h5ad("EC_allCells/kampmann_lab_human_AD_snRNAseq_EC.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("EC_allCells/kampmann_lab_human_AD_snRNAseq_EC-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "EC_allCells/kampmann_lab_human_AD_snRNAseq_EC-curated.h5ad")
 rad = remix(
     ad,
     title="Molecular characterization of selectively vulnerable neurons in "
     "Alzheimer’s Disease: caudal entorhinal cortex",
 )
 print_summary(rad)
-rad.write("EC_allCells/kampmann_lab_human_AD_snRNAseq_EC-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "EC_allCells/kampmann_lab_human_AD_snRNAseq_EC-remixed.h5ad")
 
 # Process SFG_all
 ad = sc.read_h5ad("SFG_allCells/kampmann_lab_human_AD_snRNAseq_SFG.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("SFG_allCells/kampmann_lab_human_AD_snRNAseq_SFG-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "SFG_allCells/kampmann_lab_human_AD_snRNAseq_SFG-curated.h5ad")
 rad = remix(
     ad,
     title="Molecular characterization of selectively vulnerable neurons in "
     "Alzheimer’s Disease: superior frontal gyrus",
 )
 print_summary(rad)
-rad.write("SFG_allCells/kampmann_lab_human_AD_snRNAseq_SFG-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "SFG_allCells/kampmann_lab_human_AD_snRNAseq_SFG-remixed.h5ad")
 
 # Process EC_astrocytes
 ad = sc.read_h5ad("EC_subclusters/EC_astrocytes/kampmann_lab_human_AD_snRNAseq_EC_astrocytes.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("EC_subclusters/EC_astrocytes/kampmann_lab_human_AD_snRNAseq_EC_astrocytes-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "EC_subclusters/EC_astrocytes/kampmann_lab_human_AD_snRNAseq_EC_astrocytes-curated.h5ad")
 rad = remix(
     ad, title="Molecular characterization of selectively vulnerable neurons in " "Alzheimer’s Disease: EC astrocytes"
 )
 print_summary(rad)
-rad.write("EC_subclusters/EC_astrocytes/kampmann_lab_human_AD_snRNAseq_EC_astrocytes-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(
+    rad, "EC_subclusters/EC_astrocytes/kampmann_lab_human_AD_snRNAseq_EC_astrocytes-remixed.h5ad"
+)
 
 # Process EC_excitatoryNeurons
 ad = sc.read_h5ad("EC_subclusters/EC_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_excitatoryNeurons.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write(
-    "EC_subclusters/EC_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_excitatoryNeurons-curated.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    ad, "EC_subclusters/EC_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_excitatoryNeurons-curated.h5ad"
 )
 rad = remix(
     ad,
@@ -224,18 +222,16 @@ rad = remix(
     "Alzheimer’s Disease: EC excitatoryNeurons",
 )
 print_summary(rad)
-rad.write(
-    "EC_subclusters/EC_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_excitatoryNeurons-remixed.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    rad, "EC_subclusters/EC_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_excitatoryNeurons-remixed.h5ad"
 )
 
 # Process EC_inhibitoryNeurons
 ad = sc.read_h5ad("EC_subclusters/EC_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_inhibitoryNeurons.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write(
-    "EC_subclusters/EC_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_inhibitoryNeurons-curated.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    ad, "EC_subclusters/EC_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_inhibitoryNeurons-curated.h5ad"
 )
 rad = remix(
     ad,
@@ -243,44 +239,42 @@ rad = remix(
     "Alzheimer’s Disease: EC inhibitoryNeurons",
 )
 print_summary(rad)
-rad.write(
-    "EC_subclusters/EC_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_inhibitoryNeurons-remixed.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    rad, "EC_subclusters/EC_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_EC_inhibitoryNeurons-remixed.h5ad"
 )
 
 # Process EC_microglia
 ad = sc.read_h5ad("EC_subclusters/EC_microglia/kampmann_lab_human_AD_snRNAseq_EC_microglia.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("EC_subclusters/EC_microglia/kampmann_lab_human_AD_snRNAseq_EC_microglia-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "EC_subclusters/EC_microglia/kampmann_lab_human_AD_snRNAseq_EC_microglia-curated.h5ad")
 rad = remix(
     ad, title="Molecular characterization of selectively vulnerable neurons in " "Alzheimer’s Disease: EC microglia"
 )
 print_summary(rad)
-rad.write("EC_subclusters/EC_microglia/kampmann_lab_human_AD_snRNAseq_EC_microglia-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "EC_subclusters/EC_microglia/kampmann_lab_human_AD_snRNAseq_EC_microglia-remixed.h5ad")
 
 # Process SFG_astrocytes
 ad = sc.read_h5ad("SFG_subclusters/SFG_astrocytes/kampmann_lab_human_AD_snRNAseq_SFG_astrocytes.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write(
-    "SFG_subclusters/SFG_astrocytes/kampmann_lab_human_AD_snRNAseq_SFG_astrocytes-curated.h5ad", compression="gzip"
+utils.matrix_io.write_h5ad(
+    ad, "SFG_subclusters/SFG_astrocytes/kampmann_lab_human_AD_snRNAseq_SFG_astrocytes-curated.h5ad"
 )
 rad = remix(
     ad, title="MolSFGular characterization of selSFGtively vulnerable neurons in " "Alzheimer’s Disease: SFG astrocytes"
 )
 print_summary(rad)
-rad.write(
-    "SFG_subclusters/SFG_astrocytes/kampmann_lab_human_AD_snRNAseq_SFG_astrocytes-remixed.h5ad", compression="gzip"
+utils.matrix_io.write_h5ad(
+    rad, "SFG_subclusters/SFG_astrocytes/kampmann_lab_human_AD_snRNAseq_SFG_astrocytes-remixed.h5ad"
 )
 
 # Process SFG_excitatoryNeurons
 ad = sc.read_h5ad("SFG_subclusters/SFG_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_excitatoryNeurons.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write(
-    "SFG_subclusters/SFG_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_excitatoryNeurons-curated.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    ad, "SFG_subclusters/SFG_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_excitatoryNeurons-curated.h5ad"
 )
 rad = remix(
     ad,
@@ -288,18 +282,16 @@ rad = remix(
     "Alzheimer’s Disease: SFG excitatoryNeurons",
 )
 print_summary(rad)
-rad.write(
-    "SFG_subclusters/SFG_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_excitatoryNeurons-remixed.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    rad, "SFG_subclusters/SFG_excitatoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_excitatoryNeurons-remixed.h5ad"
 )
 
 # Process SFG_inhibitoryNeurons
 ad = sc.read_h5ad("SFG_subclusters/SFG_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_inhibitoryNeurons.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write(
-    "SFG_subclusters/SFG_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_inhibitoryNeurons-curated.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    ad, "SFG_subclusters/SFG_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_inhibitoryNeurons-curated.h5ad"
 )
 rad = remix(
     ad,
@@ -307,18 +299,21 @@ rad = remix(
     "Alzheimer’s Disease: SFG inhibitoryNeurons",
 )
 print_summary(rad)
-rad.write(
-    "SFG_subclusters/SFG_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_inhibitoryNeurons-remixed.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    rad, "SFG_subclusters/SFG_inhibitoryNeurons/kampmann_lab_human_AD_snRNAseq_SFG_inhibitoryNeurons-remixed.h5ad"
 )
 
 # Process SFG_microglia
 ad = sc.read_h5ad("SFG_subclusters/SFG_microglia/kampmann_lab_human_AD_snRNAseq_SFG_microglia.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("SFG_subclusters/SFG_microglia/kampmann_lab_human_AD_snRNAseq_SFG_microglia-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(
+    ad, "SFG_subclusters/SFG_microglia/kampmann_lab_human_AD_snRNAseq_SFG_microglia-curated.h5ad"
+)
 rad = remix(
     ad, title="MolSFGular characterization of selSFGtively vulnerable neurons in " "Alzheimer’s Disease: SFG microglia"
 )
 print_summary(rad)
-rad.write("SFG_subclusters/SFG_microglia/kampmann_lab_human_AD_snRNAseq_SFG_microglia-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(
+    rad, "SFG_subclusters/SFG_microglia/kampmann_lab_human_AD_snRNAseq_SFG_microglia-remixed.h5ad"
+)
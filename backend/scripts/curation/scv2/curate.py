@@ -3,10 +3,11 @@
 
 import anndata
 import numpy as np
-import pandas as pd
 import scanpy as sc
 
+import utils.genes
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -96,17 +97,13 @@ def remix(adata):
     # Now translate the gene symbols and sum new duplicates
     # Note that we're pulling from raw here. That's where the raw counts that we can sum are
     upgraded_var_index = utils.hgnc.get_upgraded_var_index(adata.var)
-    merged_raw_counts = pd.DataFrame.sparse.from_spmatrix(
-        adata.raw.X,
-        index=adata.obs.index,
-        columns=upgraded_var_index,
-    ).sum(axis=1, level=0, skipna=False)
+    merged_raw_counts, merged_var = utils.genes.merge_genes(adata.raw.X, upgraded_var_index)
 
     # Create the new anndata object with the summed values
     remix_adata = anndata.AnnData(
         X=merged_raw_counts,
         obs=adata.obs,
-        var=merged_raw_counts.columns.to_frame(name="hgnc_gene_symbol"),
+        var=merged_var,
         uns=adata.uns,
         obsm=adata.obsm,
     )
@@ -141,13 +138,11 @@ ad = sc.read_h5ad(
 )
 basic_curation(ad)
 print_summary(ad)
-ad.write(
-    "Single_cell_longitudinal_analysis_of_SARS_CoV_2_infection_in_human_bronchial_epithelial_cells-29-curated.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    ad, "Single_cell_longitudinal_analysis_of_SARS_CoV_2_infection_in_human_bronchial_epithelial_cells-29-curated.h5ad"
 )
 rad = remix(ad)
 print_summary(rad)
-rad.write(
-    "Single_cell_longitudinal_analysis_of_SARS_CoV_2_infection_in_human_bronchial_epithelial_cells-29-remixed.h5ad",
-    compression="gzip",
+utils.matrix_io.write_h5ad(
+    rad, "Single_cell_longitudinal_analysis_of_SARS_CoV_2_infection_in_human_bronchial_epithelial_cells-29-remixed.h5ad"
 )
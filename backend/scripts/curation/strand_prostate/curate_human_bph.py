@@ -28,6 +28,7 @@ import numpy as np
 import scanpy as sc
 
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -170,8 +171,8 @@ def print_summary(adata):
 ad = sc.read_h5ad("2020Prostate_huPr_PdPgb_epi.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("2020Prostate_huPr_PdPgb_epi-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "2020Prostate_huPr_PdPgb_epi-curated.h5ad")
 
 rad = remix(ad, title="Normal and BPH Human Prostate Cell Atlas (Epithelial Cells)")
 print_summary(rad)
-rad.write("2020Prostate_huPr_PdPgb_epi-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "2020Prostate_huPr_PdPgb_epi-remixed.h5ad")
@@ -28,6 +28,7 @@ import numpy as np
 import scanpy as sc
 
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -183,28 +184,28 @@ def print_summary(adata):
 ad = sc.read_h5ad("huPr_Pd_all.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("huPr_Pd_all-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "huPr_Pd_all-curated.h5ad")
 
 rad = remix(ad, title="Normal Human Prostate Cell Atlas (All Cells)")
 print_summary(rad)
-rad.write("huPr_Pd_all-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "huPr_Pd_all-remixed.h5ad")
 
 # Process epithelial
 ad = sc.read_h5ad("huPr_Pd_epi.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("huPr_Pd_epi-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "huPr_Pd_epi-curated.h5ad")
 
 rad = remix(ad, title="Normal Human Prostate Cell Atlas (Epithelial Cells)")
 print_summary(rad)
-rad.write("huPr_Pd_epi-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "huPr_Pd_epi-remixed.h5ad")
 
 # Process fibromuscular stromal cells
 ad = sc.read_h5ad("huPr_Pd_fmst.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("huPr_Pd_fmst-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "huPr_Pd_fmst-curated.h5ad")
 
 rad = remix(ad, title="Normal Human Prostate Cell Atlas (Fibromuscular Stromal Cells)")
 print_summary(rad)
-rad.write("huPr_Pd_fmst-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "huPr_Pd_fmst-remixed.h5ad")
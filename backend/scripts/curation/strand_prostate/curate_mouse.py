@@ -20,6 +20,7 @@ import numpy as np
 import scanpy as sc
 
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -154,8 +155,8 @@ def print_summary(adata):
 ad = sc.read_h5ad("2020Prostate_muPrUr_epi.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("2020Prostate_muPrUr_epi-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "2020Prostate_muPrUr_epi-curated.h5ad")
 
 rad = remix(ad, title="Mouse Prostate and Urethral Cell Atlas (Epithelial Cells)")
 print_summary(rad)
-rad.write("2020Prostate_muPrUr_epi-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "2020Prostate_muPrUr_epi-remixed.h5ad")
@@ -0,0 +1,57 @@
+"""Helpers for merging the genes of an expression matrix that share a symbol."""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def gene_group_matrix(symbols, dtype=np.float32):
+    """Build the one-hot matrix that maps each gene to the group of genes sharing its symbol.
+
+    Returns:
+      (G, merged_symbols) where G is a sparse genes x groups matrix with a single 1 per row,
+      and merged_symbols is the sorted index of the distinct symbols, one per group
+    """
+    codes, merged_symbols = pd.factorize(pd.Index(symbols), sort=True)
+    gene_count = len(codes)
+    group_matrix = sparse.csr_matrix(
+        (np.ones(gene_count, dtype=dtype), (np.arange(gene_count), codes)),
+        shape=(gene_count, len(merged_symbols)),
+    )
+    return group_matrix, merged_symbols
+
+
+def merge_genes(X, symbols, var=None, var_name="hgnc_gene_symbol"):
+    """Sum the columns of a cells x genes matrix that share a symbol.
+
+    The sum is a single product with the one-hot gene group matrix, so sparse matrices are never
+    densified. A CSR or CSC matrix stays in its format and a dense matrix stays dense. The genes
+    are sorted by symbol, as pandas does when summing the columns of a DataFrame by level.
+
+    Args:
+      X: the cells x genes matrix
+      symbols: the symbol of each gene, for example from hgnc.get_upgraded_var_index
+      var: optional gene metadata. Each merged gene keeps the metadata of the first gene of its group
+      var_name: the name of the column of the merged var that holds the symbol
+
+    Returns:
+      (merged_X, merged_var)
+    """
+    if X.shape[1] != len(symbols):
+        raise ValueError(f"The matrix has {X.shape[1]} genes but {len(symbols)} symbols were given.")
+
+    dtype = X.dtype if np.issubdtype(X.dtype, np.number) else np.float32
+    group_matrix, merged_symbols = gene_group_matrix(symbols, dtype=dtype)
+    merged_X = X @ group_matrix
+    if sparse.issparse(X):
+        merged_X = merged_X.asformat(X.format)
+
+    if var is None:
+        merged_var = pd.DataFrame(index=merged_symbols)
+    else:
+        # The first gene of each group, in the order of the groups
+        first_genes = np.unique(pd.Index(merged_symbols).get_indexer(pd.Index(symbols)), return_index=True)[1]
+        merged_var = var.iloc[first_genes].drop(columns=var_name, errors="ignore").set_index(merged_symbols)
+        merged_var.index.name = None
+    merged_var.insert(0, var_name, merged_symbols.to_numpy())
+    return merged_X, merged_var
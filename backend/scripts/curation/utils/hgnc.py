@@ -2,21 +2,58 @@
 
 import argparse
 import enum
+import functools
+import gzip
+import hashlib
+import json
 import logging
 import os
 import re
 import numpy as np
 import pandas as pd
 
+HGNC_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "hgnc_complete_set.txt.gz")
+HGNC_INDEX_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "hgnc_index.json.gz")
+
+# Bump this when the contents of the index change so that existing indexes are rebuilt.
+HGNC_INDEX_FORMAT_VERSION = 1
+
+C_ORF_PATTERN = re.compile(r"^(C)(\d+)(orf)(\d+)$", re.IGNORECASE)
+
 
 def get_upgraded_var_index(var):
     """Given an anndata var dataframe, return a new index for the dataframe
     where human gene symbols have been upgraded to the current HGNC set.
     """
-    hgnc_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "hgnc_complete_set.txt.gz")
+    return load_hgnc_symbol_checker().upgrade_index(var.index)
+
+
+@functools.lru_cache(maxsize=None)
+def load_hgnc_symbol_checker(hgnc_path=HGNC_PATH, index_path=HGNC_INDEX_PATH):
+    """Load the HGNCSymbolChecker of an HGNC download from its prebuilt index. The index is
+    rebuilt from the download when it is missing or was built from a different download.
+    """
+    hgnc_checksum = file_checksum(hgnc_path)
+    try:
+        return HGNCSymbolChecker.from_index(index_path, hgnc_checksum)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Rebuilding the HGNC index {index_path}: {e}")
+
     hgnc_symbol_checker = HGNCSymbolChecker.from_hgnc_records(hgnc_path)
+    try:
+        hgnc_symbol_checker.write_index(index_path, hgnc_checksum)
+    except OSError as e:
+        logging.warning(f"Could not write the HGNC index {index_path}: {e}")
+    return hgnc_symbol_checker
 
-    return pd.Index([hgnc_symbol_checker.upgrade_symbol(s) for s in var.index])
+
+def file_checksum(path):
+    """Return the sha256 of a file."""
+    checksum = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2 ** 20), b""):
+            checksum.update(block)
+    return checksum.hexdigest()
 
 
 class SymbolStatus(enum.Enum):
@@ -78,6 +115,48 @@ class HGNCSymbolChecker:
 
         return self.symbol_map.get(fix_symbol_case(symbol), symbol)
 
+    def upgrade_index(self, index):
+        """Return a new index where each symbol is replaced by its approved symbol.
+
+        Each distinct symbol is only upgraded once, so the cost depends on the number of
+        distinct symbols rather than the length of the index.
+        """
+        codes, uniques = pd.factorize(pd.Index(index))
+        uniques = pd.Series(uniques, dtype=object)
+        upgraded = fix_symbol_cases(uniques).map(self.symbol_map).fillna(uniques)
+        return pd.Index(upgraded.to_numpy(dtype=object).take(codes), name=index.name)
+
+    def write_index(self, index_path, hgnc_checksum):
+        """Write the symbol sets and the symbol map to a gzipped json index."""
+        index = {
+            "format_version": HGNC_INDEX_FORMAT_VERSION,
+            "hgnc_checksum": hgnc_checksum,
+            "approved_symbols": sorted(self.approved_symbols),
+            "withdrawn_symbols": sorted(self.withdrawn_symbols),
+            "ambiguous_symbols": sorted(self.ambiguous_symbols),
+            "symbol_map": dict(sorted(self.symbol_map.items())),
+        }
+        with gzip.open(index_path, "wt") as f:
+            json.dump(index, f, separators=(",", ":"))
+
+    @classmethod
+    def from_index(cls, index_path, hgnc_checksum=None):
+        """Load a HGNCSymbolChecker from an index written by write_index. Raises a ValueError if
+        the index has another format version or was built from another HGNC download.
+        """
+        with gzip.open(index_path, "rt") as f:
+            index = json.load(f)
+        if index.get("format_version") != HGNC_INDEX_FORMAT_VERSION:
+            raise ValueError(f"the index has format version {index.get('format_version')}")
+        if hgnc_checksum and index.get("hgnc_checksum") != hgnc_checksum:
+            raise ValueError("the index was built from another HGNC download")
+        return cls(
+            set(index["approved_symbols"]),
+            set(index["withdrawn_symbols"]),
+            set(index["ambiguous_symbols"]),
+            index["symbol_map"],
+        )
+
     @classmethod
     def from_hgnc_records(cls, hgnc_dataset_path):
         """Parse a hgnc database download into a HGNCSymbolChecker object."""
@@ -156,13 +235,18 @@ def fix_symbol_case(symbol):
     is allowed, which are the genes like C2orf157.
     """
 
-    match = re.match(r"^(C)(\d+)(orf)(\d+)$", symbol, re.IGNORECASE)
+    match = C_ORF_PATTERN.match(symbol)
 
     if match:
         return f"C{match.group(2)}orf{match.group(4)}"
     return symbol.upper()
 
 
+def fix_symbol_cases(symbols):
+    """fix_symbol_case for each symbol of a pandas Series of strings."""
+    return symbols.str.upper().str.replace(r"^C(\d+)ORF(\d+)$", r"C\1orf\2", regex=True)
+
+
 def main():
     """When called as main, parse a given hgnc download and print out a map from old to new
     symbol.
@@ -171,11 +255,15 @@ def main():
     parser.add_argument(
         "hgnc_dataset", help="HGNC dataset tsv, available from www.genenames.org/download/statistics-and-files/"
     )
+    parser.add_argument("--write-index", help="Write the index of the HGNC dataset to this path instead of printing")
     args = parser.parse_args()
 
     hgnc_symbol_checker = HGNCSymbolChecker.from_hgnc_records(args.hgnc_dataset)
 
-    hgnc_symbol_checker.print_symbol_map()
+    if args.write_index:
+        hgnc_symbol_checker.write_index(args.write_index, file_checksum(args.hgnc_dataset))
+    else:
+        hgnc_symbol_checker.print_symbol_map()
 
 
 if __name__ == "__main__":
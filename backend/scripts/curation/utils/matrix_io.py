@@ -0,0 +1,141 @@
+"""Helpers for reading expression matrices from text files without dense intermediates, and for
+writing h5ad files with a compression profile."""
+
+import os
+
+import anndata
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def read_text_matrix(path, sep="\t", genes_by_cells=True, dtype=np.float32, block_size=1000):
+    """Read a delimited expression matrix, gzipped or not, into an AnnData with a CSR X.
+
+    The file is parsed block_size rows at a time and each block is made sparse before the
+    next one is read, so only one block is ever dense in memory.
+
+    Args:
+      path: the matrix file. The first row holds the column names and the first column the
+        row names
+      sep: the delimiter, "\\t" for tsv or "," for csv
+      genes_by_cells: whether the rows of the file are genes and its columns cells, the
+        layout that was previously read with pd.read_csv(...).T
+      dtype: the dtype of X
+      block_size: the number of rows parsed at once
+
+    Returns:
+      AnnData of cells x genes, indexed by the cell and gene names of the file
+    """
+    row_names, blocks = [], []
+    column_names = None
+    for block in pd.read_csv(path, sep=sep, header=0, index_col=0, chunksize=block_size):
+        column_names = block.columns if column_names is None else column_names
+        row_names.append(block.index)
+        blocks.append(sparse.csr_matrix(block.to_numpy(dtype=dtype)))
+
+    row_names = row_names[0].append(row_names[1:]) if row_names else pd.Index([])
+    matrix = sparse.vstack(blocks, format="csr", dtype=dtype) if blocks else sparse.csr_matrix((0, 0), dtype=dtype)
+    if genes_by_cells:
+        matrix, cell_names, gene_names = matrix.T.tocsr(), column_names, row_names
+    else:
+        cell_names, gene_names = row_names, column_names
+
+    return anndata.AnnData(
+        X=matrix,
+        obs=pd.DataFrame(index=pd.Index(cell_names, dtype=str)),
+        var=pd.DataFrame(index=pd.Index(gene_names, dtype=str)),
+    )
+
+
+def concat_cells(adatas, keys):
+    """Stack the cells of several matrices, joining them on their genes.
+
+    The genes are the union of the genes of all the matrices, in order of first appearance, as
+    with pd.concat. pd.concat filled the genes a matrix does not have with NaN. Nothing is stored
+    for them here, so they are zeros in X, and which genes were measured for each cell is kept
+    next to X instead: the obs column "source_matrix" holds the key of the matrix of each cell,
+    and the boolean var column "measured_in_<key>" marks the genes of that matrix. Use
+    unmeasured_mask to tell an unmeasured gene from a zero.
+
+    Args:
+      adatas: the matrices
+      keys: the name of each matrix
+
+    Returns:
+      AnnData with a CSR X, the "source_matrix" obs column and a "measured_in_<key>" var column
+      per matrix
+    """
+    if len(keys) != len(adatas):
+        raise ValueError(f"{len(adatas)} matrices were given but {len(keys)} keys.")
+
+    gene_names = adatas[0].var_names
+    for adata in adatas[1:]:
+        gene_names = gene_names.append(adata.var_names.difference(gene_names, sort=False))
+
+    blocks = []
+    var = pd.DataFrame(index=gene_names)
+    for key, adata in zip(keys, adatas):
+        X = sparse.csr_matrix(adata.X).tocoo()
+        columns = gene_names.get_indexer(adata.var_names)
+        blocks.append(sparse.csr_matrix((X.data, (X.row, columns[X.col])), shape=(adata.n_obs, len(gene_names))))
+        var[f"measured_in_{key}"] = gene_names.isin(adata.var_names)
+
+    obs = pd.DataFrame(index=adatas[0].obs_names.append([adata.obs_names for adata in adatas[1:]]))
+    obs["source_matrix"] = pd.Categorical(np.repeat(keys, [adata.n_obs for adata in adatas]), categories=keys)
+    return anndata.AnnData(X=sparse.vstack(blocks, format="csr"), obs=obs, var=var)
+
+
+def unmeasured_mask(obs, var):
+    """The cells x genes mask of the genes that were not measured for a cell, the NaNs of
+    pd.concat, from the obs and var of concat_cells.
+
+    Returns:
+      dense boolean array
+    """
+    mask = np.zeros((len(obs), len(var)), dtype=bool)
+    for key in obs["source_matrix"].cat.categories:
+        cells = (obs["source_matrix"] == key).to_numpy()
+        mask[np.ix_(cells, ~var[f"measured_in_{key}"].to_numpy())] = True
+    return mask
+
+
+def reindex_cells(adata, cell_ids):
+    """Select and order the cells of a matrix by their ids, like DataFrame.reindex on the cells.
+    Raises a KeyError for ids that are not in the matrix instead of adding empty cells.
+
+    Returns:
+      AnnData with a copy of the selected cells
+    """
+    positions = adata.obs_names.get_indexer(pd.Index(cell_ids))
+    if (positions < 0).any():
+        missing = pd.Index(cell_ids)[positions < 0]
+        raise KeyError(f"{len(missing)} cells are not in the matrix, for example {list(missing[:5])}")
+    return adata[positions].copy()
+
+
+# The compression of the h5ad files written by the curation scripts.
+#   gzip: the h5py default gzip level, what the scripts have always written
+#   archive: the smallest files, for files that are rarely read
+#   fast_read: lzf, which decompresses several times faster than gzip for a slightly larger file.
+#     lzf is only bundled with h5py, so the files can not be read by other HDF5 readers such as R
+#   uncompressed: contiguous datasets, so any range of rows is read with a single read
+WRITE_PROFILES = {
+    "gzip": dict(compression="gzip"),
+    "archive": dict(compression="gzip", compression_opts=9),
+    "fast_read": dict(compression="lzf"),
+    "uncompressed": dict(compression=None),
+}
+DEFAULT_WRITE_PROFILE = "gzip"
+
+
+def write_h5ad(adata, filename, profile=None):
+    """Write an AnnData to an h5ad file with the compression of a profile of WRITE_PROFILES.
+
+    The profile defaults to the CURATION_H5AD_PROFILE environment variable, then to
+    DEFAULT_WRITE_PROFILE.
+    """
+    profile = profile or os.getenv("CURATION_H5AD_PROFILE", DEFAULT_WRITE_PROFILE)
+    if profile not in WRITE_PROFILES:
+        raise ValueError(f"Unknown h5ad write profile {profile}. Use one of {list(WRITE_PROFILES)}.")
+    adata.write_h5ad(filename, **WRITE_PROFILES[profile])
@@ -1,9 +1,24 @@
-"""Methods for working with ontologies and the OLS."""
+"""Methods for working with ontologies and the OLS.
+
+Lookups are memoized in memory and in an sqlite cache on disk that is shared by all the curation scripts, so a curie or
+a label is only sent to the OLS once. The cache is at ~/.cache/corpora/ols.sqlite unless CURATION_OLS_CACHE says
+otherwise.
+
+In offline mode no request is sent to the OLS, and curies that are not cached are looked up in local term files instead.
+A term file has one curie and its label per line, separated by a tab. Offline mode is turned on with use_local_terms or
+by listing term files in CURATION_ONTOLOGY_TERMS, separated by os.pathsep.
+"""
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote_plus
 
 import requests
 
 OLS_API_ROOT = "http://www.ebi.ac.uk/ols/api"
+MAX_CONCURRENT_REQUESTS = 8
 
 # Curie means something like CL:0000001
 
@@ -34,15 +49,83 @@ class OntologyLookupError(Exception):
     """Exception for some problem with looking up ontology information."""
 
 
-def get_ontology_label(curie):
-    """For a given curie like 'CL:1000413', get the label like 'endothelial cell of artery'"""
-
-    # If the curie is empty, just return an empty string. This happens when there is no
-    # valid ontology value.
-    if not curie:
-        return ""
+class _LookupCache:
+    """The labels of curies and the candidate terms of labels, in memory and on disk."""
+
+    def __init__(self, path):
+        self.path = path
+        self.labels = {}
+        self.candidates = {}
+        self.offline = False
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute("CREATE TABLE IF NOT EXISTS labels (curie TEXT PRIMARY KEY, label TEXT)")
+                self._connection.execute("CREATE TABLE IF NOT EXISTS candidates (query TEXT PRIMARY KEY, terms TEXT)")
+        return self._connection
+
+    def get_labels(self, curies):
+        """Return the labels of the curies that are cached, loading them from disk into memory."""
+        missing = [curie for curie in curies if curie not in self.labels]
+        # sqlite limits the number of parameters of a query
+        for start in range(0, len(missing), 500):
+            batch = missing[start : start + 500]
+            with self._lock:
+                placeholders = ",".join("?" * len(batch))
+                rows = self.connection.execute(
+                    f"SELECT curie, label FROM labels WHERE curie IN ({placeholders})", batch
+                ).fetchall()
+            self.labels.update(rows)
+        return {curie: self.labels[curie] for curie in curies if curie in self.labels}
+
+    def set_labels(self, labels, persist=True):
+        self.labels.update(labels)
+        if persist and labels:
+            with self._lock, self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?)", labels.items())
+
+    def get_candidates(self, query):
+        if query not in self.candidates:
+            with self._lock:
+                row = self.connection.execute("SELECT terms FROM candidates WHERE query = ?", (query,)).fetchone()
+            if row is None:
+                return None
+            self.candidates[query] = [tuple(term) for term in json.loads(row[0])]
+        return self.candidates[query]
+
+    def set_candidates(self, query, terms):
+        self.candidates[query] = terms
+        with self._lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO candidates VALUES (?, ?)", (query, json.dumps(terms)))
+
+
+_cache = _LookupCache(
+    os.getenv("CURATION_OLS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "corpora", "ols.sqlite"))
+)
+
+
+def use_local_terms(term_files):
+    """Resolve labels from the given term files and stop sending requests to the OLS."""
+    for term_file in term_files:
+        with open(term_file) as terms:
+            lines = (line.rstrip("\n").split("\t", 1) for line in terms)
+            _cache.set_labels({fields[0]: fields[1] for fields in lines if len(fields) == 2}, persist=False)
+    _cache.offline = True
+
+
+if os.getenv("CURATION_ONTOLOGY_TERMS"):
+    use_local_terms(os.getenv("CURATION_ONTOLOGY_TERMS").split(os.pathsep))
+
+
+def _fetch_ontology_label(session, curie):
     url = f"{OLS_API_ROOT}/ontologies/{_ontology_name(curie)}/terms/{_double_encode(_iri(curie))}"
-    response = requests.get(url)
+    response = session.get(url)
 
     if not response.ok:
         raise OntologyLookupError(
@@ -51,6 +134,47 @@ def get_ontology_label(curie):
     return response.json()["label"]
 
 
+def get_ontology_labels(curies):
+    """For each of the given curies, get its label. The curies that are not cached are looked up
+    concurrently. If some lookups fail, the labels that were found are still cached, and an
+    OntologyLookupError reports all the failures.
+
+    Returns:
+      dict of the label of each curie
+    """
+    curies = list(dict.fromkeys(curie for curie in curies if curie))
+    labels = _cache.get_labels(curies)
+    missing = [curie for curie in curies if curie not in labels]
+    if missing and _cache.offline:
+        raise OntologyLookupError(f"Curies {missing} are not in the local term files or the lookup cache.")
+    errors = []
+    if missing:
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            futures = {executor.submit(_fetch_ontology_label, session, curie): curie for curie in missing}
+            # Each label is cached as soon as it is fetched, so that a failed lookup does not lose the others.
+            for future in as_completed(futures):
+                try:
+                    label = future.result()
+                except Exception as ex:
+                    errors.append(f"{futures[future]}: {ex}")
+                    continue
+                _cache.set_labels({futures[future]: label})
+                labels[futures[future]] = label
+    if errors:
+        raise OntologyLookupError(f"{len(errors)} of {len(missing)} curie lookups failed. " + " ".join(sorted(errors)))
+    return labels
+
+
+def get_ontology_label(curie):
+    """For a given curie like 'CL:1000413', get the label like 'endothelial cell of artery'"""
+
+    # If the curie is empty, just return an empty string. This happens when there is no
+    # valid ontology value.
+    if not curie:
+        return ""
+    return get_ontology_labels([curie])[curie]
+
+
 def lookup_candidate_term(label, ontology="cl", method="select"):
     """Lookup candidate terms for a label. This is useful when there is an existing label in a
     submitted dataset, and you want to find an appropriate ontology term.
@@ -65,6 +189,12 @@ def lookup_candidate_term(label, ontology="cl", method="select"):
     """
     # using OLS REST API [https://www.ebi.ac.uk/ols/docs/api]
     url = f"{OLS_API_ROOT}/{method}?q={quote_plus(label)}&ontology={ontology.lower()}"
+    candidates = _cache.get_candidates(url)
+    if candidates is not None:
+        return candidates
+    if _cache.offline:
+        raise OntologyLookupError(f"Label {label} is not in the lookup cache.")
+
     response = requests.get(url)
 
     if not response.ok:
@@ -72,4 +202,6 @@ def lookup_candidate_term(label, ontology="cl", method="select"):
             f"Label {label} lookup failed, got status code {response.status_code}: {response.text}"
         )
 
-    return [(r["obo_id"], r["label"]) for r in response.json()["response"]["docs"]]
+    candidates = [(r["obo_id"], r["label"]) for r in response.json()["response"]["docs"]]
+    _cache.set_candidates(url, candidates)
+    return candidates
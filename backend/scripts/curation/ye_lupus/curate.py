@@ -62,6 +62,7 @@ import numpy as np
 import scanpy as sc
 
 import utils.hgnc
+import utils.matrix_io
 import utils.ontology
 
 
@@ -201,8 +202,8 @@ def print_summary(adata):
 ad = sc.read_h5ad("YeLab_corpora_test.h5ad")
 basic_curation(ad)
 print_summary(ad)
-ad.write("YeLab_corpora_test-curated.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(ad, "YeLab_corpora_test-curated.h5ad")
 
 rad = remix(ad, title="Ye Lab Lupus Test")
 print_summary(rad)
-rad.write("YeLab_corpora_test-remixed.h5ad", compression="gzip")
+utils.matrix_io.write_h5ad(rad, "YeLab_corpora_test-remixed.h5ad")
@@ -1,32 +1,141 @@
 from argparse import ArgumentParser
-import boto3
+from concurrent.futures import ProcessPoolExecutor
+import gzip
 import logging
-from owlready2 import get_ontology
+import os
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import boto3
+
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # noqa
+sys.path.insert(0, pkg_root)  # noqa
+
+from corpora.common.ontology_closure import OntologyClosure  # noqa
+
+RDF_NAMESPACE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS_NAMESPACE = "http://www.w3.org/2000/01/rdf-schema#"
+OWL_NAMESPACE = "http://www.w3.org/2002/07/owl#"
+
+OWL_CLASS_TAG = f"{{{OWL_NAMESPACE}}}Class"
+OWL_RESTRICTION_TAG = f"{{{OWL_NAMESPACE}}}Restriction"
+OWL_ON_PROPERTY_TAG = f"{{{OWL_NAMESPACE}}}onProperty"
+OWL_SOME_VALUES_FROM_TAG = f"{{{OWL_NAMESPACE}}}someValuesFrom"
+RDFS_LABEL_TAG = f"{{{RDFS_NAMESPACE}}}label"
+RDFS_SUB_CLASS_OF_TAG = f"{{{RDFS_NAMESPACE}}}subClassOf"
+RDF_ABOUT_ATTRIBUTE = f"{{{RDF_NAMESPACE}}}about"
+RDF_RESOURCE_ATTRIBUTE = f"{{{RDF_NAMESPACE}}}resource"
+
+PART_OF_IRI = "http://purl.obolibrary.org/obo/BFO_0000050"
+
+
+def iri_to_curie(iri):
+    """
+    Converts a class IRI to its curie, http://purl.obolibrary.org/obo/CL_0000001 --> CL:0000001.
+    """
+
+    return iri.rsplit("/", 1)[-1].rsplit("#", 1)[-1].replace("_", ":")
+
+
+def open_owl_file(input_file):
+    return gzip.open(input_file, "rb") if input_file.endswith(".gz") else open(input_file, "rb")
+
+
+def get_parents(class_element):
+    """
+    Returns the curies of the is_a parents of an ontology class and of the classes it is a part_of.
+    """
+
+    parents = []
+    for sub_class_of in class_element.iterfind(RDFS_SUB_CLASS_OF_TAG):
+        if RDF_RESOURCE_ATTRIBUTE in sub_class_of.attrib:
+            parents.append(iri_to_curie(sub_class_of.attrib[RDF_RESOURCE_ATTRIBUTE]))
+            continue
+
+        restriction = sub_class_of.find(OWL_RESTRICTION_TAG)
+        if restriction is None:
+            continue
+        on_property = restriction.find(OWL_ON_PROPERTY_TAG)
+        some_values_from = restriction.find(OWL_SOME_VALUES_FROM_TAG)
+        if (
+            on_property is not None
+            and on_property.get(RDF_RESOURCE_ATTRIBUTE) == PART_OF_IRI
+            and some_values_from is not None
+            and RDF_RESOURCE_ATTRIBUTE in some_values_from.attrib
+        ):
+            parents.append(iri_to_curie(some_values_from.attrib[RDF_RESOURCE_ATTRIBUTE]))
+    return parents
 
 
 def extract_ontology_terms_from_file(input_file):
     """
-    Returns the list of ontology classes in an OWL file.
+    Returns the label of each named ontology class in an RDF/XML OWL file, by curie, and the curies of its is_a and
+    part_of parents, by curie.
+
+    The file is parsed as a stream and each top level element is discarded once it has been read, so memory use does
+    not grow with the size of the ontology. Only the classes declared at the top level have an IRI; the classes nested
+    in axioms are anonymous.
     """
 
     logging.info(f"Reading in input OWL file {input_file}")
-    ontology_file_object = open(input_file, "rb")
-    ontology_object = get_ontology("")
-    ontology_object.load(fileobj=ontology_file_object)
+    ontology_terms = {}
+    ontology_parents = {}
+    depth = 0
+    root = None
+    with open_owl_file(input_file) as ontology_file_object:
+        for event, element in ElementTree.iterparse(ontology_file_object, events=("start", "end")):
+            if event == "start":
+                root = element if root is None else root
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+            if element.tag == OWL_CLASS_TAG and RDF_ABOUT_ATTRIBUTE in element.attrib:
+                label = element.findtext(RDFS_LABEL_TAG, default="")
+                curie = iri_to_curie(element.attrib[RDF_ABOUT_ATTRIBUTE])
+                ontology_terms[curie] = " ".join(label.split())
+                ontology_parents[curie] = get_parents(element)
+            # Drop the elements read so far
+            root.clear()
+
+    logging.info(f"Completed reading OWL file {input_file} and found {len(ontology_terms)} ontology classes.")
+
+    return ontology_terms, ontology_parents
+
+
+def format_ontology_terms(ontology_terms):
+    """
+    Formats the ontology classes as one line per class, sorted by curie, with the curie and the label of the class
+    separated by a tab.
+    """
 
-    ontology_classes = [ontology_class.name.replace("_", ":") for ontology_class in list(ontology_object.classes())]
-    logging.info(f"Completed loading OWL file and found {len(ontology_classes)} ontology classes.")
+    return "\n".join(f"{curie}\t{label}" for curie, label in sorted(ontology_terms.items()))
 
-    return ontology_classes
+
+def get_ontology_list_filename(input_file):
+    """
+    Derives the name of the ontology classes file from the name of the input file, cl.owl.gz --> cl.txt.
+    """
+
+    filename = input_file[: -len(".gz")] if input_file.endswith(".gz") else input_file
+    return os.path.splitext(filename)[0] + ".txt"
 
 
-def generate_ontology_list_file(ontologies_list, filename, aws_bucket=None):
+def get_ontology_closure_filename(input_file):
     """
-    Generates a file containing all the ontology classes separated by a line break. If an AWS bucket is specified,
-    uploaded the file to AWS S3.
+    Derives the name of the ontology closure file from the name of the input file, cl.owl.gz --> cl.closure.gz.
     """
 
-    file_contents = "\n".join(ontologies_list)
+    return get_ontology_list_filename(input_file)[: -len(".txt")] + ".closure.gz"
+
+
+def generate_ontology_list_file(file_contents, filename, aws_bucket=None):
+    """
+    Generates a file containing all the ontology classes separated by a line break, or any other file contents given
+    as text or bytes. If an AWS bucket is specified, uploaded the file to AWS S3.
+    """
 
     if aws_bucket:
         logging.info(f"Writing ontology classes to S3 bucket {aws_bucket}.")
@@ -43,21 +152,39 @@ def generate_ontology_list_file(ontologies_list, filename, aws_bucket=None):
         # Create a file locally
         logging.info(f"Writing ontology classes locally to {filename}.")
 
-        output_file_object = open(filename, "w")
+        output_file_object = open(filename, "wb" if isinstance(file_contents, bytes) else "w")
         output_file_object.write(file_contents)
         output_file_object.close()
 
         logging.info("Completed writing ontology classes to local file.")
 
 
+def extract_ontology_list_file(input_file, aws_bucket=None, closure=True):
+    """
+    Extracts the ontology classes of an OWL file and writes them next to it, or to the AWS bucket if one is specified.
+    Unless closure is False, the ancestors of each class are written to an ontology closure file too.
+    """
+
+    ontology_terms, ontology_parents = extract_ontology_terms_from_file(input_file)
+    file_contents = format_ontology_terms(ontology_terms)
+    generate_ontology_list_file(file_contents, get_ontology_list_filename(input_file), aws_bucket)
+    if closure:
+        ontology_closure = OntologyClosure.from_parents(ontology_parents)
+        generate_ontology_list_file(ontology_closure.to_bytes(), get_ontology_closure_filename(input_file), aws_bucket)
+    return len(ontology_terms)
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     parser = ArgumentParser()
     parser.add_argument(
         "-i",
         "--input_file",
         nargs="+",
         required=True,
-        help="An OWL file that contains an ontology from which the classes will be extracted.",
+        help="OWL files that contain the ontologies from which the classes will be extracted. The files may be "
+        "gzipped.",
     )
     parser.add_argument(
         "--upload_to_aws",
@@ -71,14 +198,25 @@ if __name__ == "__main__":
         nargs="+",
         help="The AWS bucket to which the ontology classes file that was generated should be uploaded.",
     )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        default=os.cpu_count(),
+        help="The number of OWL files that are parsed at the same time.",
+    )
+    parser.add_argument(
+        "--skip_closure",
+        action="store_true",
+        help="If true, only the list of ontology classes is generated, without the ontology closure file of the "
+        "is_a and part_of ancestors of each class.",
+    )
 
     arguments = parser.parse_args()
 
-    if arguments.input_file:
-        input_file = arguments.input_file[0]
-
-        # Verify that the input file is an OWL file
-        if not input_file.endswith(".owl"):
+    # Verify that the input files are OWL files
+    for input_file in arguments.input_file:
+        if not input_file.endswith((".owl", ".owl.gz")):
             raise Exception(f"ERROR: Expecting an OWL file! Cannot parse {input_file}!")
 
     if arguments.upload_to_aws:
@@ -95,13 +233,16 @@ if __name__ == "__main__":
             "like to upload to AWS."
         )
 
-    if arguments.aws_bucket:
-        aws_bucket = arguments.aws_bucket[0]
-
-    list_of_ontologies = extract_ontology_terms_from_file(input_file)
-    list_of_ontologies_filename = input_file.split(".")[0] + ".txt"
-
-    if arguments.upload_to_aws:
-        generate_ontology_list_file(list_of_ontologies, list_of_ontologies_filename, aws_bucket)
-    else:
-        generate_ontology_list_file(list_of_ontologies, list_of_ontologies_filename)
+    aws_bucket = arguments.aws_bucket[0] if arguments.upload_to_aws else None
+
+    with ProcessPoolExecutor(max_workers=min(arguments.processes, len(arguments.input_file))) as executor:
+        for input_file, class_count in zip(
+            arguments.input_file,
+            executor.map(
+                extract_ontology_list_file,
+                arguments.input_file,
+                [aws_bucket] * len(arguments.input_file),
+                [not arguments.skip_closure] * len(arguments.input_file),
+            ),
+        ):
+            logging.info(f"Extracted {class_count} ontology classes from {input_file}.")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Simulate a burst of processing jobs on a Batch compute environment, once with every job using the largest job size and
+once with the jobs sized from the size of their file, and compare the cost and throughput of both.
+
+Jobs are started in order as soon as the compute environment has enough free vcpus and memory for them. The run time of
+a job is modeled as a fixed overhead plus a time proportional to the size of the file.
+"""
+import heapq
+import json
+import os
+import random
+import sys
+
+import click
+
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # noqa
+sys.path.insert(0, pkg_root)  # noqa
+
+from backend.corpora.common.corpora_config import CorporaConfig
+from backend.corpora.common.job_sizing import get_job_resources
+from backend.corpora.common.utils.math_utils import GB, MB
+
+
+def simulate(file_sizes, job_sizes, max_vcpus, max_memory, minutes_overhead, minutes_per_gb):
+    """
+    :return: The makespan, the wait time of each job and the reserved memory and vcpu hours, all in hours.
+    """
+    free_vcpus, free_memory = max_vcpus, max_memory
+    running = []  # heap of (end time, vcpus, memory)
+    now = 0.0
+    waits = []
+    memory_hours = vcpu_hours = 0.0
+    for file_size in file_sizes:
+        resources = get_job_resources(file_size, job_sizes)
+        if resources["vcpus"] > max_vcpus or resources["memory"] > max_memory:
+            raise click.ClickException(f"A job of {resources} does not fit in the compute environment.")
+        while resources["vcpus"] > free_vcpus or resources["memory"] > free_memory:
+            now, vcpus, memory = heapq.heappop(running)
+            free_vcpus += vcpus
+            free_memory += memory
+        duration = (minutes_overhead + minutes_per_gb * file_size / GB) / 60
+        heapq.heappush(running, (now + duration, resources["vcpus"], resources["memory"]))
+        free_vcpus -= resources["vcpus"]
+        free_memory -= resources["memory"]
+        waits.append(now)
+        memory_hours += duration * resources["memory"] / 1024
+        vcpu_hours += duration * resources["vcpus"]
+    makespan = max(end for end, _, _ in running) if running else 0.0
+    return makespan, waits, memory_hours, vcpu_hours
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+@click.command()
+@click.option("--file-sizes", type=click.File(), help="A file with one file size in bytes per line.")
+@click.option("--jobs", default=500, help="The number of jobs to generate when --file-sizes is not given.")
+@click.option("--median-size-mb", default=300, help="The median size of the generated files.")
+@click.option("--seed", default=0, help="The random seed used to generate the files.")
+@click.option("--job-sizes", type=click.File(), help="A json sizing table. Defaults to upload_job_sizes.")
+@click.option("--max-vcpus", default=256, help="The vcpus of the compute environment.")
+@click.option("--max-memory-gb", default=1024, help="The memory of the compute environment.")
+@click.option("--minutes-overhead", default=5.0, help="The run time of a job that does not depend on the file size.")
+@click.option("--minutes-per-gb", default=20.0, help="The run time of a job per GB of file.")
+@click.option("--price-per-gb-hour", default=0.004445, help="The price of one GB of memory per hour.")
+@click.option("--price-per-vcpu-hour", default=0.04048, help="The price of one vcpu per hour.")
+def main(
+    file_sizes,
+    jobs,
+    median_size_mb,
+    seed,
+    job_sizes,
+    max_vcpus,
+    max_memory_gb,
+    minutes_overhead,
+    minutes_per_gb,
+    price_per_gb_hour,
+    price_per_vcpu_hour,
+):
+    if file_sizes:
+        sizes = [int(line) for line in file_sizes if line.strip()]
+    else:
+        rng = random.Random(seed)
+        sizes = [min(int(rng.lognormvariate(0, 1.5) * median_size_mb * MB), 30 * GB) for _ in range(jobs)]
+
+    if job_sizes:
+        sizing_table = json.load(job_sizes)
+    else:
+        sizing_table = CorporaConfig(deployment="test").get_defaults_template()["upload_job_sizes"]
+
+    scenarios = {"fixed": sizing_table[-1:], "sized": sizing_table}
+    click.echo(f"{len(sizes)} jobs, {sum(sizes) / GB:.1f} GB in total")
+    click.echo(
+        f"{'':>6} {'makespan (h)':>13} {'mean wait (h)':>14} {'p95 wait (h)':>13} {'GB hours':>10} {'cost ($)':>9}"
+    )
+    for name, table in scenarios.items():
+        makespan, waits, memory_hours, vcpu_hours = simulate(
+            sizes, table, max_vcpus, max_memory_gb * 1024, minutes_overhead, minutes_per_gb
+        )
+        cost = memory_hours * price_per_gb_hour + vcpu_hours * price_per_vcpu_hour
+        click.echo(
+            f"{name:>6} {makespan:>13.2f} {sum(waits) / len(waits):>14.2f} {percentile(waits, 0.95):>13.2f} "
+            f"{memory_hours:>10.1f} {cost:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
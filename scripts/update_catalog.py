@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+"""
+Regenerate the snapshot of the public catalog from the database. The snapshot is otherwise only written when public
+data changes, so this creates it for a new deployment, or after the database was loaded from a dump.
+"""
+import logging
+import os
+import sys
+
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # noqa
+sys.path.insert(0, pkg_root)  # noqa
+
+from backend.corpora.common import catalog
+from backend.corpora.common.utils.db_utils import db_session_manager
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with db_session_manager():
+        catalog.update_catalog()
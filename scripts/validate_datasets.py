@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Validate many datasets in parallel and write the validation report of each dataset to a JSONL file.
+
+The ontologies are loaded once before the worker processes are forked, so the workers share them copy-on-write instead
+of each reading them from S3. Each line of the output is the report of one dataset. A dataset that could not be
+validated at all is written with an "error" instead of checks. Running again with --resume skips the datasets already
+in the output, so an interrupted sweep of the whole corpus can be continued. With --retry-errors, the errors of the
+datasets validated again are replaced by their new reports.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import click
+import s3fs
+
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # noqa
+sys.path.insert(0, pkg_root)  # noqa
+
+from backend.corpora.common import ontology_cache
+from backend.corpora.common.dataset_validator import DatasetValidator
+
+_validate_options = {}  # The options of validate_dataset, set in the parent before the workers are forked.
+
+
+def validate_dataset(s3_uri):
+    start_time = time.time()
+    try:
+        report = DatasetValidator(s3_uri).validate_dataset_file(**_validate_options).to_dict()
+    except Exception:
+        report = dict(s3_uri=s3_uri, is_valid=False, error=traceback.format_exc())
+    report["total_time"] = time.time() - start_time
+    return report
+
+
+def read_s3_uris(s3_uris, manifest):
+    uris = list(s3_uris)
+    if manifest:
+        uris.extend(line.strip() for line in manifest if line.strip() and not line.startswith("#"))
+    # Keep the first occurrence of each uri, in order.
+    return list(dict.fromkeys(uris))
+
+
+def read_completed(output_path, uris, retry_errors):
+    """
+    :return: The uris of the datasets already in the output. A partially written last line, left by an interrupted run,
+    is removed from the output, and so are the errors of the uris to retry, so that the output keeps one report per
+    dataset once they are validated again.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, "rb") as output:
+        content = output.read()
+    end = content.rfind(b"\n") + 1
+    retried = set(uris) if retry_errors else set()
+    completed = set()
+    kept_lines = []
+    for line in content[:end].splitlines(keepends=True):
+        report = json.loads(line)
+        if "error" in report and report["s3_uri"] in retried:
+            continue
+        completed.add(report["s3_uri"])
+        kept_lines.append(line)
+    kept_content = b"".join(kept_lines)
+    if kept_content != content:
+        # Write a copy and rename it over the output, so that an interrupted rewrite does not lose reports.
+        with open(f"{output_path}.tmp", "wb") as output:
+            output.write(kept_content)
+        os.replace(f"{output_path}.tmp", output_path)
+    return completed
+
+
+@click.command()
+@click.argument("s3_uris", nargs=-1)
+@click.option("--manifest", type=click.File(), help="A file with one S3 uri per line.")
+@click.option("--output", required=True, type=click.Path(dir_okay=False), help="The JSONL file the reports go to.")
+@click.option("--resume", is_flag=True, help="Skip the datasets already in the output instead of overwriting it.")
+@click.option("--retry-errors", is_flag=True, help="With --resume, validate again the datasets that failed to run.")
+@click.option("--processes", default=os.cpu_count(), help="The number of datasets validated at once.")
+@click.option(
+    "--max-tasks-per-child",
+    default=1,
+    help="The number of datasets a worker validates before it is replaced, returning the memory of large datasets.",
+)
+@click.option("--backed", is_flag=True, help="Read only the metadata of H5AD files instead of the whole file.")
+@click.option("--loom-x-layer-name", help="The name of the loom layer to use as X.")
+@click.option("--verbose", is_flag=True, help="Log every issue found as it is found.")
+def main(
+    s3_uris, manifest, output, resume, retry_errors, processes, max_tasks_per_child, backed, loom_x_layer_name, verbose
+):
+    logging.basicConfig(level=logging.INFO if verbose else logging.ERROR)
+    uris = read_s3_uris(s3_uris, manifest)
+    if not uris:
+        raise click.UsageError("No datasets to validate. Pass S3 uris or --manifest.")
+
+    completed = read_completed(output, uris, retry_errors) if resume else set()
+    pending = [uri for uri in uris if uri not in completed]
+    click.echo(f"{len(pending)} datasets to validate, {len(uris) - len(pending)} already in {output}.")
+    if not pending:
+        return
+
+    # Load the ontologies before forking so every worker inherits them.
+    ontology_cache.get_ontologies(
+        s3fs.S3FileSystem(anon=False, client_kwargs={"endpoint_url": os.getenv("BOTO_ENDPOINT_URL")})
+    )
+    _validate_options.update(loom_x_layer_name=loom_x_layer_name, backed=backed)
+
+    counts = dict(valid=0, invalid=0, error=0)
+    context = multiprocessing.get_context("fork")
+    with context.Pool(processes, maxtasksperchild=max_tasks_per_child) as pool, open(
+        output, "a" if resume else "w"
+    ) as output_file:
+        for report in pool.imap_unordered(validate_dataset, pending):
+            output_file.write(json.dumps(report) + "\n")
+            output_file.flush()
+            status = "error" if "error" in report else "valid" if report["is_valid"] else "invalid"
+            counts[status] += 1
+            click.echo(f"[{sum(counts.values())}/{len(pending)}] {status} {report['s3_uri']}")
+
+    click.echo(", ".join(f"{count} {status}" for status, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
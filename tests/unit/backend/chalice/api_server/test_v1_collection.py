@@ -305,6 +305,29 @@ class TestCollection(BaseAuthAPITest, GenerateDataMixin):
         self.assertEqual(403, response.status_code)
         self.assertIn("X-AWS-REQUEST-ID", response.headers.keys())
 
+    def test__get_catalog__ok(self):
+        public_id = self.generate_collection(visibility=CollectionVisibility.PUBLIC.name).id
+        private_id = self.generate_collection(visibility=CollectionVisibility.PRIVATE.name).id
+
+        response = self.app.get("/dp/v1/catalog", headers=dict(host="localhost"))
+        response.raise_for_status()
+        collection_ids = [collection["id"] for collection in json.loads(response.body)["collections"]]
+        self.assertIn(public_id, collection_ids)
+        self.assertNotIn(private_id, collection_ids)
+
+    def test__get_catalog__redirect(self):
+        from corpora.common.corpora_config import CorporaConfig
+
+        # Use the CorporaConfig used by the chalice app
+        catalog_url = "https://catalog.example.com/public.json.gz"
+        CorporaConfig().set({"catalog_bucket": "catalog-bucket", "catalog_url": catalog_url})
+        self.addCleanup(CorporaConfig.reset)
+
+        response = self.app.get("/dp/v1/catalog", headers=dict(host="localhost"))
+        self.assertEqual(302, response.status_code)
+        self.assertEqual(catalog_url, response.headers["Location"])
+        self.assertIn("max-age", response.headers["Cache-Control"])
+
     def test__post_collection_returns_uuid_on_success(self):
         test_url = furl(path="/dp/v1/collections/")
         data = json.dumps(
@@ -2,7 +2,8 @@ import json
 from mock import patch
 from furl import furl
 
-from backend.corpora.common.corpora_orm import UploadStatus
+from backend.corpora.common.corpora_orm import DbUploadQueueEntry, UploadStatus
+from backend.corpora.common.utils.db_utils import DbUtils
 from backend.corpora.common.utils.math_utils import GB
 from tests.unit.backend.chalice.api_server.base_api_test import BaseAuthAPITest
 from tests.unit.backend.fixtures.generate_data_mixin import GenerateDataMixin
@@ -15,6 +16,13 @@ class TestCollectionUploadLink(BaseAuthAPITest, GenerateDataMixin):
         self.good_link = "https://www.dropbox.com/s/ow84zm4h0wkl409/test.h5ad?dl=0"
         self.dummy_link = "https://www.dropbox.com/s/12345678901234/test.h5ad?dl=0"
 
+    def tearDown(self):
+        # Free the processing slots taken by the uploads so they do not count against the limits of other tests.
+        db = DbUtils()
+        db.session.query(DbUploadQueueEntry).delete()
+        db.commit()
+        db.close()
+
     @patch("corpora.common.upload_sfn.start_upload_sfn")
     def test__link__202(self, mocked):
         with EnvironmentSetup({"CORPORA_CONFIG": fixture_file_path("bogo_config.js")}):
@@ -28,6 +36,25 @@ class TestCollectionUploadLink(BaseAuthAPITest, GenerateDataMixin):
             actual_body = json.loads(response.body)
             self.assertIn("dataset_uuid", actual_body.keys())
 
+    @patch("corpora.common.upload_sfn.start_upload_sfn")
+    @patch("corpora.common.utils.dropbox.get_file_info")
+    def test__link_deferred_validation__202(self, mock_get_file_info, mock_start_upload_sfn):
+        from corpora.common.corpora_config import CorporaConfig
+
+        # Use the CorporaConfig used by the chalice app
+        CorporaConfig().set({"upload_validation_mode": "deferred"})
+        self.addCleanup(CorporaConfig.reset)
+
+        path = "/dp/v1/collections/test_collection_id/upload-links"
+        headers = {"host": "localhost", "Content-Type": "application/json", "Cookie": get_auth_token(self.app)}
+        body = {"url": self.dummy_link}
+
+        test_url = furl(path=path)
+        response = self.app.post(test_url.url, headers=headers, data=json.dumps(body))
+        self.assertEqual(202, response.status_code)
+        self.assertIn("dataset_uuid", json.loads(response.body).keys())
+        mock_get_file_info.assert_not_called()
+
     def test__link_no_auth__401(self):
         path = "/dp/v1/collections/test_collection_id/upload-links"
         headers = {"host": "localhost", "Content-Type": "application/json"}
@@ -104,6 +131,53 @@ class TestCollectionUploadLink(BaseAuthAPITest, GenerateDataMixin):
         response = self.app.post(test_url.url, headers=headers, data=json.dumps(body))
         self.assertEqual(403, response.status_code)
 
+    @patch("corpora.common.upload_sfn.start_upload_sfn")
+    def test__bulk_link__202(self, mock_start_upload_sfn):
+        def get_file_info(url):
+            if "too_large" in url:
+                return {"size": 31 * GB, "name": "file.h5ad"}
+            return {"size": 1, "name": "file.h5ad"}
+
+        path = "/dp/v1/collections/test_collection_id/bulk-upload-links"
+        headers = {"host": "localhost", "Content-Type": "application/json", "Cookie": get_auth_token(self.app)}
+        links = [
+            "https://www.dropbox.com/s/12345678901234/test_1.h5ad?dl=0",
+            "https://test_url.com",
+            "https://www.dropbox.com/s/12345678901234/too_large.h5ad?dl=0",
+            "https://www.dropbox.com/s/12345678901234/test_2.h5ad?dl=0",
+        ]
+        body = {"links": [{"url": link} for link in links]}
+
+        with patch("corpora.common.utils.dropbox.get_file_info", side_effect=get_file_info):
+            test_url = furl(path=path)
+            response = self.app.post(test_url.url, headers=headers, data=json.dumps(body))
+        self.assertEqual(202, response.status_code)
+        actual_links = json.loads(response.body)["links"]
+        self.assertEqual(links, [link["url"] for link in actual_links])
+
+        with self.subTest("Accepted"):
+            for link in (actual_links[0], actual_links[3]):
+                self.assertIn("dataset_uuid", link)
+                self.assertNotIn("error", link)
+            self.assertEqual(2, mock_start_upload_sfn.call_count)
+
+        with self.subTest("Invalid link"):
+            self.assertNotIn("dataset_uuid", actual_links[1])
+            self.assertEqual({"status": 400, "detail": "The dropbox shared link is invalid."}, actual_links[1]["error"])
+
+        with self.subTest("Too large"):
+            self.assertNotIn("dataset_uuid", actual_links[2])
+            self.assertEqual(413, actual_links[2]["error"]["status"])
+
+    def test__bulk_link_not_owner__403(self):
+        path = "/dp/v1/collections/test_collection_id_not_owner/bulk-upload-links"
+        headers = {"host": "localhost", "Content-Type": "application/json", "Cookie": get_auth_token(self.app)}
+        body = {"links": [{"url": self.dummy_link}]}
+
+        test_url = furl(path=path)
+        response = self.app.post(test_url.url, headers=headers, data=json.dumps(body))
+        self.assertEqual(403, response.status_code)
+
     def test__cancel_dataset_download__ok(self):
         # Test pre upload
         processing_status = {"upload_status": UploadStatus.WAITING, "upload_progress": 0.0}
@@ -124,6 +198,22 @@ class TestCollectionUploadLink(BaseAuthAPITest, GenerateDataMixin):
         self.assertEqual(response.status_code, 202)
         self.assertEqual(json.loads(response.body)["upload_status"], "CANCEL_PENDING")
 
+    def test__cancel_dataset_download__queued(self):
+        processing_status = {"upload_status": UploadStatus.WAITING, "upload_progress": 0.0}
+        dataset = self.generate_dataset(processing_status=processing_status)
+        db = DbUtils()
+        db.session.add(
+            DbUploadQueueEntry(dataset_id=dataset.id, collection_id=dataset.collection_id, owner="test", url="url")
+        )
+        db.commit()
+
+        test_url = f"/dp/v1/datasets/{dataset.id}"
+        headers = {"host": "localhost", "Content-Type": "application/json", "Cookie": get_auth_token(self.app)}
+        response = self.app.delete(test_url, headers=headers)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(json.loads(response.body)["upload_status"], "CANCELED")
+        self.assertEqual([], db.query([DbUploadQueueEntry]))
+
     def test__cancel_dataset_download__dataset_does_not_exist(self):
         test_url = "/dp/v1/datasets/missing_dataset_id"
         headers = {"host": "localhost", "Content-Type": "application/json", "Cookie": get_auth_token(self.app)}
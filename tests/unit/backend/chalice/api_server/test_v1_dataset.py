@@ -97,3 +97,44 @@ class TestDataset(BaseAuthAPITest, GenerateDataMixin, CorporaTestCaseUsingMockAW
             processing_status_updater(processing_status_id, processing_status)
             response = self.app.get(test_url.url, headers=headers)
             self.assertEqual(json.loads(response.body)["upload_status"], status.name)
+
+    def test__get_facet_counts__ok(self):
+        tissue = {"ontology_term_id": "UBERON:test_api_facet_counts", "label": "test tissue"}
+        self.generate_dataset(tissue=[tissue])
+        self.generate_dataset(tissue=[tissue], collection_visibility="PRIVATE")
+        test_url = furl(path="/dp/v1/datasets/facets")
+        response = self.app.get(test_url.url, headers=dict(host="localhost"))
+        response.raise_for_status()
+        facets = json.loads(response.body)["facets"]
+        self.assertEqual(
+            {"organism", "tissue", "assay", "disease", "sex", "ethnicity", "development_stage"}, set(facets)
+        )
+        self.assertIn(dict(tissue, count=1), facets["tissue"])
+
+    def test__search_datasets__ok(self):
+        tissue = {"ontology_term_id": "UBERON:test_api_search", "label": "test tissue"}
+        datasets = [self.generate_dataset(tissue=[tissue], sex=[sex]) for sex in ["male", "female", "male"]]
+        self.generate_dataset(tissue=[tissue], collection_visibility="PRIVATE")
+        expected_ids = sorted(dataset.id for dataset in datasets if dataset.sex == ["male"])
+        headers = dict(host="localhost")
+
+        test_url = furl(
+            path="/dp/v1/datasets",
+            query_params=dict(tissue=tissue["ontology_term_id"], sex="male", fields="name", limit=1),
+        )
+        response = self.app.get(test_url.url, headers=headers)
+        response.raise_for_status()
+        body = json.loads(response.body)
+        self.assertEqual(
+            {"datasets": [{"id": expected_ids[0], "name": "create_dataset"}], "next_after": expected_ids[0]}, body
+        )
+
+        test_url.args["after"] = body["next_after"]
+        response = self.app.get(test_url.url, headers=headers)
+        response.raise_for_status()
+        self.assertEqual({"datasets": [{"id": expected_ids[1], "name": "create_dataset"}]}, json.loads(response.body))
+
+    def test__search_datasets__unknown_field(self):
+        test_url = furl(path="/dp/v1/datasets", query_params=dict(fields="owner"))
+        response = self.app.get(test_url.url, headers=dict(host="localhost"))
+        self.assertEqual(400, response.status_code)
@@ -189,3 +189,28 @@ class TestCollection(DataPortalTestCase):
         test_collection = Collection.create(**BogusCollectionParams.get())
         response = test_collection.reshape_for_api()
         self.assertEqual([], response["datasets"])
+
+    def test__publish(self):
+        collection = Collection.create(**BogusCollectionParams.get(name="publish", links=[{}, {}]))
+        collection_id = collection.id
+        link_ids = sorted(link.id for link in collection.links)
+        dataset_ids = sorted(
+            Dataset.create(
+                **BogusDatasetParams.get(collection_id=collection_id, collection_visibility=collection.visibility)
+            ).id
+            for _ in range(3)
+        )
+
+        collection.publish()
+        self.addCleanup(Collection.get((collection_id, CollectionVisibility.PUBLIC)).delete)
+
+        self.assertEqual(collection_id, collection.id)
+        self.assertEqual(CollectionVisibility.PUBLIC, collection.visibility)
+        self.assertEqual("publish", collection.name)
+        self.assertIsNone(Collection.get_collection(collection_id, CollectionVisibility.PRIVATE.name))
+        self.db.session.expire_all()
+        public_collection = Collection.get_collection(collection_id, CollectionVisibility.PUBLIC.name)
+        self.assertEqual(link_ids, sorted(link.id for link in public_collection.links))
+        self.assertEqual(dataset_ids, sorted(dataset.id for dataset in public_collection.datasets))
+        for dataset_id in dataset_ids:
+            self.assertEqual(CollectionVisibility.PUBLIC, Dataset.get(dataset_id).collection_visibility)
@@ -2,6 +2,7 @@ import typing
 
 from backend.corpora.common.corpora_orm import (
     DbDatasetArtifact,
+    DbDatasetFacet,
     DbDatasetProcessingStatus,
     DbDeploymentDirectory,
     DatasetArtifactType,
@@ -85,6 +86,26 @@ class TestDataset(DataPortalTestCase):
                 self.assertCountEqual(expected_artifacts, actual_artifacts)
                 self.assertCountEqual(expected_deployment_directories, actual_deployment_directories)
 
+    def test__create_many__ok(self):
+        processing_status = BogusProcessingStatusParams.get()
+        dataset_params = [
+            BogusDatasetParams.get(name=f"dataset_{i}", processing_status=processing_status) for i in range(3)
+        ]
+
+        datasets = Dataset.create_many(dataset_params)
+        expected_dataset_ids = [dataset.id for dataset in datasets]
+
+        # Expire all local objects and retrieve them from the DB to make sure the transaction went through.
+        Dataset.db.session.expire_all()
+
+        for i, dataset_id in enumerate(expected_dataset_ids):
+            with self.subTest(i):
+                actual_dataset = Dataset.get(dataset_id)
+                self.assertEqual(f"dataset_{i}", actual_dataset.name)
+                self.assertEqual(dataset_id, actual_dataset.processing_status.dataset_id)
+                self.assertEqual(processing_status["upload_status"], actual_dataset.processing_status.upload_status)
+                actual_dataset.delete()
+
     def test__update__ok(self):
         artifact_params = dict(
             filename="filename_1",
@@ -125,6 +146,104 @@ class TestDataset(DataPortalTestCase):
         self.assertEqual(actual_dataset.sex, ["other"])
         self.assertEqual(actual_dataset.processing_status.upload_progress, 7 / 9)
 
+    def test__facets__ok(self):
+        def get_facet_rows(dataset_id):
+            rows = Dataset.db.session.query(DbDatasetFacet).filter(DbDatasetFacet.dataset_id == dataset_id)
+            return sorted((row.facet, row.ontology_term_id, row.label) for row in rows)
+
+        dataset = Dataset.create(
+            **BogusDatasetParams.get(
+                tissue=[{"ontology_term_id": "UBERON:0002048", "label": "lung"}],
+                disease=[{"ontology_term_id": "MONDO:0100096"}],
+                sex=["male", "female"],
+                assay=None,
+                ethnicity=None,
+                development_stage=None,
+            )
+        )
+
+        with self.subTest("The facets are created with the dataset"):
+            expected_rows = [
+                ("disease", "MONDO:0100096", ""),
+                ("organism", "123", "organism"),
+                ("sex", "", "female"),
+                ("sex", "", "male"),
+                ("tissue", "UBERON:0002048", "lung"),
+            ]
+            self.assertEqual(expected_rows, get_facet_rows(dataset.id))
+
+        with self.subTest("The updated facets are replaced"):
+            dataset.update(tissue=[{"ontology_term_id": "UBERON:0002113", "label": "kidney"}], sex=None)
+            expected_rows = [
+                ("disease", "MONDO:0100096", ""),
+                ("organism", "123", "organism"),
+                ("tissue", "UBERON:0002113", "kidney"),
+            ]
+            self.assertEqual(expected_rows, get_facet_rows(dataset.id))
+
+        with self.subTest("The facets are deleted with the dataset"):
+            dataset_id = dataset.id
+            dataset.delete()
+            self.assertEqual([], get_facet_rows(dataset_id))
+
+    def test__get_facet_counts__ok(self):
+        tissue = {"ontology_term_id": "UBERON:test_facet_counts", "label": "test tissue"}
+        public_datasets = Dataset.create_many([BogusDatasetParams.get(tissue=[tissue]) for _ in range(2)])
+        private_dataset = Dataset.create(
+            **BogusDatasetParams.get(tissue=[tissue], collection_visibility=CollectionVisibility.PRIVATE.name)
+        )
+        for dataset in public_datasets + [private_dataset]:
+            self.addCleanup(dataset.delete)
+
+        public_counts = Dataset.get_facet_counts(CollectionVisibility.PUBLIC)
+        self.assertIn(dict(tissue, count=2), public_counts["tissue"])
+        private_counts = Dataset.get_facet_counts(CollectionVisibility.PRIVATE)
+        self.assertIn(dict(tissue, count=1), private_counts["tissue"])
+
+    def test__search__ok(self):
+        lung = {"ontology_term_id": "UBERON:test_search_lung", "label": "lung"}
+        kidney = {"ontology_term_id": "UBERON:test_search_kidney", "label": "kidney"}
+        datasets = Dataset.create_many(
+            [
+                BogusDatasetParams.get(tissue=[lung], sex=["male"]),
+                BogusDatasetParams.get(tissue=[lung, kidney], sex=["female"]),
+                BogusDatasetParams.get(tissue=[kidney], sex=["male"]),
+                BogusDatasetParams.get(tissue=[lung], collection_visibility=CollectionVisibility.PRIVATE.name),
+            ]
+        )
+        for dataset in datasets:
+            self.addCleanup(dataset.delete)
+        public_ids = sorted(dataset.id for dataset in datasets[:3])
+
+        def search_ids(facet_filters, **kwargs):
+            results, next_after = Dataset.search(facet_filters, **kwargs)
+            return [result["id"] for result in results], next_after
+
+        with self.subTest("Any value of a facet matches"):
+            self.assertEqual(
+                (public_ids, None),
+                search_ids({"tissue": [lung["ontology_term_id"], kidney["ontology_term_id"]]}),
+            )
+
+        with self.subTest("Every facet must match"):
+            expected_ids = sorted([datasets[0].id, datasets[2].id])
+            self.assertEqual(
+                (expected_ids, None),
+                search_ids({"tissue": [lung["ontology_term_id"], kidney["ontology_term_id"]], "sex": ["male"]}),
+            )
+            self.assertEqual(
+                ([datasets[1].id], None), search_ids({"tissue": [lung["ontology_term_id"]], "sex": ["female"]})
+            )
+
+        with self.subTest("Pages"):
+            facet_filters = {"tissue": [lung["ontology_term_id"], kidney["ontology_term_id"]]}
+            self.assertEqual((public_ids[:2], public_ids[1]), search_ids(facet_filters, limit=2))
+            self.assertEqual((public_ids[2:], None), search_ids(facet_filters, limit=2, after=public_ids[1]))
+
+        with self.subTest("Projection"):
+            results, _ = Dataset.search({"tissue": [kidney["ontology_term_id"]], "sex": ["male"]}, fields=["tissue"])
+            self.assertEqual([{"id": datasets[2].id, "tissue": [kidney]}], results)
+
     def test__list__ok(self):
         generate = 2
         generated_ids = [Dataset.create(**BogusDatasetParams.get()).id for _ in range(generate)]
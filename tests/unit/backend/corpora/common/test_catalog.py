@@ -0,0 +1,71 @@
+import gzip
+import json
+
+from backend.corpora.common import catalog
+from backend.corpora.common.corpora_orm import CollectionVisibility
+from tests.unit.backend.fixtures import config
+from tests.unit.backend.fixtures.generate_data_mixin import GenerateDataMixin
+from tests.unit.backend.fixtures.mock_aws_test_case import CorporaTestCaseUsingMockAWS
+
+
+class TestCatalog(CorporaTestCaseUsingMockAWS, GenerateDataMixin):
+    def setUp(self):
+        super().setUp()
+        self.corpora_config.set(dict(config.CORPORA_TEST_CONFIG, catalog_bucket=self.corpora_config.bucket_name))
+        self.catalog_key = self.corpora_config.catalog_key
+
+    def tearDown(self):
+        self.corpora_config.set(config.CORPORA_TEST_CONFIG)
+        super().tearDown()
+
+    def test__build_catalog(self):
+        public_collection = self.generate_collection(visibility=CollectionVisibility.PUBLIC.name)
+        self.generate_dataset(collection_id=public_collection.id, collection_visibility=public_collection.visibility)
+        private_collection = self.generate_collection(visibility=CollectionVisibility.PRIVATE.name)
+
+        collections = {collection["id"]: collection for collection in catalog.build_catalog()["collections"]}
+        self.assertIn(public_collection.id, collections)
+        self.assertNotIn(private_collection.id, collections)
+        for collection in collections.values():
+            self.assertEqual("PUBLIC", collection["visibility"])
+        self.assertEqual(1, len(collections[public_collection.id]["datasets"]))
+        self.assertNotIn("processing_status", collections[public_collection.id]["datasets"][0])
+
+    def test__update_catalog(self):
+        etag = catalog.update_catalog()
+
+        snapshot = self.s3_resource.Object(self.corpora_config.bucket_name, self.catalog_key).get()
+        self.assertEqual(etag, snapshot["ETag"])
+        self.assertEqual("gzip", snapshot["ContentEncoding"])
+        self.assertEqual(f"public, max-age={self.corpora_config.catalog_max_age}", snapshot["CacheControl"])
+        self.assertIn("collections", json.loads(gzip.decompress(snapshot["Body"].read())))
+
+        with self.subTest("The ETag only changes with the catalog"):
+            self.assertEqual(etag, catalog.update_catalog())
+            self.generate_collection(visibility=CollectionVisibility.PUBLIC.name)
+            self.assertNotEqual(etag, catalog.update_catalog())
+
+    def test__update_catalog__not_configured(self):
+        self.corpora_config.set(config.CORPORA_TEST_CONFIG)
+        self.assertIsNone(catalog.update_catalog())
+        catalog.try_update_catalog()
+
+    def test__get_catalog_url(self):
+        catalog.update_catalog()
+        url = catalog.get_catalog_url()
+        self.assertIn(self.catalog_key, url)
+        self.assertIn("Expires=", url)
+
+    def test__get_catalog_url__catalog_url(self):
+        self.corpora_config.set(
+            dict(
+                config.CORPORA_TEST_CONFIG,
+                catalog_bucket=self.corpora_config.bucket_name,
+                catalog_url="https://catalog.example.com/public.json.gz",
+            )
+        )
+        self.assertEqual("https://catalog.example.com/public.json.gz", catalog.get_catalog_url())
+
+    def test__get_catalog_url__not_configured(self):
+        self.corpora_config.set(config.CORPORA_TEST_CONFIG)
+        self.assertIsNone(catalog.get_catalog_url())
@@ -1,12 +1,17 @@
+import json
+import os
 import random
 import string
+import tempfile
 from unittest.mock import patch
 
 import anndata
+import h5py
 import numpy
-from pandas import DataFrame
+from pandas import Categorical, DataFrame, Series
 from scipy.sparse.csr import csr_matrix
 
+from backend.corpora.common import ontology_cache
 from backend.corpora.common.dataset_validator import DatasetValidator
 from backend.corpora.common.utils.corpora_constants import CorporaConstants
 from tests.unit.backend.fixtures.mock_aws_test_case import CorporaTestCaseUsingMockAWS
@@ -17,6 +22,13 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
         super().setUp()
 
         self._create_fake_ontologies_in_s3_bucket()
+        # Each test creates its own ontologies, so they must not be reused from a previous test.
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        environment = patch.dict(os.environ, {"CORPORA_ONTOLOGY_CACHE_DIR": cache_dir.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+        ontology_cache.clear()
 
     def test__validate_dataset_file__unknown_file(self):
         # Setup mocks
@@ -49,14 +61,9 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
         assert not mock_log_warning.called
 
     @patch("logging.warning")
-    @patch("anndata.read_loom")
-    def test__validate_loom_dataset__contains_all_metadata(self, mock_read_anndata, mock_log_warning):
+    def test__validate_loom_dataset__contains_all_metadata(self, mock_log_warning):
         test_anndata = self._create_fully_populated_anndata_object()
-
-        mock_read_anndata.return_value = test_anndata
-
-        dataset_filename = "fully_populated_loom.loom"
-        s3_uri = self._create_dataset_object_in_s3_bucket(dataset_filename)
+        s3_uri = self._create_loom_object_in_s3_bucket("fully_populated_loom.loom", test_anndata)
 
         # Run validator
         validator = DatasetValidator(s3_uri)
@@ -66,14 +73,12 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
         assert not mock_log_warning.called
 
     @patch("logging.warning")
-    @patch("anndata.read_loom")
-    def test__validate_loom_dataset__specific_x_layer(self, mock_read_anndata, mock_log_warning):
+    def test__validate_loom_dataset__specific_x_layer(self, mock_log_warning):
         test_anndata = self._create_fully_populated_anndata_object()
-
-        mock_read_anndata.return_value = test_anndata
-
-        dataset_filename = "fully_populated_loom.loom"
-        s3_uri = self._create_dataset_object_in_s3_bucket(dataset_filename)
+        test_anndata.uns[CorporaConstants.LAYER_DESCRIPTIONS]["matrix"] = "main matrix"
+        s3_uri = self._create_loom_object_in_s3_bucket(
+            "fully_populated_loom.loom", test_anndata, layers={"main_x": test_anndata.X}
+        )
 
         # Run validator
         validator = DatasetValidator(s3_uri)
@@ -82,6 +87,21 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
         # Validate result
         assert not mock_log_warning.called
 
+    def test__validate_loom_dataset__missing_metadata_and_empty_x_data(self):
+        test_anndata = self._create_fully_populated_anndata_object()
+        test_anndata.X = numpy.zeros(test_anndata.X.shape)
+        del test_anndata.obs["tissue"]
+        s3_uri = self._create_loom_object_in_s3_bucket("fully_populated_loom.loom", test_anndata)
+
+        # Run validator
+        validator = DatasetValidator(s3_uri)
+
+        # Validate result
+        with self.assertLogs(level="WARN") as logger:
+            validator.validate_dataset_file()
+            self.assertIn("No data in the X layer can be found", logger.output[0])
+            self.assertIn("Missing metadata field tissue from obs", logger.output[1])
+
     @patch("anndata.read_h5ad")
     def test__validate_h5ad_dataset__test_case_sensitivity_outputs_error(self, mock_read_anndata):
         test_anndata = self._create_fully_populated_anndata_object()
@@ -372,7 +392,7 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
         # Validate result
         with self.assertLogs(level="WARN") as logger:
             validator.validate_dataset_file()
-            self.assertIn("is not of expected type", logger.output[0])
+            self.assertIn("are not of expected type", logger.output[0])
 
     @patch("anndata.read_h5ad")
     def test__validate_h5ad_dataset__unaccepted_ontology_value(self, mock_read_anndata):
@@ -397,6 +417,56 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
                 logger.output[0],
             )
 
+    @patch("anndata.read_h5ad")
+    def test__validate_h5ad_dataset__returns_report(self, mock_read_anndata):
+        test_anndata = self._create_fully_populated_anndata_object()
+        test_anndata.obs["tissue_ontology"] = ["unknown" for _ in range(len(test_anndata.obs.get("tissue_ontology")))]
+
+        mock_read_anndata.return_value = test_anndata
+
+        dataset_filename = "report.h5ad"
+        s3_uri = self._create_dataset_object_in_s3_bucket(dataset_filename)
+
+        # Run validator
+        validator = DatasetValidator(s3_uri)
+        with self.assertLogs(level="WARN"):
+            report = validator.validate_dataset_file()
+
+        # Validate result
+        self.assertFalse(report.is_valid)
+        self.assertEqual(s3_uri, json.loads(report.to_json())["s3_uri"])
+        check_names = [check["name"] for check in report.checks]
+        self.assertIn("read", check_names)
+        self.assertIn("layers.X", check_names)
+        self.assertIn("obs.tissue_ontology", check_names)
+        [issue] = report.issues
+        self.assertEqual("tissue_ontology", issue["field"])
+        self.assertEqual(["unknown"], issue["values"])
+
+    @patch("anndata.read_h5ad")
+    def test__validate_h5ad_dataset__unaccepted_categorical_ontology_value(self, mock_read_anndata):
+        test_anndata = self._create_fully_populated_anndata_object()
+        # Only the categories in use are validated, so the unused "unknown" category should not cause an error while
+        # the used "not_a_term" category should.
+        tissue_ontology = list(test_anndata.obs["tissue_ontology"])
+        tissue_ontology[0] = "not_a_term"
+        test_anndata.obs["tissue_ontology"] = Categorical(
+            tissue_ontology, categories=sorted(set(tissue_ontology)) + ["unknown"]
+        )
+
+        mock_read_anndata.return_value = test_anndata
+
+        dataset_filename = "metadata_values.h5ad"
+        s3_uri = self._create_dataset_object_in_s3_bucket(dataset_filename)
+
+        # Run validator
+        validator = DatasetValidator(s3_uri)
+
+        # Validate result
+        with self.assertLogs(level="WARN") as logger:
+            validator.validate_dataset_file()
+            self.assertIn("['not_a_term'] were not recognized as a valid value", logger.output[0])
+
     @patch("anndata.read_h5ad")
     def test__validate_h5ad_dataset__unaccepted_enum_value(self, mock_read_anndata):
         test_anndata = self._create_fully_populated_anndata_object()
@@ -416,6 +486,65 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
             validator.validate_dataset_file()
             self.assertIn("not part of the accepted enum values", logger.output[0])
 
+    def test__verify_metadata_type__many_unaccepted_values(self):
+        s3_uri = self._create_dataset_object_in_s3_bucket("metadata_values.h5ad")
+        validator = DatasetValidator(s3_uri)
+        metadata_fields = {
+            metadata_field.field_name: metadata_field
+            for metadata_field in CorporaConstants.REQUIRED_OBSERVATION_METADATA_FIELDS
+            + CorporaConstants.REQUIRED_OBSERVATION_ONTOLOGY_METADATA_FIELDS
+        }
+
+        # Only the first values, in sorted order, are included in the messages.
+        for metadata_field in (metadata_fields["sex"], metadata_fields["tissue_ontology"]):
+            with self.subTest(metadata_field.field_name), self.assertLogs(level="WARN") as logger:
+                validator.verify_metadata_type(metadata_field, Series([f"unknown_{index:02}" for index in range(20)]))
+                self.assertIn("'unknown_09']", logger.output[0])
+                self.assertNotIn("unknown_10", logger.output[0])
+                self.assertEqual(20, validator.report.issues[-1]["count"])
+
+    def test__verify_metadata_type__unhashable_values(self):
+        s3_uri = self._create_dataset_object_in_s3_bucket("metadata_values.h5ad")
+        validator = DatasetValidator(s3_uri)
+        metadata_fields = {
+            metadata_field.field_name: metadata_field
+            for metadata_field in CorporaConstants.REQUIRED_OBSERVATION_METADATA_FIELDS
+            + CorporaConstants.REQUIRED_OBSERVATION_ONTOLOGY_METADATA_FIELDS
+        }
+
+        # Lists can not be looked up in the accepted values, so they are reported rather than failing the validation.
+        with self.assertLogs(level="WARN") as logger:
+            validator.verify_metadata_type(metadata_fields["sex"], Series(["male", ["female"]], dtype=object))
+            validator.verify_metadata_type(metadata_fields["tissue_ontology"], ["UBERON:0000001"])
+        self.assertIn("[['female']] of type {<class 'list'>} are not valid values", logger.output[0])
+        self.assertIn("are not valid values for metadata field tissue_ontology", logger.output[1])
+        self.assertEqual(2, len(validator.report.issues))
+
+    @patch("logging.warning")
+    @patch("anndata.read_h5ad")
+    def test__validate_h5ad_dataset__categorical_metadata_values(self, mock_read_anndata, mock_log_warning):
+        test_anndata = self._create_fully_populated_anndata_object()
+        # Only the categories that are in use are validated, so unused categories of the wrong type or outside of the
+        # enum should not cause an error.
+        test_anndata.obs["tissue"] = Categorical(
+            test_anndata.obs["tissue"], categories=[1, 2] + list(test_anndata.obs["tissue"])
+        )
+        test_anndata.obs["sex"] = Categorical(
+            test_anndata.obs["sex"], categories=["asdfglkjh"] + list(test_anndata.obs["sex"])
+        )
+
+        mock_read_anndata.return_value = test_anndata
+
+        dataset_filename = "metadata_values.h5ad"
+        s3_uri = self._create_dataset_object_in_s3_bucket(dataset_filename)
+
+        # Run validator
+        validator = DatasetValidator(s3_uri)
+        validator.validate_dataset_file()
+
+        # Validate result
+        assert not mock_log_warning.called
+
     @patch("anndata.read_h5ad")
     def test__validate_h5ad_dataset__unaccepted_uns_metadata_type(self, mock_read_anndata):
         test_anndata = self._create_fully_populated_anndata_object()
@@ -433,7 +562,7 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
         # Validate result
         with self.assertLogs(level="WARN") as logger:
             validator.validate_dataset_file()
-            self.assertIn("is not of expected type", logger.output[0])
+            self.assertIn("are not of expected type", logger.output[0])
 
     @patch("anndata.read_h5ad")
     def test__validate_h5ad_dataset__unaccepted_uns_ontology(self, mock_read_anndata):
@@ -458,6 +587,64 @@ class TestDatasetValidator(CorporaTestCaseUsingMockAWS):
                 logger.output[0],
             )
 
+    @patch("logging.warning")
+    @patch("anndata.read_h5ad")
+    def test__validate_backed_h5ad_dataset__contains_all_metadata(self, mock_read_anndata, mock_log_warning):
+        test_anndata = self._create_fully_populated_anndata_object()
+        test_anndata.X = csr_matrix(test_anndata.X)
+        s3_uri = self._create_h5ad_object_in_s3_bucket("backed.h5ad", test_anndata)
+
+        # Run validator
+        validator = DatasetValidator(s3_uri)
+        validator.validate_dataset_file(backed=True)
+
+        # Validate result
+        assert not mock_log_warning.called
+        # The file was not read into memory
+        assert not mock_read_anndata.called
+
+    def test__validate_backed_h5ad_dataset__missing_metadata_and_empty_x_data(self):
+        test_anndata = self._create_fully_populated_anndata_object()
+        test_anndata.X = numpy.zeros(test_anndata.X.shape)
+        del test_anndata.obs["tissue"]
+        s3_uri = self._create_h5ad_object_in_s3_bucket("backed.h5ad", test_anndata)
+
+        # Run validator
+        validator = DatasetValidator(s3_uri)
+
+        # Validate result
+        with self.assertLogs(level="WARN") as logger:
+            validator.validate_dataset_file(backed=True)
+            self.assertIn("No data in the X layer can be found", logger.output[0])
+            self.assertIn("Missing metadata field tissue from obs", logger.output[1])
+
+    def _create_h5ad_object_in_s3_bucket(self, filename, anndata_object):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            h5ad_path = os.path.join(temp_dir, filename)
+            anndata_object.write_h5ad(h5ad_path)
+            with open(h5ad_path, "rb") as h5ad_file:
+                return self._create_dataset_object_in_s3_bucket(filename, content=h5ad_file.read())
+
+    def _create_loom_object_in_s3_bucket(self, filename, anndata_object, layers=None):
+        """
+        Write the anndata object as a Loom file, with the global attributes stored as in Loom 3.0.
+        """
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            loom_path = os.path.join(temp_dir, filename)
+            with h5py.File(loom_path, "w") as loom_file:
+                loom_file["matrix"] = anndata_object.X.T
+                for name, layer in (layers or {}).items():
+                    loom_file[f"layers/{name}"] = layer.T
+                loom_file["col_attrs/CellID"] = anndata_object.obs_names.to_numpy(dtype="S")
+                for name, values in anndata_object.obs.items():
+                    loom_file[f"col_attrs/{name}"] = values.to_numpy(dtype="S")
+                loom_file["row_attrs/Gene"] = anndata_object.var_names.to_numpy(dtype="S")
+                for name, value in anndata_object.uns.items():
+                    loom_file[f"attrs/{name}"] = value if isinstance(value, str) else json.dumps(value)
+            with open(loom_path, "rb") as loom_file:
+                return self._create_dataset_object_in_s3_bucket(filename, content=loom_file.read())
+
     def _create_fully_populated_anndata_object(self, obs_count=3, var_count=4):
         """
         Create an anndata with `obs_count` observations (usually cells) and `var_count` variables (usually genes).
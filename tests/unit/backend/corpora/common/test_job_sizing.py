@@ -0,0 +1,32 @@
+import unittest
+
+from backend.corpora.common.corpora_config import CorporaConfig
+from backend.corpora.common.job_sizing import get_job_resources
+from backend.corpora.common.utils.math_utils import GB
+from tests.unit.backend.fixtures import config
+
+
+class TestJobSizing(unittest.TestCase):
+    def setUp(self):
+        self.job_sizes = [
+            {"max_file_size_gb": 1, "memory": 4000, "vcpus": 1},
+            {"max_file_size_gb": 10, "memory": 16000, "vcpus": 2},
+        ]
+        CorporaConfig().set(dict(**config.CORPORA_TEST_CONFIG, upload_job_sizes=self.job_sizes))
+        self.addCleanup(CorporaConfig.reset)
+
+    def test__get_job_resources(self):
+        test_cases = [
+            (50 * 2 ** 20, dict(memory=4000, vcpus=1)),
+            (1 * GB, dict(memory=4000, vcpus=1)),
+            (1 * GB + 1, dict(memory=16000, vcpus=2)),
+            (30 * GB, dict(memory=16000, vcpus=2)),
+            (None, dict(memory=16000, vcpus=2)),
+        ]
+        for file_size, expected in test_cases:
+            with self.subTest(file_size):
+                self.assertEqual(expected, get_job_resources(file_size))
+
+    def test__get_job_resources__custom_table(self):
+        job_sizes = [{"max_file_size_gb": 2, "memory": 2000, "vcpus": 1}]
+        self.assertEqual(dict(memory=2000, vcpus=1), get_job_resources(1 * GB, job_sizes))
@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from backend.corpora.common import ontology_cache
+from backend.corpora.common.utils.corpora_constants import CorporaConstants
+
+
+class FakeS3FileSystem:
+    """Serves ontology files from memory and counts the downloads."""
+
+    def __init__(self, files):
+        self.files = files
+        self.opened = []
+        self.available = True
+
+    def invalidate_cache(self, path=None):
+        pass
+
+    def info(self, path):
+        if not self.available:
+            raise ConnectionError("S3 is not available")
+        return {"ETag": f'"{hash(self.files[path])}"', "Size": len(self.files[path])}
+
+    def open(self, path, mode="rb"):
+        self.opened.append(path)
+        return io.StringIO(self.files[path])
+
+
+class TestOntologyCache(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        environment = patch.dict(os.environ, {"CORPORA_ONTOLOGY_CACHE_DIR": self.cache_dir})
+        environment.start()
+        self.addCleanup(environment.stop)
+        ontology_cache.clear()
+        self.addCleanup(ontology_cache.clear)
+
+        self.ontologies = [CorporaConstants.UBERON_ONTOLOGY, CorporaConstants.MONDO_ONTOLOGY]
+        self.s3_file_system = FakeS3FileSystem(
+            {
+                CorporaConstants.UBERON_ONTOLOGY.s3_uri: "UBERON:0000001\nUBERON:0000002",
+                CorporaConstants.MONDO_ONTOLOGY.s3_uri: "MONDO:0000001",
+            }
+        )
+
+    def test__get_ontologies__shared_in_process(self):
+        ontologies = ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)
+        self.assertEqual(frozenset(["UBERON:0000001", "UBERON:0000002"]), ontologies["uberon"])
+        self.assertEqual(frozenset(["MONDO:0000001"]), ontologies["mondo"])
+
+        self.s3_file_system.available = False
+        self.assertIs(
+            ontologies["uberon"], ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)["uberon"]
+        )
+        self.assertEqual(2, len(self.s3_file_system.opened))
+
+    def test__get_ontologies__local_snapshot(self):
+        ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)
+        ontology_cache.clear()
+
+        with self.subTest("The snapshot is used while the ontology is unchanged"):
+            ontologies = ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)
+            self.assertEqual(frozenset(["MONDO:0000001"]), ontologies["mondo"])
+            self.assertEqual(2, len(self.s3_file_system.opened))
+
+        with self.subTest("The ontology is downloaded again when it changes"):
+            ontology_cache.clear()
+            self.s3_file_system.files[CorporaConstants.MONDO_ONTOLOGY.s3_uri] = "MONDO:0000001\nMONDO:0000002"
+            ontologies = ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)
+            self.assertEqual(frozenset(["MONDO:0000001", "MONDO:0000002"]), ontologies["mondo"])
+            self.assertEqual(3, len(self.s3_file_system.opened))
+            self.assertEqual(1, len([name for name in os.listdir(self.cache_dir) if name.startswith("mondo.")]))
+
+        with self.subTest("The newest snapshot is used when S3 can not be reached"):
+            ontology_cache.clear()
+            self.s3_file_system.available = False
+            ontologies = ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)
+            self.assertEqual(frozenset(["MONDO:0000001", "MONDO:0000002"]), ontologies["mondo"])
+
+    def test__get_ontologies__no_snapshot_and_no_s3(self):
+        self.s3_file_system.available = False
+        with self.assertRaises(ConnectionError):
+            ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)
+
+    def test__get_ontologies__terms_with_labels(self):
+        terms_with_labels = "MONDO:0000001\tdisease or disorder\nMONDO:0000002\t"
+        self.s3_file_system.files[CorporaConstants.MONDO_ONTOLOGY.s3_uri] = terms_with_labels
+        ontologies = ontology_cache.get_ontologies(self.s3_file_system, self.ontologies)
+        self.assertEqual(frozenset(["MONDO:0000001", "MONDO:0000002"]), ontologies["mondo"])
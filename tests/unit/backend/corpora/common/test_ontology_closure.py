@@ -0,0 +1,75 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from backend.corpora.common.ontology_closure import OntologyClosure
+
+
+class TestOntologyClosure(unittest.TestCase):
+    def setUp(self):
+        # alveolus of lung is_a organ part and part_of lung, lung is_a organ, both are anatomical entities.
+        self.closure = OntologyClosure.from_parents(
+            {
+                "UBERON:0002299": ["UBERON:0000064", "UBERON:0002048"],
+                "UBERON:0002048": ["UBERON:0000062"],
+                "UBERON:0000064": ["UBERON:0001062"],
+                "UBERON:0000062": ["UBERON:0001062"],
+                "UBERON:0001062": [],
+            }
+        )
+
+    def test__ancestors(self):
+        self.assertEqual(
+            frozenset(["UBERON:0000064", "UBERON:0002048", "UBERON:0000062", "UBERON:0001062"]),
+            self.closure.ancestors("UBERON:0002299"),
+        )
+        self.assertEqual(frozenset(), self.closure.ancestors("UBERON:0001062"))
+        self.assertEqual(frozenset(), self.closure.ancestors("UBERON:9999999"))
+
+    def test__is_ancestor(self):
+        self.assertTrue(self.closure.is_ancestor("UBERON:0002048", "UBERON:0002299"))
+        self.assertTrue(self.closure.is_ancestor("UBERON:0001062", "UBERON:0002299"))
+        self.assertFalse(self.closure.is_ancestor("UBERON:0002299", "UBERON:0002048"))
+        self.assertFalse(self.closure.is_ancestor("UBERON:0002299", "UBERON:0002299"))
+
+    def test__descendants(self):
+        self.assertEqual(frozenset(["UBERON:0002299"]), self.closure.descendants("UBERON:0002048"))
+        self.assertEqual(
+            frozenset(["UBERON:0002299", "UBERON:0002048", "UBERON:0000064", "UBERON:0000062"]),
+            self.closure.descendants("UBERON:0001062"),
+        )
+
+    def test__roll_up(self):
+        categories = ["UBERON:0002048", "UBERON:0000062", "UBERON:0000064"]
+        self.assertEqual(["UBERON:0002048", "UBERON:0000062"], self.closure.roll_up("UBERON:0002048", categories))
+        self.assertEqual(categories, self.closure.roll_up("UBERON:0002299", categories))
+
+    def test__parents_outside_the_ontology(self):
+        closure = OntologyClosure.from_parents({"CL:0000066": ["CL:0000000", "UBERON:0000483"]})
+        self.assertIn("UBERON:0000483", closure)
+        self.assertEqual(frozenset(["CL:0000000", "UBERON:0000483"]), closure.ancestors("CL:0000066"))
+
+    def test__cycle(self):
+        # A:0 is below the cycle of A:1, A:2 and A:3, and A:4 above it.
+        closure = OntologyClosure.from_parents(
+            {"A:0": ["A:1"], "A:1": ["A:2"], "A:2": ["A:3"], "A:3": ["A:1", "A:4"], "A:4": []}
+        )
+        self.assertEqual(frozenset(["A:2", "A:3", "A:4"]), closure.ancestors("A:1"))
+        self.assertEqual(frozenset(["A:1", "A:3", "A:4"]), closure.ancestors("A:2"))
+        self.assertEqual(frozenset(["A:1", "A:2", "A:4"]), closure.ancestors("A:3"))
+        self.assertEqual(frozenset(["A:1", "A:2", "A:3", "A:4"]), closure.ancestors("A:0"))
+        self.assertEqual(frozenset(), closure.ancestors("A:4"))
+
+    def test__save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "uberon.closure.gz")
+            self.closure.save(path)
+            closure = OntologyClosure.load(path)
+        self.assertEqual(self.closure.terms, closure.terms)
+        for term in self.closure.terms:
+            self.assertEqual(self.closure.ancestors(term), closure.ancestors(term))
+
+    def test__unsupported_format(self):
+        with self.assertRaises(ValueError):
+            OntologyClosure.from_bytes(gzip.compress(b'{"format_version": 0}\n'))
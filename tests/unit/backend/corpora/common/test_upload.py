@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from backend.corpora.common.corpora_config import CorporaConfig
+from backend.corpora.common.upload import get_download_url, get_verified_file_info, verify_file_info
+from backend.corpora.common.utils.dropbox import MissingHeaderException
+from backend.corpora.common.utils.exceptions import (
+    InvalidFileFormatException,
+    InvalidUploadLinkException,
+    MaxFileSizeExceededException,
+)
+from backend.corpora.common.utils.math_utils import GB
+from tests.unit.backend.fixtures import config
+
+
+class TestUpload(unittest.TestCase):
+    def setUp(self):
+        CorporaConfig().set(config.CORPORA_TEST_CONFIG)
+        self.url = "https://www.dropbox.com/s/12345678901234/test.h5ad?dl=1"
+
+    def test__get_download_url__OK(self):
+        self.assertEqual(self.url, get_download_url("https://www.dropbox.com/s/12345678901234/test.h5ad?dl=0"))
+
+    def test__get_download_url__invalid(self):
+        with self.assertRaises(InvalidUploadLinkException):
+            get_download_url("https://test_url.com")
+
+    def test__verify_file_info__OK(self):
+        verify_file_info({"size": 1, "name": "file.H5AD"})
+
+    def test__verify_file_info__neg(self):
+        with self.subTest("Too Large"):
+            with self.assertRaises(MaxFileSizeExceededException):
+                verify_file_info({"size": 31 * GB, "name": "file.h5ad"})
+
+        with self.subTest("Unsupported Format"):
+            with self.assertRaises(InvalidFileFormatException):
+                verify_file_info({"size": 1, "name": "file.txt"})
+
+    @patch("backend.corpora.common.utils.dropbox.get_file_info", return_value={"size": 1, "name": "file.h5ad"})
+    def test__get_verified_file_info__OK(self, mock_get_file_info):
+        self.assertEqual({"size": 1, "name": "file.h5ad"}, get_verified_file_info(self.url))
+        mock_get_file_info.assert_called_once_with(self.url)
+
+    def test__get_verified_file_info__dropbox_errors(self):
+        with self.subTest("HTTP Error"):
+            with patch("backend.corpora.common.utils.dropbox.get_file_info", side_effect=requests.HTTPError()):
+                with self.assertRaises(InvalidUploadLinkException) as ex:
+                    get_verified_file_info(self.url)
+                self.assertEqual("The URL provided causes an error with Dropbox.", ex.exception.detail)
+
+        with self.subTest("Missing Header"):
+            with patch("backend.corpora.common.utils.dropbox.get_file_info", side_effect=MissingHeaderException()):
+                with self.assertRaises(InvalidUploadLinkException):
+                    get_verified_file_info(self.url)
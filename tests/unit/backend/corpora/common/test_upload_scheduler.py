@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from backend.corpora.common import upload_scheduler
+from backend.corpora.common.corpora_config import CorporaConfig
+from backend.corpora.common.corpora_orm import DbUploadQueueEntry, UploadStatus
+from backend.corpora.common.entities.dataset import Dataset
+from backend.corpora.common.utils.db_utils import DbUtils
+from tests.unit.backend.fixtures import config
+from tests.unit.backend.fixtures.data_portal_test_case import DataPortalTestCase
+from tests.unit.backend.utils import BogusDatasetParams
+
+
+class TestUploadScheduler(DataPortalTestCase):
+    def setUp(self):
+        CorporaConfig().set(
+            dict(
+                **config.CORPORA_TEST_CONFIG,
+                upload_max_concurrent_jobs=3,
+                upload_max_concurrent_jobs_per_owner=2,
+            )
+        )
+        self.addCleanup(CorporaConfig.reset)
+        self.db = DbUtils()
+        self.db.session.query(DbUploadQueueEntry).delete()
+        self.db.commit()
+        patcher = patch("backend.corpora.common.upload_sfn.start_upload_sfn")
+        self.mock_start_upload_sfn = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.session.query(DbUploadQueueEntry).delete()
+        self.db.commit()
+        self.db.close()
+
+    def create_uploads(self, owner, file_sizes):
+        uploads = []
+        for file_size in file_sizes:
+            dataset = Dataset.create(**BogusDatasetParams.get(), processing_status=Dataset.new_processing_status())
+            uploads.append(
+                dict(
+                    collection_uuid="test_collection_id",
+                    dataset_uuid=dataset.id,
+                    url=f"https://www.dropbox.com/s/12345678901234/{dataset.id}.h5ad?dl=1",
+                    owner=owner,
+                    file_size=file_size,
+                )
+            )
+        return uploads
+
+    def started_datasets(self):
+        return [call[0][1] for call in self.mock_start_upload_sfn.call_args_list]
+
+    def test__enqueue__starts_immediately(self):
+        upload = self.create_uploads("owner_1", [10])[0]
+        upload_scheduler.enqueue(**upload)
+        self.assertEqual([upload["dataset_uuid"]], self.started_datasets())
+
+    def test__enqueue_many__per_owner_limit(self):
+        uploads = self.create_uploads("owner_1", [30, 10, 20])
+        upload_scheduler.enqueue_many(uploads)
+
+        # The smallest files are started first, and owner_1 can only run 2 jobs at once.
+        self.assertEqual([uploads[1]["dataset_uuid"], uploads[2]["dataset_uuid"]], self.started_datasets())
+
+        with self.subTest("Other owners are not blocked"):
+            other_upload = self.create_uploads("owner_2", [40])[0]
+            upload_scheduler.enqueue(**other_upload)
+            self.assertEqual(other_upload["dataset_uuid"], self.started_datasets()[-1])
+
+        with self.subTest("The global limit is enforced"):
+            another_upload = self.create_uploads("owner_3", [1])[0]
+            upload_scheduler.enqueue(**another_upload)
+            self.assertEqual(3, self.mock_start_upload_sfn.call_count)
+
+        with self.subTest("Releasing a slot starts the next upload"):
+            upload_scheduler.release(uploads[1]["dataset_uuid"])
+            self.assertEqual(4, self.mock_start_upload_sfn.call_count)
+            self.assertEqual(another_upload["dataset_uuid"], self.started_datasets()[-1])
+
+    def test__schedule__start_failure(self):
+        uploads = self.create_uploads("owner_1", [10, 20])
+        self.mock_start_upload_sfn.side_effect = [Exception("Failed to start"), None]
+
+        upload_scheduler.enqueue_many(uploads[:1])
+        upload_scheduler.enqueue_many(uploads[1:])
+
+        self.db.session.expire_all()
+        failed_dataset = Dataset.get(uploads[0]["dataset_uuid"])
+        self.assertEqual(UploadStatus.FAILED, failed_dataset.processing_status.upload_status)
+        queued = [entry.dataset_id for entry in self.db.query([DbUploadQueueEntry])]
+        self.assertEqual([uploads[1]["dataset_uuid"]], queued)
+
+    def test__schedule__timed_out_slots(self):
+        uploads = self.create_uploads("owner_1", [10, 20, 30])
+        upload_scheduler.enqueue_many(uploads)
+        self.assertEqual(2, self.mock_start_upload_sfn.call_count)
+
+        # The job of the first upload died without releasing its slot.
+        self.db.session.query(DbUploadQueueEntry).filter(
+            DbUploadQueueEntry.dataset_id == uploads[0]["dataset_uuid"]
+        ).update({DbUploadQueueEntry.started_at: datetime.utcnow() - timedelta(days=1)}, synchronize_session=False)
+        self.db.commit()
+
+        with self.subTest("A timed out job that is still running keeps its slot"):
+            with patch(
+                "backend.corpora.common.upload_sfn.get_running_dataset_uuids",
+                return_value={uploads[0]["dataset_uuid"]},
+            ):
+                upload_scheduler.schedule()
+            self.assertEqual(2, self.mock_start_upload_sfn.call_count)
+
+        with self.subTest("The slot is kept if the running jobs can not be listed"):
+            with patch(
+                "backend.corpora.common.upload_sfn.get_running_dataset_uuids", side_effect=Exception("Throttled")
+            ):
+                upload_scheduler.schedule()
+            self.assertEqual(2, self.mock_start_upload_sfn.call_count)
+
+        with patch("backend.corpora.common.upload_sfn.get_running_dataset_uuids", return_value=set()):
+            upload_scheduler.schedule()
+        self.assertEqual(uploads[2]["dataset_uuid"], self.started_datasets()[-1])
+        queued = sorted(entry.dataset_id for entry in self.db.query([DbUploadQueueEntry]))
+        self.assertEqual(sorted([uploads[1]["dataset_uuid"], uploads[2]["dataset_uuid"]]), queued)
+
+    def test__cancel(self):
+        uploads = self.create_uploads("owner_1", [10, 20, 30])
+        upload_scheduler.enqueue_many(uploads)
+        self.assertEqual(2, self.mock_start_upload_sfn.call_count)
+
+        self.assertFalse(upload_scheduler.cancel(uploads[0]["dataset_uuid"]))
+        self.assertTrue(upload_scheduler.cancel(uploads[2]["dataset_uuid"]))
+
+        # The cancelled upload is not started when a slot is freed.
+        upload_scheduler.release(uploads[0]["dataset_uuid"])
+        self.assertEqual(2, self.mock_start_upload_sfn.call_count)
+        queued = [entry.dataset_id for entry in self.db.query([DbUploadQueueEntry])]
+        self.assertEqual([uploads[1]["dataset_uuid"]], queued)
+
+    def test__release__errors_are_not_raised(self):
+        upload = self.create_uploads("owner_1", [10])[0]
+        upload_scheduler.enqueue(**upload)
+
+        with patch("backend.corpora.common.upload_scheduler.schedule", side_effect=Exception("Failed to schedule")):
+            upload_scheduler.release(upload["dataset_uuid"])
+        self.assertEqual([], self.db.query([DbUploadQueueEntry]))
@@ -0,0 +1,51 @@
+import json
+import unittest
+
+from backend.corpora.common.validation_report import MAX_REPORTED_VALUES, WARNING, ValidationReport
+
+
+class TestValidationReport(unittest.TestCase):
+    def test__check__records_issues_and_bytes_read(self):
+        bytes_read = [0]
+        report = ValidationReport("s3://bucket/dataset.h5ad", lambda: bytes_read[0])
+
+        with report.check("read"):
+            bytes_read[0] += 100
+        with report.check("obs.sex"):
+            report.add_issue("Values are not part of the accepted enum values", field="sex", values=["m", "f"])
+
+        read, sex = report.checks
+        self.assertEqual(100, read["bytes_read"])
+        self.assertEqual([], read["issues"])
+        self.assertEqual(0, sex["bytes_read"])
+        self.assertEqual("sex", sex["issues"][0]["field"])
+        self.assertEqual(["m", "f"], sex["issues"][0]["values"])
+        self.assertFalse(report.is_valid)
+        self.assertGreaterEqual(read["wall_time"], 0)
+
+    def test__add_issue__caps_the_reported_values(self):
+        report = ValidationReport()
+        with report.check("obs.tissue_ontology"):
+            report.add_issue("Unknown terms", values=range(MAX_REPORTED_VALUES * 2))
+
+        [issue] = report.issues
+        self.assertEqual(MAX_REPORTED_VALUES, len(issue["values"]))
+        self.assertEqual(MAX_REPORTED_VALUES * 2, issue["count"])
+
+    def test__add_issue__outside_of_a_check(self):
+        report = ValidationReport()
+        report.add_issue("Could not check the X layer", severity=WARNING)
+
+        self.assertEqual(["validation"], [check["name"] for check in report.checks])
+        self.assertTrue(report.is_valid)
+
+    def test__to_json(self):
+        report = ValidationReport("s3://bucket/dataset.h5ad")
+        with report.check("var.index"):
+            report.add_issue("Each variable is not unique!")
+
+        report_dict = json.loads(report.to_json())
+        self.assertEqual("s3://bucket/dataset.h5ad", report_dict["s3_uri"])
+        self.assertFalse(report_dict["is_valid"])
+        self.assertEqual("var.index", report_dict["checks"][0]["name"])
+        self.assertEqual(1, len(report_dict["checks"][0]["issues"]))
@@ -1,4 +1,5 @@
 import enum
+import json
 import logging
 import os
 import pathlib
@@ -12,6 +13,7 @@ import numpy
 import pandas
 from moto import mock_s3
 
+from backend.corpora.common.corpora_config import CorporaConfig
 from backend.corpora.common.corpora_orm import (
     CollectionVisibility,
     DatasetArtifactType,
@@ -22,9 +24,11 @@ from backend.corpora.common.corpora_orm import (
 )
 from backend.corpora.common.entities.collection import Collection
 from backend.corpora.common.entities.dataset import Dataset
-from backend.corpora.common.utils.exceptions import CorporaException
+from backend.corpora.common.utils.exceptions import CorporaException, InvalidFileFormatException
 from backend.corpora.dataset_processing import process
 from backend.corpora.dataset_processing.process import convert_file_ignore_exceptions
+from backend.corpora.lambdas.upload_failures.upload import update_dataset_processing_status_to_failed
+from tests.unit.backend.fixtures import config
 from tests.unit.backend.fixtures.data_portal_test_case import DataPortalTestCase
 from tests.unit.backend.fixtures.generate_data_mixin import GenerateDataMixin
 
@@ -304,6 +308,63 @@ class TestDatasetProcessing(DataPortalTestCase, GenerateDataMixin):
 
         fake_env.stop()
 
+    @patch("backend.corpora.common.catalog.try_update_catalog")
+    def test_update_catalog(self, mock_try_update_catalog):
+        for visibility, call_count in [(CollectionVisibility.PRIVATE, 0), (CollectionVisibility.PUBLIC, 1)]:
+            with self.subTest(visibility):
+                mock_try_update_catalog.reset_mock()
+                collection = Collection.create(visibility=visibility)
+                dataset = Dataset.create(collection_id=collection.id, collection_visibility=visibility)
+                process.update_catalog(dataset.id)
+                self.assertEqual(call_count, mock_try_update_catalog.call_count)
+
+    @patch("backend.corpora.common.utils.dropbox.get_file_info", return_value={"size": 1, "name": "file.txt"})
+    def test_download_from_dropbox_url__invalid_file(self, mock_get_file_info):
+        CorporaConfig().set(config.CORPORA_TEST_CONFIG)
+        dataset = self.generate_dataset(processing_status=Dataset.new_processing_status())
+
+        with self.assertRaises(InvalidFileFormatException):
+            process.download_from_dropbox_url(
+                dataset.id, "https://www.dropbox.com/s/12345678901234/test.txt?dl=0", "local.h5ad"
+            )
+
+        processing_status = Dataset.get(dataset.id).processing_status
+        self.assertEqual(processing_status.upload_status, UploadStatus.FAILED)
+        self.assertEqual(processing_status.upload_message, InvalidFileFormatException().detail)
+
+    @patch("backend.corpora.common.utils.dropbox.get_file_info", return_value={"size": 1, "name": "file.txt"})
+    def test_main__upload_rejected(self, mock_get_file_info):
+        CorporaConfig().set(config.CORPORA_TEST_CONFIG)
+        dataset = self.generate_dataset(processing_status=Dataset.new_processing_status())
+        env = {
+            "DATASET_ID": dataset.id,
+            "DROPBOX_URL": "https://www.dropbox.com/s/12345678901234/test.txt?dl=0",
+            "ARTIFACT_BUCKET": "yyy",
+            "CELLXGENE_BUCKET": "zzz",
+            "DEPLOYMENT_STAGE": "test",
+        }
+
+        with patch.dict(os.environ, env), self.assertRaises(SystemExit) as exit_context:
+            process.main()
+        self.assertEqual(process.UPLOAD_REJECTED_EXIT_CODE, exit_context.exception.code)
+
+        with self.subTest("The rejected job is not retried"):
+            pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../.."))
+            with open(os.path.join(pkg_root, "scripts", "upload_sfn_definition.json")) as f:
+                definition = json.load(f)
+            retry_strategy = definition["States"]["Manage Batch task"]["Parameters"]["RetryStrategy"]
+            self.assertIn(
+                {"OnExitCode": str(process.UPLOAD_REJECTED_EXIT_CODE), "Action": "EXIT"},
+                retry_strategy["EvaluateOnExit"],
+            )
+
+        with self.subTest("The failure handler keeps the reason the upload was rejected"):
+            update_dataset_processing_status_to_failed(dataset.id, '{"Status": "FAILED"}')
+            Dataset.db.session.expire_all()
+            processing_status = Dataset.get(dataset.id).processing_status
+            self.assertEqual(processing_status.upload_status, UploadStatus.FAILED)
+            self.assertEqual(processing_status.upload_message, InvalidFileFormatException().detail)
+
     @patch("backend.corpora.dataset_processing.process.make_loom")
     @patch("backend.corpora.dataset_processing.process.make_seurat")
     def test_create_artifacts(self, make_seurat, make_loom):
@@ -3,7 +3,10 @@ import pathlib
 import shutil
 from unittest import TestCase
 import tempfile
+from unittest.mock import patch
+
 import boto3
+import botocore
 from moto import mock_s3
 
 from backend.corpora.common.utils.aws import delete_many_from_s3
@@ -66,6 +69,42 @@ class TestUploadFailureHandling(TestCase):
         resp = self.s3.list_objects_v2(Bucket=self.bucket_name, Prefix=self.uuid)
         self.assertNotIn("Contents", resp)
 
+    @patch("backend.corpora.common.utils.aws.S3_DELETE_BATCH_SIZE", 3)
+    def test_delete_from_s3_deletes_in_batches(self):
+        for i in range(10):
+            self.s3.put_object(Bucket=self.bucket_name, Key=f"{self.uuid}/remixed.cxg/tile_{i}", Body="words")
+        # An object that only shares the beginning of the prefix must not be deleted
+        self.s3.put_object(Bucket=self.bucket_name, Key=f"{self.uuid}_other/remixed.h5ad", Body="words")
+
+        errors = delete_many_from_s3(self.bucket_name, self.uuid)
+
+        self.assertEqual([], errors)
+        resp = self.s3.list_objects_v2(Bucket=self.bucket_name, Prefix=self.uuid)
+        self.assertEqual([f"{self.uuid}_other/remixed.h5ad"], [obj["Key"] for obj in resp["Contents"]])
+        self.s3.delete_object(Bucket=self.bucket_name, Key=f"{self.uuid}_other/remixed.h5ad")
+
+    def test_delete_from_s3_reports_errors(self):
+        make_api_call = botocore.client.BaseClient._make_api_call
+
+        def mock_make_api_call(client, operation_name, api_params):
+            if operation_name == "DeleteObjects":
+                objects = api_params["Delete"]["Objects"]
+                return {
+                    "Errors": [
+                        {"Key": obj["Key"], "Code": "AccessDenied", "Message": "Access Denied"} for obj in objects
+                    ]
+                }
+            return make_api_call(client, operation_name, api_params)
+
+        with patch("botocore.client.BaseClient._make_api_call", new=mock_make_api_call):
+            errors = delete_many_from_s3(self.bucket_name, self.uuid)
+
+        self.assertEqual(4, len(errors))
+        self.assertEqual(
+            {"Key": f"{self.uuid}/remixed.cxg", "Code": "AccessDenied", "Message": "Access Denied"}, errors[0]
+        )
+        delete_many_from_s3(self.bucket_name, self.uuid)
+
     def test_delete_from_s3_handles_no_files(self):
         # delete files
         delete_many_from_s3(self.bucket_name, self.uuid)
@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+import anndata
+import numpy as np
+import pandas as pd
+
+curation_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../../../../backend/scripts/curation")
+)  # noqa
+sys.path.insert(0, curation_root)  # noqa
+
+from utils import matrix_io
+
+
+class TestConcatCells(unittest.TestCase):
+    def setUp(self):
+        self.frames = [
+            pd.DataFrame([[1.0, 0.0, 2.0], [0.0, 3.0, 0.0]], index=["c1", "c2"], columns=["A", "B", "C"]),
+            pd.DataFrame([[4.0, 0.0], [5.0, 6.0], [0.0, 0.0]], index=["c3", "c4", "c5"], columns=["D", "B"]),
+        ]
+        self.adatas = [
+            anndata.AnnData(
+                X=frame.to_numpy(), obs=pd.DataFrame(index=frame.index), var=pd.DataFrame(index=frame.columns)
+            )
+            for frame in self.frames
+        ]
+
+    def test__matches_pd_concat(self):
+        expected = pd.concat(self.frames)
+        adata = matrix_io.concat_cells(self.adatas, keys=["first", "second"])
+
+        self.assertListEqual(list(expected.index), list(adata.obs_names))
+        self.assertListEqual(list(expected.columns), list(adata.var_names))
+        X = adata.X.toarray()
+        X[matrix_io.unmeasured_mask(adata.obs, adata.var)] = np.nan
+        np.testing.assert_array_equal(expected.to_numpy(), X)
+
+    def test__source_matrix(self):
+        adata = matrix_io.concat_cells(self.adatas, keys=["first", "second"])
+        self.assertListEqual(["first", "first", "second", "second", "second"], list(adata.obs["source_matrix"]))
+        self.assertListEqual([True, True, True, False], list(adata.var["measured_in_first"]))
+        self.assertListEqual([False, True, False, True], list(adata.var["measured_in_second"]))
+
+    def test__keys_must_match_matrices(self):
+        with self.assertRaises(ValueError):
+            matrix_io.concat_cells(self.adatas, keys=["first"])
@@ -0,0 +1,45 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+curation_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../../../../backend/scripts/curation")
+)  # noqa
+sys.path.insert(0, curation_root)  # noqa
+
+from utils import ontology
+
+
+class TestGetOntologyLabels(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        patcher = patch.object(ontology, "_cache", ontology._LookupCache(os.path.join(tmp_dir, "ols.sqlite")))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test__failed_lookups_keep_the_fetched_labels(self):
+        def fetch_ontology_label(session, curie):
+            if curie == "CL:0000002":
+                raise ontology.OntologyLookupError(f"Curie {curie} lookup failed, got status code 500: error")
+            return f"label of {curie}"
+
+        with patch.object(ontology, "_fetch_ontology_label", side_effect=fetch_ontology_label) as mock_fetch:
+            with self.assertRaises(ontology.OntologyLookupError) as context:
+                ontology.get_ontology_labels(["CL:0000001", "CL:0000002", "CL:0000003"])
+            self.assertIn("CL:0000002", str(context.exception))
+            self.assertEqual(3, mock_fetch.call_count)
+
+            # Only the failed curie is looked up again.
+            mock_fetch.reset_mock()
+            with self.assertRaises(ontology.OntologyLookupError):
+                ontology.get_ontology_labels(["CL:0000001", "CL:0000002", "CL:0000003"])
+            self.assertEqual(["CL:0000002"], [call[0][1] for call in mock_fetch.call_args_list])
+
+        self.assertEqual(
+            {"CL:0000001": "label of CL:0000001", "CL:0000003": "label of CL:0000003"},
+            ontology._LookupCache(self.cache.path).get_labels(["CL:0000001", "CL:0000002", "CL:0000003"]),
+        )